@@ -85,11 +85,29 @@ Quickstart:
     EVENTS_READY_FOR_DISPATCH_QUEUE_SIZE
     FAILED_EVENTS_RETRY_INTERVAL
     FAILED_EVENTS_MAX_AGE
+    FAILED_EVENTS_RETRY_CONCURRENCY
+    FAILED_EVENTS_MAX_RETRIES_PER_PASS
+    FAILED_EVENTS_MAX_RETRIES_PER_SECOND
+    SAGA_RETRY_INTERVAL
+    SAGA_RETRY_CONCURRENCY
+    AGGREGATE_CACHE_SIZE
+    SERIALIZE_COMMANDS_BY_AGGREGATE
+    EVENT_DISPATCH_WORKER_COUNT
+    ORDER_EVENT_DISPATCH_BY_AGGREGATE
+    EVENT_DISPATCH_BATCH_SIZE
+    EVENT_DISPATCH_BATCH_LINGER_MILLISECONDS
+    EVENT_ID_NODE_ID
+    SNAPSHOT_WRITE_QUEUE_SIZE
+    SNAPSHOT_CACHE_MAX_BYTES
+    SNAPSHOT_CACHE_NEGATIVE_TTL_MILLISECONDS
+    PREFETCH_EVENTS_WITH_SNAPSHOT
 """
 
 from .error.error import JangleError
 from .logging.logging import (
     log,
+    is_log_enabled,
+    log_vars,
     LogToggles,
     ERROR,
     FATAL,
@@ -120,14 +138,57 @@ from .settings import (
     get_events_ready_for_dispatch_queue_size,
     set_saga_retry_interval,
     get_saga_retry_interval,
+    set_saga_retry_concurrency,
+    get_saga_retry_concurrency,
     get_failed_events_retry_interval,
     set_failed_events_retry_interval,
     get_failed_events_max_age,
     set_failed_events_max_age,
+    get_failed_events_retry_concurrency,
+    set_failed_events_retry_concurrency,
+    get_failed_events_max_retries_per_pass,
+    set_failed_events_max_retries_per_pass,
+    get_failed_events_max_retries_per_second,
+    set_failed_events_max_retries_per_second,
+    get_aggregate_cache_size,
+    set_aggregate_cache_size,
+    get_serialize_commands_by_aggregate,
+    set_serialize_commands_by_aggregate,
+    get_event_dispatch_worker_count,
+    set_event_dispatch_worker_count,
+    get_order_event_dispatch_by_aggregate,
+    set_order_event_dispatch_by_aggregate,
+    get_event_dispatch_batch_size,
+    set_event_dispatch_batch_size,
+    get_event_dispatch_batch_linger_milliseconds,
+    set_event_dispatch_batch_linger_milliseconds,
+    get_event_id_node_id,
+    set_event_id_node_id,
+    get_snapshot_write_queue_size,
+    set_snapshot_write_queue_size,
+    get_snapshot_cache_max_bytes,
+    set_snapshot_cache_max_bytes,
+    get_snapshot_cache_negative_ttl_milliseconds,
+    set_snapshot_cache_negative_ttl_milliseconds,
+    get_prefetch_events_with_snapshot,
+    set_prefetch_events_with_snapshot,
+)
+from .registration.utility import (
+    find_decorated_functions,
+    find_decorated_method_names,
+    register_instance_methods,
 )
-from .registration.utility import find_decorated_method_names, register_instance_methods
 from .registration.background_tasks import background_tasks
 
+from .metrics.metrics_sink import (
+    DuplicateMetricsSinkError,
+    Metrics,
+    MetricsSink,
+    metrics_sink_instance,
+    register_metrics_sink,
+)
+from .metrics.histogram_metrics_sink import Histogram, HistogramMetricsSink
+
 from .snapshot.snapshot_repository import (
     DuplicateSnapshotRepositoryError,
     SnapshotRepositoryMissingError,
@@ -137,8 +198,23 @@ from .snapshot.snapshot_repository import (
 )
 
 from .snapshot.snapshottable import SnapshotError, Snapshottable
+from .snapshot.snapshot_policy import (
+    DuplicateSnapshotPolicyError,
+    FixedFrequencySnapshotPolicy,
+    ReplayCostSnapshotPolicy,
+    SnapshotPolicy,
+    register_snapshot_policy,
+    snapshot_policy_instance,
+)
 
 from .snapshot.in_memory_snapshot_repository import InMemorySnapshotRepository
+from .snapshot.cached_snapshot_repository import CachedSnapshotRepository
+from .snapshot.snapshot_writer import (
+    SnapshotWriter,
+    begin_writing_snapshots,
+    snapshot_writer_instance,
+    stop_writing_snapshots,
+)
 
 from .event.register_event_id_factory import (
     DuplicateEventIdFactoryRegistrationError,
@@ -147,7 +223,9 @@ from .event.register_event_id_factory import (
     event_id_factory_instance,
     register_event_id_factory,
 )
+from .event.snowflake_event_id_factory import SnowflakeEventIdFactory
 from .event.event import Event, VersionedEvent
+from .event.compact_event import CompactEvent, CompactVersionedEvent
 from .event.duplicate_key_error import DuplicateKeyError
 
 from .command.command_response import CommandResponse
@@ -178,11 +256,12 @@ from .aggregate.aggregate import (
     ReconstituteStateMethodMissingError,
     ReconstituteStateError,
     CommandValidationError,
-    register_instance_methods,
     reconstitute_aggregate_state,
     validate_command,
 )
 
+from .aggregate.aggregate_cache import AggregateCache, aggregate_cache_instance
+
 from .aggregate.register_aggregate import (
     command_to_aggregate_map_instance,
     DuplicateCommandRegistrationError,
@@ -195,6 +274,7 @@ from .event.register_event import (
     DuplicateEventNameRegistrationError,
     RegisterEvent,
     get_event_name,
+    get_event_names,
     get_event_type,
 )
 
@@ -208,19 +288,34 @@ from .event.event_handler import (
 )
 from .event.event_dispatcher import (
     begin_processing_committed_events,
+    stop_processing_committed_events,
+    drain_committed_events,
     enqueue_committed_event_for_dispatch,
     EventDispatcherMissingError,
     DuplicateEventDispatcherError,
     EventDispatcherBadSignatureError,
     register_event_dispatcher,
+    register_batch_event_dispatcher,
     event_dispatcher_instance,
+    is_batch_event_dispatcher,
     default_event_dispatcher,
+    default_batch_event_dispatcher,
     default_event_dispatcher_with_blacklist,
 )
 
-from .command.command_handler import handle_command
+from .command.aggregate_lock import (
+    AggregateLock,
+    AggregateLockMetrics,
+    aggregate_lock_instance,
+)
+from .command.command_handler import handle_command, handle_commands
 
-from .event.event_daemon import begin_retry_failed_events_loop, retry_failed_events
+from .event.event_daemon import (
+    begin_retry_failed_events_loop,
+    retry_failed_events,
+    RetryFailedEventsError,
+    RetryFailedEventsStats,
+)
 from .event.in_memory_event_repository import InMemoryEventRepository
 
 from .query.handlers import (
@@ -248,18 +343,25 @@ from .saga.register_saga import (
     get_saga_name,
     get_saga_type,
 )
+from .saga.snapshottable_saga import SagaSnapshotError, SnapshottableSaga
 from .saga.saga_repository import (
     SagaRepositoryMissingError,
     DuplicateSagaRepositoryError,
     RegisterSagaRepository,
     SagaRepository,
     saga_repository_instance,
+    store_saga_snapshot_if_applicable,
 )
 from .saga.in_memory_transient_saga_repository import InMemorySagaRepository
+from .saga.saga_retry_scheduler import (
+    SagaRetryScheduler,
+    saga_retry_scheduler_instance,
+)
 from .saga.saga_handler import handle_saga_event
 from .saga.saga_daemon import (
     retry_sagas,
     begin_retry_sagas_loop,
+    begin_saga_retry_scheduler,
     retry_saga,
     SagaRetryError,
 )
@@ -274,6 +376,11 @@ from .serialization.serialization_registration import (
     get_serializer,
     get_deserializer,
 )
+from .serialization.event_codec import EventCodec, EventCodecError, event_codec_instance
+from .event.segment_file_event_repository import (
+    SegmentFileEventRepository,
+    SegmentFileEventRepositoryError,
+)
 
 
 from .validation.attributes import ImmutableAttributeDescriptor
@@ -1,5 +1,6 @@
 import functools
 import inspect
+from typing import AsyncIterable, Callable, Iterable
 
 from pyjangle import (
     Command,
@@ -7,21 +8,21 @@ from pyjangle import (
     VersionedEvent,
     LogToggles,
     log,
+    log_vars,
     JangleError,
-    find_decorated_method_names,
-    register_instance_methods,
+    find_decorated_functions,
 )
 
 # References to methods decorated with @reconstitute_aggregate_state map are stored in
-# an attribute on the aggregate with this name.  The attribute contains a map having a
-# key corresponding to the event_type argument of @reconstitute_aggregate_state and a
-# value corresponding to the decorated method.
+# an attribute on the aggregate class with this name.  The attribute contains a map
+# having a key corresponding to the event_type argument of
+# @reconstitute_aggregate_state and a value corresponding to the decorated function.
 EVENT_TO_STATE_RECONSTITUTOR_ATTRIBUTE_NAME = "_event_to_state_reconstitutor"
 
 # References to methods decorated with @validate_command map are stored in an attribute
-# on the aggregate with this name.  The attribute contains a map having a key
+# on the aggregate class with this name.  The attribute contains a map having a key
 # corresponding to the command_type argument of @validate_command and a value
-# corresponding to the decorated method.
+# corresponding to the decorated function.
 COMMAND_TYPE_TO_COMMAND_VALIDATOR_ATTRIBUTE_NAME = "_command_type_to_command_validator"
 
 # When a method is decorated with @reconstitute_aggregate_state, an attribute is added
@@ -97,79 +98,54 @@ class Aggregate:
     written to an event store, so it is an error to use them for any processing.
     """
 
-    # Cache of the names of methods decorated with `command_validator` with a key
-    # corresponding to the type of the aggregate, and a value corresponding to a list of
-    # method names as strings.
-    _aggregate_type_to_command_validator_method_names = dict()
-    # Cache of the names of methods decorated with `reconstitute_aggregate_state` with a
-    # key corresponding to the type of the aggregate, and a value corresponding to a
-    # list of method names as strings.
-    _aggregate_type_to_state_reconstitutor_method_names = dict()
-
-    def __init__(self, id: any):
-        self.id = id
-        self._new_events = []
-        self._register_aggregate_validators_and_state_reconstitutors()
-
-    def _register_aggregate_validators_and_state_reconstitutors(self):
-        """Registers methods decorated with @validate_command and @reconstitute_aggregate_state."""
-        aggregate_type = type(self)
-
-        # Cache method names for @command_validator and @reconstitute_aggregate_state
-        # of the first instantiation of each aggregate type.
-        if (
-            aggregate_type
-            not in Aggregate._aggregate_type_to_command_validator_method_names
-        ):
-            Aggregate._aggregate_type_to_command_validator_method_names[
-                aggregate_type
-            ] = find_decorated_method_names(
-                self, lambda method: hasattr(method, COMMAND_TYPE_ATTRIBUTE_NAME)
-            )
-            log(
-                LogToggles.command_validator_method_name_caching,
-                "Command Validator Method Names Cached",
-                {
-                    "aggregate_type": str(aggregate_type),
-                    "method_names": Aggregate._aggregate_type_to_command_validator_method_names[
-                        aggregate_type
-                    ],
-                },
-            )
-        if (
-            aggregate_type
-            not in Aggregate._aggregate_type_to_state_reconstitutor_method_names
-        ):
-            Aggregate._aggregate_type_to_state_reconstitutor_method_names[
-                aggregate_type
-            ] = find_decorated_method_names(
-                self, lambda method: hasattr(method, EVENT_TYPE_ATTRIBUTE_NAME)
-            )
-            log(
-                LogToggles.state_reconstitutor_method_name_caching,
-                "State Reconstitutor Method Names Cached",
-                {
-                    "aggregate_type": str(aggregate_type),
-                    "method_names": Aggregate._aggregate_type_to_state_reconstitutor_method_names[
-                        aggregate_type
-                    ],
-                },
-            )
-
-        register_instance_methods(
-            self,
+    # Maps of event types to state reconstitutors and command types to command
+    # validators.  Each subclass gets its own maps, compiled once when the class is
+    # created--see `__init_subclass__`--so that instantiating an aggregate doesn't
+    # involve searching for decorated methods.
+    _event_to_state_reconstitutor: dict[type, Callable] = dict()
+    _command_type_to_command_validator: dict[type, Callable] = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        """Compiles the class's command validator and state reconstitutor maps."""
+        super().__init_subclass__(**kwargs)
+        setattr(
+            cls,
             COMMAND_TYPE_TO_COMMAND_VALIDATOR_ATTRIBUTE_NAME,
-            COMMAND_TYPE_ATTRIBUTE_NAME,
-            Aggregate._aggregate_type_to_command_validator_method_names[aggregate_type],
+            find_decorated_functions(cls, COMMAND_TYPE_ATTRIBUTE_NAME),
+        )
+        log(
+            LogToggles.command_validator_method_name_caching,
+            "Command Validator Method Names Cached",
+            lambda: {
+                "aggregate_type": str(cls),
+                "method_names": [
+                    method.__name__
+                    for method in cls._command_type_to_command_validator.values()
+                ],
+            },
+            lazy=True,
         )
-        register_instance_methods(
-            self,
+        setattr(
+            cls,
             EVENT_TO_STATE_RECONSTITUTOR_ATTRIBUTE_NAME,
-            EVENT_TYPE_ATTRIBUTE_NAME,
-            Aggregate._aggregate_type_to_state_reconstitutor_method_names[
-                aggregate_type
-            ],
+            find_decorated_functions(cls, EVENT_TYPE_ATTRIBUTE_NAME),
         )
+        log(
+            LogToggles.state_reconstitutor_method_name_caching,
+            "State Reconstitutor Method Names Cached",
+            lambda: {
+                "aggregate_type": str(cls),
+                "method_names": [
+                    method.__name__
+                    for method in cls._event_to_state_reconstitutor.values()
+                ],
+            },
+            lazy=True,
+        )
+
+    def __init__(self, id: any):
+        self.id = id
+        self._new_events = []
 
     @property
     def new_events(self) -> list[tuple[any, VersionedEvent]]:
@@ -199,12 +175,13 @@ class Aggregate:
         log(
             LogToggles.post_new_event,
             "Posted New Event",
-            {
+            lambda: {
                 "aggregate_type": str(type(self)),
                 "aggregate_id": aggregate_id,
                 "event_type": str(type(event)),
-                "event": vars(event),
+                "event": log_vars(event),
             },
+            lazy=True,
         )
 
     @property
@@ -218,9 +195,12 @@ class Aggregate:
     def version(self, value: int):
         self._version = value
 
-    def apply_events(self, events: list[VersionedEvent]):
+    def apply_events(self, events: Iterable[VersionedEvent]):
         """Process events to rebuild aggregate's current state.
 
+        Events are sorted by version before they are applied.  See `apply_event_stream`
+        for event sources that are too large to hold in memory.
+
         Raises:
             ReconstituteStateMethodMissingError: Expected a method decorated with
               @reconstitute_aggregate_state.
@@ -228,43 +208,69 @@ class Aggregate:
               state.
         """
         for event in sorted(events, key=lambda x: x.version):
-            try:
-                state_reconstitutor = getattr(
-                    self, EVENT_TO_STATE_RECONSTITUTOR_ATTRIBUTE_NAME
-                )[type(event)]
-            except KeyError as ke:
-                log(
-                    LogToggles.aggregate_cant_find_state_reconstitutor,
-                    "Missing state reconstitutor.",
-                    {"aggregate_type": str(type(self)), "event_type": str(type(event))},
-                )
-                raise ReconstituteStateMethodMissingError(
-                    f"Missing @reconstitute_aggregate_state method for {str(type(event))}"
-                ) from ke
-            try:
-                state_reconstitutor(event)
-                log(
-                    LogToggles.aggregate_event_applied,
-                    "Event reconstituted aggregate state.",
-                    {
-                        "aggregate_type": str(type(self)),
-                        "event_type": str(type(event)),
-                        "event": vars(event),
-                    },
-                )
-            except Exception as e:
-                log(
-                    LogToggles.aggregate_event_application_failed,
-                    "Error when applying event to aggregate",
-                    {
-                        "aggregate_type": str(type(self)),
-                        "event_type": str(type(event)),
-                        "event": vars(event),
-                    },
-                )
-                raise ReconstituteStateError(
-                    "An error occurred while reconstituting aggregate state."
-                ) from e
+            self._apply_event(event)
+
+    async def apply_event_stream(self, events: AsyncIterable[VersionedEvent]) -> int:
+        """Process a stream of events to rebuild aggregate's current state.
+
+        Unlike `apply_events`, each event is applied as soon as it arrives, so the
+        aggregate's history never has to be held in memory all at once.  The events
+        are *not* sorted, so they must arrive in version order.
+
+        Returns:
+            The number of events that were applied.
+
+        Raises:
+            ReconstituteStateMethodMissingError: Expected a method decorated with
+              @reconstitute_aggregate_state.
+            ReconstituteStateError: An error occurred while reconstituting aggregate
+              state.
+        """
+        count = 0
+        async for event in events:
+            self._apply_event(event)
+            count += 1
+        return count
+
+    def _apply_event(self, event: VersionedEvent):
+        "Applies a single event to the aggregate.  See `apply_events`."
+        try:
+            state_reconstitutor = self._event_to_state_reconstitutor[type(event)]
+        except KeyError as ke:
+            log(
+                LogToggles.aggregate_cant_find_state_reconstitutor,
+                "Missing state reconstitutor.",
+                {"aggregate_type": str(type(self)), "event_type": str(type(event))},
+            )
+            raise ReconstituteStateMethodMissingError(
+                f"Missing @reconstitute_aggregate_state method for {str(type(event))}"
+            ) from ke
+        try:
+            state_reconstitutor(self, event)
+            log(
+                LogToggles.aggregate_event_applied,
+                "Event reconstituted aggregate state.",
+                lambda: {
+                    "aggregate_type": str(type(self)),
+                    "event_type": str(type(event)),
+                    "event": log_vars(event),
+                },
+                lazy=True,
+            )
+        except Exception as e:
+            log(
+                LogToggles.aggregate_event_application_failed,
+                "Error when applying event to aggregate",
+                lambda: {
+                    "aggregate_type": str(type(self)),
+                    "event_type": str(type(event)),
+                    "event": log_vars(event),
+                },
+                lazy=True,
+            )
+            raise ReconstituteStateError(
+                "An error occurred while reconstituting aggregate state."
+            ) from e
 
     def validate(self, command: Command) -> CommandResponse:
         """Validates a command and creates new events if validation succeeds.
@@ -277,9 +283,7 @@ class Aggregate:
             CommandValidationError: "Encountered an error while validating a command.
         """
         try:
-            command_validator = getattr(
-                self, COMMAND_TYPE_TO_COMMAND_VALIDATOR_ATTRIBUTE_NAME
-            )[type(command)]
+            command_validator = self._command_type_to_command_validator[type(command)]
         except KeyError as ke:
             log(
                 LogToggles.command_validator_missing,
@@ -291,17 +295,18 @@ class Aggregate:
                 "Couldn't find a method decorated with `validate_command`."
             ) from ke
         try:
-            return command_validator(command)
+            return command_validator(self, command)
         except Exception as e:
             log(
                 LogToggles.command_validation_errored,
                 "An error occurred while validating a command",
-                {
+                lambda: {
                     "command_type": str(type(command)),
-                    "command": vars(command),
+                    "command": log_vars(command),
                     "method": command_validator.__name__,
                 },
                 exc_info=e,
+                lazy=True,
             )
             raise CommandValidationError(
                 "Encountered an error while validating a command."
@@ -356,12 +361,13 @@ def reconstitute_aggregate_state(event_type: type):
             log(
                 LogToggles.event_applied_to_aggregate,
                 "Reconstituting aggregate state",
-                {
+                lambda: {
                     "aggregate_type": str(type(self)),
                     "aggregate_id": self.id,
                     "event_type": str(type(event)),
-                    "event": vars(event),
+                    "event": log_vars(event),
                 },
+                lazy=True,
             )
             return wrapped(self, event, *args, **kwargs)
 
@@ -428,23 +434,25 @@ def validate_command(command_type: type):
                 log(
                     LogToggles.command_validation_errored,
                     "Command validation failed",
-                    {
+                    lambda: {
                         "aggregate_type": str(type(self)),
                         "aggregate_id": self.id,
                         "command_type": str(type(command)),
-                        "command": vars(command),
+                        "command": log_vars(command),
                     },
+                    lazy=True,
                 )
             if response.is_success:
                 log(
                     LogToggles.command_validation_succeeded,
                     "Command validation succeeded",
-                    {
+                    lambda: {
                         "aggregate_type": str(type(self)),
                         "aggregate_id": self.id,
                         "command_type": str(type(command)),
-                        "command": vars(command),
+                        "command": log_vars(command),
                     },
+                    lazy=True,
                 )
             return response
 
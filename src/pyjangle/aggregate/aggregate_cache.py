@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+from pyjangle import Aggregate, LogToggles, log, get_aggregate_cache_size
+
+
+class AggregateCache:
+    """A size-bounded, least-recently-used cache of reconstituted aggregates.
+
+    Rebuilding an aggregate from its snapshot and events is the most expensive part of
+    handling a command.  For aggregates that receive many commands in quick succession,
+    `handle_command` can keep the fully reconstituted aggregate in this cache and, on
+    the next command, only retrieve the events that are newer than the cached
+    aggregate's version.
+
+    Aggregates are *checked out* of the cache for the duration of a command so that two
+    concurrent commands never share a single aggregate instance.  A command that can't
+    find its aggregate in the cache simply rebuilds it from the event store.  Because
+    newer events are always retrieved from the event store, a cached aggregate that is
+    behind the event store (for example, because another process committed events) is
+    never incorrect--only slightly less efficient.
+
+    The cache is disabled when its maximum size is 0 which is the default.  See
+    `set_aggregate_cache_size`.
+    """
+
+    def __init__(self, max_size: int = None):
+        """
+        Args:
+            max_size:
+                The maximum number of aggregates to cache.  If None, the value of
+                `get_aggregate_cache_size` is used.
+        """
+        self._max_size = max_size
+        self._aggregates: OrderedDict[tuple[type, any], Aggregate] = OrderedDict()
+
+    @property
+    def max_size(self) -> int:
+        "The maximum number of aggregates held by the cache."
+        return get_aggregate_cache_size() if self._max_size == None else self._max_size
+
+    @property
+    def is_enabled(self) -> bool:
+        "True if the cache can hold at least one aggregate."
+        return self.max_size > 0
+
+    def checkout(self, aggregate_type: type, aggregate_id: any) -> Aggregate | None:
+        """Removes and returns a cached aggregate.
+
+        Returns:
+            The cached aggregate, or None if the aggregate is not cached.
+        """
+        aggregate = self._aggregates.pop((aggregate_type, aggregate_id), None)
+        if aggregate != None:
+            log(
+                LogToggles.aggregate_cache_hit,
+                "Aggregate retrieved from cache",
+                {
+                    "aggregate_id": aggregate_id,
+                    "aggregate_type": str(aggregate_type),
+                    "version": aggregate.version,
+                },
+            )
+        return aggregate
+
+    def checkin(self, aggregate: Aggregate):
+        """Adds an aggregate to the cache.
+
+        If the cache already holds a newer version of the same aggregate, the newer
+        version is kept.  The least recently used aggregates are evicted when the cache
+        exceeds its maximum size.
+        """
+        if not self.is_enabled:
+            return
+        key = (type(aggregate), aggregate.id)
+        cached = self._aggregates.get(key)
+        if cached == None or cached.version < aggregate.version:
+            self._aggregates[key] = aggregate
+        self._aggregates.move_to_end(key)
+        while len(self._aggregates) > self.max_size:
+            self._aggregates.popitem(last=False)
+
+    def invalidate(self, aggregate_type: type, aggregate_id: any):
+        "Removes an aggregate from the cache if it is present."
+        if self._aggregates.pop((aggregate_type, aggregate_id), None) != None:
+            log(
+                LogToggles.aggregate_cache_invalidated,
+                "Aggregate removed from cache",
+                {"aggregate_id": aggregate_id, "aggregate_type": str(aggregate_type)},
+            )
+
+    def clear(self):
+        "Removes all aggregates from the cache."
+        self._aggregates.clear()
+
+    def __len__(self):
+        return len(self._aggregates)
+
+
+# Singleton instance of the aggregate cache used by `handle_command`.
+# Access via aggregate_cache_instance().
+_aggregate_cache = AggregateCache()
+
+
+def aggregate_cache_instance() -> AggregateCache:
+    "Returns the singleton instance of the aggregate cache."
+    return _aggregate_cache
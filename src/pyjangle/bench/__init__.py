@@ -0,0 +1,24 @@
+"""Benchmarks for pyjangle's hot paths.
+
+Run every scenario and print the results as JSON:
+
+    python -m pyjangle.bench
+
+Store the results as a baseline and compare a later run against it:
+
+    python -m pyjangle.bench --output baseline.json
+    python -m pyjangle.bench --baseline baseline.json --fail-on-regression
+
+Scenarios run in-process against the in-memory repositories and cover command
+handling with and without contention, aggregate rehydration with and without
+snapshots, committed event dispatch, and failed event and saga retry passes.  See
+`python -m pyjangle.bench --help` for the available options.
+"""
+
+from pyjangle.bench.scenarios import SCENARIOS, ScenarioMeasurement
+from pyjangle.bench.harness import (
+    BenchmarkResult,
+    UnknownScenarioError,
+    compare_results,
+    run_benchmarks,
+)
@@ -0,0 +1,74 @@
+import argparse
+import json
+import sys
+
+from pyjangle.bench import SCENARIOS, compare_results, run_benchmarks
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m pyjangle.bench",
+        description="Benchmarks pyjangle's hot paths on the in-memory repositories.",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run.  Repeat to run several.  Defaults to all scenarios.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiplies the number of operations performed by each scenario.",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Shorthand for --scale 0.1."
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skips the second run of each scenario that measures peak memory.",
+    )
+    parser.add_argument("--output", help="Writes the JSON results to this file.")
+    parser.add_argument(
+        "--baseline", help="JSON results of an earlier run to compare against."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Fraction by which a metric can be worse than the baseline.",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exits with status 1 if a regression is found.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.scenario,
+        scale=0.1 if args.quick else args.scale,
+        measure_memory=not args.no_memory,
+    )
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_results(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import asyncio
+from dataclasses import dataclass, field
+import gc
+import math
+import platform
+import tracemalloc
+
+from pyjangle.bench.scenarios import SCENARIOS, ScenarioMeasurement, ensure_registered
+
+# Version of the JSON document produced by `run_benchmarks`.
+RESULTS_FORMAT = 1
+
+
+class UnknownScenarioError(ValueError):
+    "Raised when a requested benchmark scenario doesn't exist."
+    pass
+
+
+@dataclass
+class BenchmarkResult:
+    """The measurements of a single scenario.
+
+    Attributes:
+        name:
+            Name of the scenario.
+        measurement:
+            Operation count, elapsed time, and per-operation latencies.
+        peak_memory_bytes:
+            Peak memory allocated while the scenario ran, relative to the memory
+            allocated when it started.  None if memory wasn't measured.
+    """
+
+    name: str
+    measurement: ScenarioMeasurement
+    peak_memory_bytes: int | None = field(default=None)
+
+    @property
+    def ops_per_second(self) -> float:
+        if not self.measurement.seconds:
+            return 0.0
+        return self.measurement.operations / self.measurement.seconds
+
+    def percentile_ms(self, percentile: float) -> float | None:
+        "Returns the nearest-rank latency percentile in milliseconds."
+        latencies = sorted(self.measurement.latencies)
+        if not latencies:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * len(latencies)))
+        return latencies[rank - 1] * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "operations": self.measurement.operations,
+            "seconds": self.measurement.seconds,
+            "ops_per_second": self.ops_per_second,
+            "latency_ms": {f"p{p}": self.percentile_ms(p) for p in (50, 95, 99)},
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "parameters": self.measurement.parameters,
+        }
+
+
+async def _run_scenarios(
+    scenario_names: list[str], scale: float, measure_memory: bool
+) -> list[BenchmarkResult]:
+    ensure_registered()
+    results = []
+    for name in scenario_names:
+        scenario = SCENARIOS[name]
+        gc.collect()
+        result = BenchmarkResult(name, await scenario(scale))
+        if measure_memory:
+            # tracemalloc slows allocation down considerably, so memory is measured by a
+            # separate run that isn't timed.
+            gc.collect()
+            tracemalloc.start()
+            try:
+                baseline, _ = tracemalloc.get_traced_memory()
+                await scenario(scale)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            result.peak_memory_bytes = peak - baseline
+        results.append(result)
+    return results
+
+
+def run_benchmarks(
+    scenario_names: list[str] = None, scale: float = 1.0, measure_memory: bool = True
+) -> dict:
+    """Runs benchmark scenarios and returns their results.
+
+    Scenarios run one at a time on a new event loop against the registered repositories
+    and dispatchers.  In-memory repositories, `handle_command`, and
+    `default_event_dispatcher` are registered for whatever isn't already registered.
+
+    Args:
+        scenario_names:
+            Names of the scenarios to run, see `SCENARIOS`.  Defaults to all of them.
+        scale:
+            Multiplies the number of operations performed by each scenario.  Small
+            values are useful for smoke tests.
+        measure_memory:
+            Runs each scenario a second time to measure its peak memory.
+
+    Returns:
+        A JSON-serializable dict:
+
+            {
+                "format": 1,
+                "python": "3.11.4",
+                "scale": 1.0,
+                "scenarios": {
+                    "command_throughput": {
+                        "operations": 20000,
+                        "seconds": 1.9,
+                        "ops_per_second": 10526.3,
+                        "latency_ms": {"p50": 5.8, "p95": 7.1, "p99": 9.4},
+                        "peak_memory_bytes": 10485760,
+                        "parameters": {"concurrency": 64}
+                    },
+                    ...
+                }
+            }
+
+    Raises:
+        UnknownScenarioError:
+            A scenario name isn't in `SCENARIOS`.
+    """
+    scenario_names = list(SCENARIOS) if scenario_names == None else scenario_names
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        raise UnknownScenarioError(f"Unknown scenarios: {', '.join(unknown)}")
+    results = asyncio.run(_run_scenarios(scenario_names, scale, measure_memory))
+    return {
+        "format": RESULTS_FORMAT,
+        "python": platform.python_version(),
+        "scale": scale,
+        "scenarios": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = 0.1) -> list[str]:
+    """Compares benchmark results to a baseline produced by `run_benchmarks`.
+
+    Only scenarios present in both are compared.  Results should come from runs with
+    the same scale on the same machine.
+
+    Args:
+        current:
+            The results to check.
+        baseline:
+            The results to compare against.
+        tolerance:
+            Fraction by which a metric can be worse than the baseline before it's
+            reported.
+
+    Returns:
+        A description of each regression in throughput, p95 latency, or peak memory.
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base == None:
+            continue
+        if result["ops_per_second"] < base["ops_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: ops_per_second {result['ops_per_second']:.1f} < baseline "
+                f"{base['ops_per_second']:.1f}"
+            )
+        for metric, value, base_value in (
+            ("p95 latency_ms", result["latency_ms"]["p95"], base["latency_ms"]["p95"]),
+            (
+                "peak_memory_bytes",
+                result["peak_memory_bytes"],
+                base["peak_memory_bytes"],
+            ),
+        ):
+            if value == None or base_value == None:
+                continue
+            if value > base_value * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {value:.1f} > baseline {base_value:.1f}"
+                )
+    return regressions
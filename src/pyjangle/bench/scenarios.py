@@ -0,0 +1,457 @@
+"""Benchmark scenarios run against the in-memory repositories.
+
+Each scenario is a coroutine function that takes the benchmark scale and returns a
+`ScenarioMeasurement`.  Scenarios only time the work they are named after--seeding
+repositories happens before the clock starts.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import itertools
+import time
+from typing import Awaitable, Callable
+
+from pyjangle import (
+    Aggregate,
+    Command,
+    DuplicateKeyError,
+    InMemoryEventRepository,
+    InMemorySagaRepository,
+    InMemorySnapshotRepository,
+    RegisterAggregate,
+    RegisterEventRepository,
+    RegisterSagaRepository,
+    RegisterSnapshotRepository,
+    Saga,
+    Snapshottable,
+    VersionedEvent,
+    begin_processing_committed_events,
+    command_dispatcher_instance,
+    command_to_aggregate_map_instance,
+    default_event_dispatcher,
+    drain_committed_events,
+    enqueue_committed_event_for_dispatch,
+    event_dispatcher_instance,
+    event_receiver,
+    event_repository_instance,
+    get_aggregate_cache_size,
+    get_serialize_commands_by_aggregate,
+    handle_command,
+    has_registered_event_handler,
+    reconstitute_aggregate_state,
+    reconstitute_saga_state,
+    register_command_dispatcher,
+    register_event_dispatcher,
+    register_event_handler,
+    retry_failed_events,
+    retry_sagas,
+    saga_repository_instance,
+    set_aggregate_cache_size,
+    set_serialize_commands_by_aggregate,
+    snapshot_repository_instance,
+    stop_processing_committed_events,
+    validate_command,
+)
+from pyjangle.event import event_repository
+from pyjangle.event.event_repository import EventRepositoryMissingError
+from pyjangle.saga.saga_repository import SagaRepositoryMissingError
+from pyjangle.snapshot.snapshot_repository import SnapshotRepositoryMissingError
+from pyjangle.command.command_dispatcher import CommandDispatcherNotRegisteredError
+
+# Number of commands or events in flight at once in the concurrent scenarios.
+_CONCURRENCY = 64
+# Number of commands in flight at once on the single aggregate of the hot-key
+# scenarios.  Every conflict rebuilds the aggregate, so retries grow with this.
+_HOT_KEY_CONCURRENCY = 8
+# Snapshot frequency of `_SnapshottableBenchCounter`.
+_SNAPSHOT_FREQUENCY = 50
+# Event counts used by the rehydration scenarios.
+REHYDRATION_EVENT_COUNTS = (10, 100, 1000)
+
+# Makes aggregate and saga ids unique across scenarios and repeated runs.
+_id_prefixes = itertools.count()
+
+
+@dataclass
+class ScenarioMeasurement:
+    """The raw measurements of one run of a scenario.
+
+    Attributes:
+        operations:
+            Number of operations performed.
+        seconds:
+            Wall-clock time taken by all of the operations.
+        latencies:
+            Seconds taken by each operation, where individual operations are timed.
+        parameters:
+            Values describing the scenario's configuration.
+    """
+
+    operations: int
+    seconds: float
+    latencies: list[float]
+    parameters: dict
+
+
+@dataclass(kw_only=True)
+class _Incremented(VersionedEvent):
+    pass
+
+
+class _Increment(Command):
+    def __init__(self, aggregate_id: any):
+        self.aggregate_id = aggregate_id
+
+    def get_aggregate_id(self):
+        return self.aggregate_id
+
+
+class _IncrementSnapshotted(_Increment):
+    pass
+
+
+class _BenchCounterBase(Aggregate):
+    def __init__(self, id: any):
+        super().__init__(id)
+        self.count = 0
+
+    @reconstitute_aggregate_state(_Incremented)
+    def from_incremented(self, event: _Incremented):
+        self.count += 1
+
+
+class _BenchCounter(_BenchCounterBase):
+    @validate_command(_Increment)
+    def increment(self, command: _Increment, next_version: int):
+        self.post_new_event(_Incremented(version=next_version))
+
+
+class _SnapshottableBenchCounter(_BenchCounterBase, Snapshottable):
+    @validate_command(_IncrementSnapshotted)
+    def increment(self, command: _IncrementSnapshotted, next_version: int):
+        self.post_new_event(_Incremented(version=next_version))
+
+    def apply_snapshot_hook(self, snapshot):
+        self.count = snapshot
+
+    def get_snapshot(self) -> any:
+        return self.count
+
+    def get_snapshot_frequency(self) -> int:
+        return _SNAPSHOT_FREQUENCY
+
+
+@dataclass(kw_only=True)
+class _BenchSagaStarted(VersionedEvent):
+    pass
+
+
+@dataclass(kw_only=True)
+class _BenchSagaStepCompleted(VersionedEvent):
+    pass
+
+
+class _BenchSaga(Saga):
+    @reconstitute_saga_state(_BenchSagaStarted)
+    def from_started(self, event: _BenchSagaStarted):
+        pass
+
+    @reconstitute_saga_state(_BenchSagaStepCompleted)
+    def from_step_completed(self, event: _BenchSagaStepCompleted):
+        pass
+
+    @event_receiver(_BenchSagaStarted, skip_if_any_flags_set=[_BenchSagaStepCompleted])
+    async def on_started(self):
+        self._post_state_change_event(_BenchSagaStepCompleted(version=2))
+        self.set_complete()
+
+
+class _DispatchProbe:
+    "Records when dispatched events reach their event handler."
+
+    def __init__(self):
+        self.enqueued_at: dict[any, float] = dict()
+        self.latencies: list[float] = []
+
+    def handled(self, event: VersionedEvent):
+        enqueued_at = self.enqueued_at.pop(event.id, None)
+        if enqueued_at != None:
+            self.latencies.append(time.perf_counter() - enqueued_at)
+
+
+_dispatch_probe = _DispatchProbe()
+
+
+async def _handle_incremented(event: _Incremented):
+    _dispatch_probe.handled(event)
+
+
+class _RoundTripEventRepository:
+    """Wraps an event repository so that each commit yields like a database round trip.
+
+    The in-memory repository never yields to the event loop, so without this, commands
+    on the same aggregate can't interleave between reading events and committing new
+    ones, and optimistic concurrency never conflicts.
+    """
+
+    def __init__(self, repository):
+        self._repository = repository
+        self.commits = 0
+        self.conflicts = 0
+
+    def __getattr__(self, name):
+        return getattr(self._repository, name)
+
+    async def commit_events(self, aggregate_id_and_event_tuples):
+        await asyncio.sleep(0)
+        self.commits += 1
+        try:
+            await self._repository.commit_events(aggregate_id_and_event_tuples)
+        except DuplicateKeyError:
+            self.conflicts += 1
+            raise
+
+
+def ensure_registered():
+    """Registers the components the scenarios need, unless already registered.
+
+    Components that are already registered, such as a different event repository, are
+    left alone, so the scenarios measure whatever is registered.
+    """
+    try:
+        event_repository_instance()
+    except EventRepositoryMissingError:
+        RegisterEventRepository(InMemoryEventRepository)
+    try:
+        snapshot_repository_instance()
+    except SnapshotRepositoryMissingError:
+        RegisterSnapshotRepository(InMemorySnapshotRepository)
+    try:
+        saga_repository_instance()
+    except SagaRepositoryMissingError:
+        RegisterSagaRepository(InMemorySagaRepository)
+    try:
+        command_dispatcher_instance()
+    except CommandDispatcherNotRegisteredError:
+        register_command_dispatcher(handle_command)
+    if not event_dispatcher_instance():
+        register_event_dispatcher(default_event_dispatcher)
+    if _Increment not in command_to_aggregate_map_instance():
+        RegisterAggregate(_BenchCounter)
+    if _IncrementSnapshotted not in command_to_aggregate_map_instance():
+        RegisterAggregate(_SnapshottableBenchCounter)
+    if not has_registered_event_handler(_Incremented):
+        register_event_handler(_Incremented)(_handle_incremented)
+
+
+def _scaled(count: int, scale: float, minimum: int = 5) -> int:
+    return max(minimum, int(count * scale))
+
+
+async def _run_concurrently(
+    operations: list[Callable[[], Awaitable]], concurrency: int = _CONCURRENCY
+) -> tuple[float, list[float]]:
+    "Runs operations with bounded concurrency, returning total and per-op seconds."
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(operation):
+        async with semaphore:
+            start = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(operation) for operation in operations))
+    return time.perf_counter() - start, latencies
+
+
+async def _with_committed_event_processing(coroutine: Awaitable):
+    "Dispatches committed events in the background so the dispatch queue can't fill."
+    begin_processing_committed_events()
+    try:
+        return await coroutine
+    finally:
+        await stop_processing_committed_events()
+
+
+async def _handle_commands(
+    commands: list[Command], serialize: bool, concurrency: int = _CONCURRENCY
+) -> tuple[float, list[float]]:
+    original_serialize = get_serialize_commands_by_aggregate()
+    set_serialize_commands_by_aggregate(serialize)
+    try:
+        return await _with_committed_event_processing(
+            _run_concurrently(
+                [
+                    lambda command=command: handle_command(command)
+                    for command in commands
+                ],
+                concurrency,
+            )
+        )
+    finally:
+        set_serialize_commands_by_aggregate(original_serialize)
+
+
+async def command_throughput(scale: float) -> ScenarioMeasurement:
+    "`handle_command` on distinct aggregates, so commands never contend."
+    prefix = next(_id_prefixes)
+    commands = [_Increment((prefix, i)) for i in range(_scaled(20000, scale))]
+    seconds, latencies = await _handle_commands(commands, serialize=False)
+    return ScenarioMeasurement(
+        len(commands), seconds, latencies, {"concurrency": _CONCURRENCY}
+    )
+
+
+async def _hot_key(scale: float, serialize: bool) -> ScenarioMeasurement:
+    prefix = next(_id_prefixes)
+    commands = [_Increment(prefix) for _ in range(_scaled(500, scale))]
+    repository = _RoundTripEventRepository(event_repository_instance())
+    event_repository._event_repository_instance = repository
+    try:
+        seconds, latencies = await _handle_commands(
+            commands, serialize=serialize, concurrency=_HOT_KEY_CONCURRENCY
+        )
+    finally:
+        event_repository._event_repository_instance = repository._repository
+    return ScenarioMeasurement(
+        len(commands),
+        seconds,
+        latencies,
+        {
+            "concurrency": _HOT_KEY_CONCURRENCY,
+            "serialize_commands_by_aggregate": serialize,
+            # Each conflict is retried, so this is also the number of retries.
+            "conflicts": repository.conflicts,
+            "commits": repository.commits,
+        },
+    )
+
+
+async def command_hot_key(scale: float) -> ScenarioMeasurement:
+    "`handle_command` on one aggregate, relying on optimistic concurrency retries."
+    return await _hot_key(scale, serialize=False)
+
+
+async def command_hot_key_serialized(scale: float) -> ScenarioMeasurement:
+    "`handle_command` on one aggregate with `SERIALIZE_COMMANDS_BY_AGGREGATE` enabled."
+    return await _hot_key(scale, serialize=True)
+
+
+async def _rehydration(
+    scale: float, event_count: int, snapshotted: bool
+) -> ScenarioMeasurement:
+    prefix = next(_id_prefixes)
+    aggregate_count = _scaled(min(2000, 100_000 // event_count), scale)
+    aggregate_ids = [(prefix, i) for i in range(aggregate_count)]
+    event_repository = event_repository_instance()
+    for aggregate_id in aggregate_ids:
+        events = [_Incremented(version=v) for v in range(1, event_count + 1)]
+        await event_repository.commit_events([(aggregate_id, e) for e in events])
+        await event_repository.mark_events_handled([e.id for e in events])
+        if snapshotted:
+            version = event_count - event_count % _SNAPSHOT_FREQUENCY
+            if version:
+                await snapshot_repository_instance().store_snapshot(
+                    aggregate_id, version, version
+                )
+    command_type = _IncrementSnapshotted if snapshotted else _Increment
+    commands = [command_type(aggregate_id) for aggregate_id in aggregate_ids]
+    # Every command must rebuild its aggregate rather than find it in the cache.
+    original_cache_size = get_aggregate_cache_size()
+    set_aggregate_cache_size(0)
+    try:
+        seconds, latencies = await _handle_commands(commands, serialize=False)
+    finally:
+        set_aggregate_cache_size(original_cache_size)
+    return ScenarioMeasurement(
+        len(commands),
+        seconds,
+        latencies,
+        {
+            "event_count": event_count,
+            "snapshot_frequency": _SNAPSHOT_FREQUENCY if snapshotted else 0,
+        },
+    )
+
+
+def _rehydration_scenario(event_count: int, snapshotted: bool):
+    async def scenario(scale: float) -> ScenarioMeasurement:
+        return await _rehydration(scale, event_count, snapshotted)
+
+    scenario.__doc__ = f"`handle_command` on aggregates with {event_count} events" + (
+        " and snapshots." if snapshotted else "."
+    )
+    return scenario
+
+
+async def event_dispatch(scale: float) -> ScenarioMeasurement:
+    "Committed events flowing from `enqueue_committed_event_for_dispatch` to handlers."
+    prefix = next(_id_prefixes)
+    events = [_Incremented(version=1) for _ in range(_scaled(20000, scale))]
+    _dispatch_probe.latencies.clear()
+
+    async def enqueue_and_drain():
+        start = time.perf_counter()
+        for i, event in enumerate(events):
+            _dispatch_probe.enqueued_at[event.id] = time.perf_counter()
+            await enqueue_committed_event_for_dispatch(event, (prefix, i))
+        await drain_committed_events()
+        return time.perf_counter() - start
+
+    seconds = await _with_committed_event_processing(enqueue_and_drain())
+    return ScenarioMeasurement(
+        len(events), seconds, list(_dispatch_probe.latencies), dict()
+    )
+
+
+async def retry_failed_events_pass(scale: float) -> ScenarioMeasurement:
+    "One `retry_failed_events` pass over a backlog of unhandled events."
+    prefix = next(_id_prefixes)
+    created_at = datetime.now() - timedelta(hours=1)
+    events = [
+        ((prefix, i), _Incremented(version=1, created_at=created_at))
+        for i in range(_scaled(10000, scale))
+    ]
+    await event_repository_instance().commit_events(events)
+    start = time.perf_counter()
+    stats = await retry_failed_events(max_age_time_delta=timedelta(minutes=1))
+    seconds = time.perf_counter() - start
+    return ScenarioMeasurement(
+        stats.retried, seconds, [], {"backlog": len(events), "failed": stats.failed}
+    )
+
+
+async def retry_sagas_pass(scale: float) -> ScenarioMeasurement:
+    "One `retry_sagas` pass over sagas that are due to be retried."
+    prefix = next(_id_prefixes)
+    saga_repository = saga_repository_instance()
+    saga_count = _scaled(5000, scale)
+    for i in range(saga_count):
+        saga = _BenchSaga(saga_id=(prefix, i))
+        saga._post_state_change_event(_BenchSagaStarted(version=1))
+        saga.set_retry(datetime.min)
+        await saga_repository.commit_saga(saga)
+    start = time.perf_counter()
+    retried = await retry_sagas()
+    seconds = time.perf_counter() - start
+    return ScenarioMeasurement(retried, seconds, [], {"sagas": saga_count})
+
+
+SCENARIOS: dict[str, Callable[[float], Awaitable[ScenarioMeasurement]]] = {
+    "command_throughput": command_throughput,
+    "command_hot_key": command_hot_key,
+    "command_hot_key_serialized": command_hot_key_serialized,
+    **{
+        f"rehydration_{event_count}_events{suffix}": _rehydration_scenario(
+            event_count, snapshotted
+        )
+        for event_count in REHYDRATION_EVENT_COUNTS
+        for suffix, snapshotted in (("", False), ("_snapshotted", True))
+    },
+    "event_dispatch": event_dispatch,
+    "retry_failed_events": retry_failed_events_pass,
+    "retry_sagas": retry_sagas_pass,
+}
@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import time
+from typing import AsyncIterator
+
+from pyjangle import LogToggles, log
+
+
+class AggregateLockMetrics:
+    """Counters describing contention on the `AggregateLock`.
+
+    Attributes:
+        queue_depth:
+            Number of commands currently holding or waiting for an aggregate lock.
+        max_queue_depth:
+            Highest number of commands ever queued behind a single aggregate.
+        acquisitions:
+            Number of times a lock was acquired.
+        contended_acquisitions:
+            Number of acquisitions that had to wait for another command.
+        total_wait_seconds:
+            Cumulative time spent waiting to acquire locks.
+        max_wait_seconds:
+            Longest time spent waiting to acquire a lock.
+    """
+
+    def __init__(self):
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquisitions = 0
+        self.contended_acquisitions = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def average_wait_seconds(self) -> float:
+        "Average time spent waiting to acquire a lock."
+        return self.total_wait_seconds / self.acquisitions if self.acquisitions else 0.0
+
+
+class AggregateLock:
+    """In-process, per-aggregate asynchronous lock.
+
+    When many commands target the same aggregate concurrently, only one of them can
+    commit its events--the rest encounter a `DuplicateKeyError` and must rebuild the
+    aggregate and revalidate the command.  Acquiring this lock before processing a
+    command queues commands for the same aggregate so that they execute in order, one
+    at a time, without wasted work.  Commands for different aggregates are unaffected
+    and continue to run concurrently.
+
+    The lock only coordinates commands within the current process.  The optimistic
+    concurrency mechanism in the event store is still what guarantees consistency
+    between processes.
+    """
+
+    def __init__(self):
+        self._locks: dict[any, asyncio.Lock] = dict()
+        self._queue_depths: dict[any, int] = dict()
+        self.metrics = AggregateLockMetrics()
+
+    def queue_depth(self, aggregate_type: type, aggregate_id: any) -> int:
+        "Returns the number of commands holding or waiting for an aggregate's lock."
+        return self._queue_depths.get((aggregate_type, aggregate_id), 0)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, aggregate_type: type, aggregate_id: any) -> AsyncIterator:
+        """Holds the lock for an aggregate for the duration of the context.
+
+        Args:
+            aggregate_type:
+                Type of the aggregate that is locked.
+            aggregate_id:
+                ID of the aggregate that is locked.
+        """
+        key = (aggregate_type, aggregate_id)
+        lock = self._locks.get(key)
+        if lock == None:
+            lock = self._locks[key] = asyncio.Lock()
+        depth = self._queue_depths[key] = self._queue_depths.get(key, 0) + 1
+        self.metrics.queue_depth += 1
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, depth)
+        start = time.perf_counter()
+        try:
+            async with lock:
+                wait_seconds = time.perf_counter() - start
+                self._record_acquisition(depth > 1, wait_seconds)
+                if depth > 1:
+                    log(
+                        LogToggles.aggregate_lock_contended,
+                        "Waited for aggregate lock",
+                        {
+                            "aggregate_id": aggregate_id,
+                            "aggregate_type": str(aggregate_type),
+                            "queue_depth": depth,
+                            "wait_seconds": wait_seconds,
+                        },
+                    )
+                yield
+        finally:
+            self.metrics.queue_depth -= 1
+            self._queue_depths[key] -= 1
+            if not self._queue_depths[key]:
+                # Nobody is waiting, so don't hold on to the lock.
+                del self._queue_depths[key]
+                del self._locks[key]
+
+    def _record_acquisition(self, is_contended: bool, wait_seconds: float):
+        self.metrics.acquisitions += 1
+        self.metrics.total_wait_seconds += wait_seconds
+        self.metrics.max_wait_seconds = max(self.metrics.max_wait_seconds, wait_seconds)
+        if is_contended:
+            self.metrics.contended_acquisitions += 1
+
+
+# Singleton instance of the aggregate lock used by `handle_command`.
+# Access via aggregate_lock_instance().
+_aggregate_lock = AggregateLock()
+
+
+def aggregate_lock_instance() -> AggregateLock:
+    "Returns the singleton instance of the aggregate lock."
+    return _aggregate_lock
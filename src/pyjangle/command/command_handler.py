@@ -1,3 +1,10 @@
+from asyncio import create_task
+from collections import OrderedDict
+from typing import AsyncIterator, Iterable
+import contextlib
+import inspect
+import time
+
 from pyjangle import (
     Command,
     CommandResponse,
@@ -6,17 +13,35 @@ from pyjangle import (
     LogToggles,
     Snapshottable,
     Aggregate,
+    ReconstituteStateError,
     JangleError,
+    Metrics,
+    aggregate_cache_instance,
+    aggregate_lock_instance,
     log,
+    log_vars,
+    metrics_sink_instance,
+    snapshot_policy_instance,
     snapshot_repository_instance,
+    snapshot_writer_instance,
     command_to_aggregate_map_instance,
     event_repository_instance,
     event_dispatcher_instance,
     enqueue_committed_event_for_dispatch,
     get_batch_size,
+    get_serialize_commands_by_aggregate,
+    get_prefetch_events_with_snapshot,
     ERROR,
 )
 
+# Maximum number of aggregates whose most recently seen snapshot version is remembered
+# for `PREFETCH_EVENTS_WITH_SNAPSHOT`.
+_MAX_SNAPSHOT_VERSION_HINTS = 10000
+
+# Maps (aggregate_type, aggregate_id) to the version of the aggregate's most recently
+# seen snapshot, or 0 if it had none, in least recently used order.
+_snapshot_version_hints: OrderedDict[tuple[type, any], int] = OrderedDict()
+
 
 class CommandHandlerError(JangleError):
     "Unexpected error while handling command."
@@ -28,19 +53,33 @@ async def handle_command(command: Command) -> CommandResponse:
 
     Processing a command involves the following steps:
     - Map the command to an aggregate
-    - Instantiate a blank aggregate
-    - Retrieve and apply aggregate snapshot, if applicable
+    - Check out the aggregate from the aggregate cache, if it is cached
+    - Otherwise, instantiate a blank aggregate and retrieve and apply its snapshot, if
+      applicable
     - Retrieve and apply events from event store to reconstitute the aggregate state
     - Validate the command
     - If command validation succeeds, commit new events to the event store
     - Create an updated snapshot, if applicable
     - If an event dispatcher is registered, dispatch the new events
+    - Return the aggregate to the aggregate cache, if the cache is enabled
 
     This method also handles the optimistic concurrency mechanism that handles the case
     where two aggregates are instantiated at roughly the same time resulting in events
     with identical aggregate IDs and version numbers being committed at the same time.
     When a primary key violation is detected, this method will re-apply the command to
-    the aggregate based on the new events from the competing aggregate instance.
+    the aggregate based on the new events from the competing aggregate instance.  To
+    avoid these conflicts between commands in the same process, enable
+    `set_serialize_commands_by_aggregate` which queues commands for the same aggregate
+    behind an `AggregateLock` so that they are processed one at a time.
+
+    If a `MetricsSink` is registered, the duration of each of the steps above is
+    reported to it, see `Metrics`.
+
+    Retrieving the snapshot and then the events after it takes two sequential round
+    trips.  When `set_prefetch_events_with_snapshot` is enabled, the events after the
+    snapshot version seen the last time the aggregate was reconstituted are retrieved
+    concurrently with the snapshot instead.  If the snapshot turns out to be older than
+    that version, the missing events are retrieved afterwards as usual.
 
     Args:
         command:
@@ -59,66 +98,414 @@ async def handle_command(command: Command) -> CommandResponse:
         log(
             LogToggles.command_received,
             "Command received",
-            {
+            lambda: {
                 "aggregate_id": aggregate_id,
                 "command_type": str(type(command)),
-                "command_data": vars(command),
+                "command_data": log_vars(command),
             },
+            lazy=True,
         )
-        while True:
-            # Instantiate blank aggregate
-            aggregate = command_to_aggregate_map_instance()[type(command)](
-                id=aggregate_id
-            )
-            log(
-                LogToggles.aggregate_created,
-                "Blank aggregate created",
-                {"aggregate_id": aggregate_id, "aggregate_type": str(type(aggregate))},
-            )
-            aggregate = await _apply_snapshotting_to_aggregate(aggregate, command)
-            event_repository = event_repository_instance()
-            # Get events between snapshot and current
-            events = list(
-                await event_repository.get_events(
-                    aggregate_id, aggregate.version, get_batch_size()
-                )
-            )
-            log(
-                LogToggles.retrieved_aggregate_events,
-                "Retrieved aggregate events",
-                {
-                    "aggregate_id": aggregate_id,
-                    "aggregate_type": str(type(aggregate)),
-                    "event_count": len(events),
-                },
-            )
-            aggregate.apply_events(events)
-            command_response = aggregate.validate(command)
-            if command_response.is_success:
-                try:
-                    await event_repository.commit_events(aggregate.new_events)
-                    for id, event in aggregate.new_events:
-                        log(
-                            LogToggles.committed_event,
-                            "Event committed",
-                            {
-                                "aggregate_type": str(type(aggregate)),
-                                "aggregate_id": id,
-                                "event_type": str(type(event)),
-                                "event": vars(event),
-                            },
-                        )
-                    await _record_new_snapshot_if_applicable(aggregate_id, aggregate)
-                    await _dispatch_events_locally(
-                        [event for (_, event) in aggregate.new_events]
+        sink = metrics_sink_instance()
+        if sink:
+            start = time.perf_counter()
+        if get_serialize_commands_by_aggregate():
+            aggregate_type = command_to_aggregate_map_instance()[type(command)]
+            async with aggregate_lock_instance().acquire(aggregate_type, aggregate_id):
+                if sink:
+                    sink.record_duration(
+                        Metrics.command_lock_wait, time.perf_counter() - start
                     )
-                except DuplicateKeyError:
-                    continue
-            return command_response
+                command_response = await _handle_command(command, aggregate_id)
+        else:
+            command_response = await _handle_command(command, aggregate_id)
+        if sink:
+            sink.record_duration(Metrics.command_total, time.perf_counter() - start)
+        return command_response
     except Exception as e:
         raise CommandHandlerError("Error while handling command") from e
 
 
+async def _handle_command(command: Command, aggregate_id: any) -> CommandResponse:
+    """Reconstitutes the aggregate, validates the command, and commits new events.
+
+    See `handle_command`.
+    """
+
+    aggregate_type = command_to_aggregate_map_instance()[type(command)]
+    while True:
+        aggregate = await _reconstitute_aggregate(aggregate_type, aggregate_id, command)
+        command_response = _validate(aggregate, command)
+        if command_response.is_success:
+            try:
+                await _commit_events(aggregate.new_events)
+            except DuplicateKeyError:
+                # Another writer got there first, so anything cached for this
+                # aggregate is behind.
+                _record_conflict()
+                aggregate_cache_instance().invalidate(aggregate_type, aggregate_id)
+                continue
+            await _process_committed_events(aggregate_id, aggregate)
+        _cache_aggregate(
+            aggregate_id, aggregate, is_committed=command_response.is_success
+        )
+        return command_response
+
+
+async def handle_commands(commands: list[Command]) -> list[CommandResponse]:
+    """Orchestrates processing of many commands with as few commits as possible.
+
+    This is a high-throughput alternative to calling `handle_command` once per command
+    for workloads such as bulk ingestion.  Commands are grouped by the aggregate they
+    target, and each aggregate is reconstituted once.  The commands in a group are
+    validated in the order that they appear in `commands`, and each successful
+    command's events are applied to the aggregate before the next command is validated.
+    The events of *every* group are then committed to the event store with a single
+    call to `EventRepository.commit_events`.
+
+    If that commit raises a `DuplicateKeyError`, it is not possible to know which group
+    caused the conflict, so each group is then committed separately.  Only the groups
+    that conflict are reconstituted, revalidated, and retried in the same way as
+    `handle_command`.
+
+    A command that fails validation does not affect the other commands in its group
+    except that its events are discarded.  If validating any command raises an error,
+    nothing is committed and a `CommandHandlerError` is raised.
+
+    Args:
+        commands:
+            The commands to process.
+
+    Returns:
+        A list of `CommandResponse`, one per command, in the same order as `commands`.
+
+    Raises:
+        CommandHandlerError:
+            Unexpected error while handling commands.
+    """
+
+    try:
+        log(
+            LogToggles.command_received,
+            "Commands received",
+            {"command_count": len(commands)},
+        )
+        groups: dict[tuple[type, any], list[int]] = dict()
+        for index, command in enumerate(commands):
+            aggregate_type = command_to_aggregate_map_instance()[type(command)]
+            key = (aggregate_type, command.get_aggregate_id())
+            groups.setdefault(key, []).append(index)
+        responses: list[CommandResponse] = [None] * len(commands)
+        async with contextlib.AsyncExitStack() as stack:
+            if get_serialize_commands_by_aggregate():
+                # A consistent acquisition order prevents deadlocks between batches.
+                for aggregate_type, aggregate_id in sorted(
+                    groups, key=lambda key: (hash(key), str(key))
+                ):
+                    await stack.enter_async_context(
+                        aggregate_lock_instance().acquire(aggregate_type, aggregate_id)
+                    )
+            await _handle_command_groups(commands, groups, responses)
+        return responses
+    except Exception as e:
+        raise CommandHandlerError("Error while handling commands") from e
+
+
+async def _handle_command_groups(
+    commands: list[Command],
+    groups: dict[tuple[type, any], list[int]],
+    responses: list[CommandResponse],
+):
+    """Validates and commits groups of commands.  See `handle_commands`.
+
+    Args:
+        commands:
+            All commands being processed.
+        groups:
+            Maps (aggregate_type, aggregate_id) to the indices of the commands in
+            `commands` that target the aggregate.
+        responses:
+            Receives the `CommandResponse` for each command at the command's index.
+    """
+
+    aggregates: dict[tuple[type, any], Aggregate] = dict()
+    for (aggregate_type, aggregate_id), indices in groups.items():
+        aggregates[(aggregate_type, aggregate_id)] = await _validate_command_group(
+            aggregate_type, aggregate_id, commands, indices, responses
+        )
+    new_events = [
+        aggregate_id_and_event
+        for aggregate in aggregates.values()
+        for aggregate_id_and_event in aggregate.new_events
+    ]
+    try:
+        if new_events:
+            await _commit_events(new_events)
+        conflicting_keys = []
+    except DuplicateKeyError:
+        conflicting_keys = list(aggregates)
+    for key in list(conflicting_keys):
+        aggregate_type, aggregate_id = key
+        if not aggregates[key].new_events:
+            conflicting_keys.remove(key)
+            continue
+        try:
+            await _commit_events(aggregates[key].new_events)
+            conflicting_keys.remove(key)
+        except DuplicateKeyError:
+            _record_conflict()
+            aggregate_cache_instance().invalidate(aggregate_type, aggregate_id)
+    for key, aggregate in aggregates.items():
+        if key not in conflicting_keys:
+            await _process_committed_events(key[1], aggregate)
+            _cache_aggregate(key[1], aggregate, is_committed=True)
+    # Only the conflicting groups are retried.
+    while conflicting_keys:
+        key = conflicting_keys.pop(0)
+        aggregate_type, aggregate_id = key
+        aggregate = await _validate_command_group(
+            aggregate_type, aggregate_id, commands, groups[key], responses
+        )
+        try:
+            if aggregate.new_events:
+                await _commit_events(aggregate.new_events)
+        except DuplicateKeyError:
+            _record_conflict()
+            aggregate_cache_instance().invalidate(aggregate_type, aggregate_id)
+            conflicting_keys.append(key)
+            continue
+        await _process_committed_events(aggregate_id, aggregate)
+        _cache_aggregate(aggregate_id, aggregate, is_committed=True)
+
+
+async def _validate_command_group(
+    aggregate_type: type,
+    aggregate_id: any,
+    commands: list[Command],
+    indices: list[int],
+    responses: list[CommandResponse],
+) -> Aggregate:
+    """Reconstitutes an aggregate and validates its commands in order.
+
+    The events of each successfully validated command are applied to the aggregate
+    before validating the next command.  The events of unsuccessful commands are
+    discarded.
+
+    Returns:
+        The aggregate containing the new events of all successful commands.
+    """
+
+    aggregate = await _reconstitute_aggregate(
+        aggregate_type, aggregate_id, commands[indices[0]]
+    )
+    for index in indices:
+        new_event_count = len(aggregate.new_events)
+        command_response = _validate(aggregate, commands[index])
+        if command_response.is_success:
+            _apply_new_events(aggregate_id, aggregate)
+        else:
+            del aggregate.new_events[new_event_count:]
+        responses[index] = command_response
+    return aggregate
+
+
+async def _reconstitute_aggregate(
+    aggregate_type: type, aggregate_id: any, command: Command
+) -> Aggregate:
+    """Rebuilds the current state of an aggregate.
+
+    The aggregate is checked out of the aggregate cache if it's there.  Otherwise, a
+    blank aggregate is instantiated, and its snapshot is applied, if applicable.  Events
+    newer than the aggregate's version are then retrieved and applied.  If the event
+    repository returns an asynchronous iterator, the events are applied as they are
+    streamed rather than being collected into a list first.
+
+    When prefetching is enabled, see `handle_command`, the events are requested before
+    the snapshot is retrieved.  They're used only if they start at or before the
+    snapshot's version, and any events covered by the snapshot are skipped.
+
+    Args:
+        aggregate_type:
+            Type of the aggregate to reconstitute.
+        aggregate_id:
+            ID of the aggregate to reconstitute.
+        command:
+            The command that will be applied to the aggregate.
+
+    Raises:
+        ReconstituteStateError:
+            An error occurred while reconstituting aggregate state.
+    """
+
+    aggregate_cache = aggregate_cache_instance()
+    aggregate = aggregate_cache.checkout(aggregate_type, aggregate_id)
+    prefetched_events = None
+    if aggregate == None:
+        # Instantiate blank aggregate
+        aggregate = aggregate_type(id=aggregate_id)
+        log(
+            LogToggles.aggregate_created,
+            "Blank aggregate created",
+            {"aggregate_id": aggregate_id, "aggregate_type": str(type(aggregate))},
+        )
+        hint = (
+            _snapshot_version_hints.get((aggregate_type, aggregate_id))
+            if get_prefetch_events_with_snapshot() and _is_snapshotting(aggregate)
+            else None
+        )
+        if hint != None:
+            prefetched_events = create_task(_get_events(aggregate_id, hint))
+        try:
+            aggregate = await _apply_snapshotting_to_aggregate(aggregate, command)
+        except BaseException:
+            if prefetched_events != None:
+                prefetched_events.cancel()
+            raise
+    sink = metrics_sink_instance()
+    # The snapshot policy is told how long snapshottable aggregates take to replay.
+    is_snapshotting = _is_snapshotting(aggregate)
+    if sink or is_snapshotting:
+        start = time.perf_counter()
+    events = None
+    if prefetched_events != None:
+        events = await prefetched_events
+        if hint > aggregate.version:
+            # The snapshot is older than expected, so events are missing.
+            await _close_event_stream(events)
+            events = None
+        elif hint < aggregate.version:
+            events = _skip_events_through(events, aggregate.version)
+    if events == None:
+        # Get events between snapshot (or cached aggregate) and current
+        events = await _get_events(aggregate_id, aggregate.version)
+    if sink or is_snapshotting:
+        replay_start = time.perf_counter()
+    if sink:
+        sink.record_duration(Metrics.command_event_fetch, replay_start - start)
+    try:
+        if hasattr(events, "__aiter__"):
+            event_count = await aggregate.apply_event_stream(events)
+        else:
+            events = list(events)
+            event_count = len(events)
+            aggregate.apply_events(events)
+    except ReconstituteStateError:
+        aggregate_cache.invalidate(aggregate_type, aggregate_id)
+        raise
+    if sink or is_snapshotting:
+        end = time.perf_counter()
+    if sink:
+        sink.record_duration(Metrics.command_replay, end - replay_start)
+        sink.record_count(Metrics.command_events_replayed, event_count)
+    if is_snapshotting:
+        snapshot_policy_instance().record_replay(
+            aggregate_type, event_count, end - start
+        )
+    log(
+        LogToggles.retrieved_aggregate_events,
+        "Retrieved aggregate events",
+        {
+            "aggregate_id": aggregate_id,
+            "aggregate_type": str(type(aggregate)),
+            "event_count": event_count,
+        },
+    )
+    return aggregate
+
+
+async def _get_events(
+    aggregate_id: any, current_version: int
+) -> Iterable[VersionedEvent] | AsyncIterator[VersionedEvent]:
+    "Retrieves the aggregate's events that are newer than `current_version`."
+
+    events = event_repository_instance().get_events(
+        aggregate_id, current_version, get_batch_size()
+    )
+    if inspect.isawaitable(events):
+        events = await events
+    return events
+
+
+def _skip_events_through(
+    events: Iterable[VersionedEvent] | AsyncIterator[VersionedEvent], version: int
+) -> Iterable[VersionedEvent] | AsyncIterator[VersionedEvent]:
+    "Omits events with a version of `version` or lower."
+
+    if not hasattr(events, "__aiter__"):
+        return [event for event in events if event.version > version]
+
+    async def skip():
+        async for event in events:
+            if event.version > version:
+                yield event
+
+    return skip()
+
+
+async def _close_event_stream(
+    events: Iterable[VersionedEvent] | AsyncIterator[VersionedEvent],
+):
+    "Releases the resources held by an unused event stream."
+
+    if hasattr(events, "aclose"):
+        await events.aclose()
+
+
+async def _process_committed_events(aggregate_id: any, aggregate: Aggregate):
+    """Logs, snapshots, and dispatches an aggregate's newly committed events."""
+
+    for id, event in aggregate.new_events:
+        log(
+            LogToggles.committed_event,
+            "Event committed",
+            lambda: {
+                "aggregate_type": str(type(aggregate)),
+                "aggregate_id": id,
+                "event_type": str(type(event)),
+                "event": log_vars(event),
+            },
+            lazy=True,
+        )
+    await _record_new_snapshot_if_applicable(aggregate_id, aggregate)
+    await _dispatch_events_locally(aggregate.new_events)
+
+
+def _validate(aggregate: Aggregate, command: Command) -> CommandResponse:
+    "Validates a command, reporting the time taken to the metrics sink."
+
+    sink = metrics_sink_instance()
+    if not sink:
+        return aggregate.validate(command)
+    start = time.perf_counter()
+    command_response = aggregate.validate(command)
+    sink.record_duration(Metrics.command_validation, time.perf_counter() - start)
+    return command_response
+
+
+async def _commit_events(
+    aggregate_id_and_event_tuples: list[tuple[any, VersionedEvent]]
+):
+    "Commits events, reporting the time taken to the metrics sink."
+
+    sink = metrics_sink_instance()
+    if not sink:
+        await event_repository_instance().commit_events(aggregate_id_and_event_tuples)
+        return
+    start = time.perf_counter()
+    await event_repository_instance().commit_events(aggregate_id_and_event_tuples)
+    sink.record_duration(Metrics.command_commit, time.perf_counter() - start)
+    sink.record_count(
+        Metrics.command_events_committed, len(aggregate_id_and_event_tuples)
+    )
+
+
+def _record_conflict():
+    "Reports a `DuplicateKeyError` on commit to the metrics sink."
+
+    sink = metrics_sink_instance()
+    if sink:
+        sink.record_count(Metrics.command_conflicts, 1)
+
+
 async def _apply_snapshotting_to_aggregate(
     aggregate: Snapshottable, command: Command
 ) -> Aggregate:
@@ -152,9 +539,17 @@ async def _apply_snapshotting_to_aggregate(
     if not is_snapshotting:
         return aggregate
     snapshot_repo = snapshot_repository_instance()
+    sink = metrics_sink_instance()
+    if sink:
+        start = time.perf_counter()
     snapshot_tuple = await snapshot_repo.get_snapshot(command.get_aggregate_id())
+    if sink:
+        sink.record_duration(
+            Metrics.command_snapshot_fetch, time.perf_counter() - start
+        )
     version = snapshot_tuple[0] if snapshot_tuple else None
     snapshot = snapshot_tuple[1] if snapshot_tuple else None
+    _record_snapshot_version_hint(aggregate, version or 0)
     log(
         LogToggles.is_snapshot_found,
         f"Snapshot was {'found' if version else 'not found'}.",
@@ -189,6 +584,7 @@ async def _apply_snapshotting_to_aggregate(
             # partially applied.
             aggregate = command_to_aggregate_map_instance()[type(command)](aggregate.id)
             await snapshot_repo.delete_snapshot(command.get_aggregate_id())
+            _record_snapshot_version_hint(aggregate, 0)
             log(
                 LogToggles.snapshot_deleted,
                 "Deleted snapshot",
@@ -201,10 +597,15 @@ async def _apply_snapshotting_to_aggregate(
 async def _record_new_snapshot_if_applicable(aggregate_id: any, aggregate: Aggregate):
     """Periodically creates and stores a new snapshot.
 
-    A `Snapshottable` aggregate specifies an interval at which a snapshot should be
-    created.  For example, if a call to
-    `snapshottable_aggregate.get_snapshot_frequency()` yields 5, a new snapshot of the
-    aggregate will be stored every 5 events.
+    The registered `SnapshotPolicy` decides whether a snapshot is needed based on the
+    number of events since the aggregate's most recent snapshot.  With the default
+    policy, if a call to `snapshottable_aggregate.get_snapshot_frequency()` yields 5, a
+    new snapshot of the aggregate will be stored once 5 or more events have been
+    committed since the last snapshot.
+
+    If the `SnapshotWriter` is running, the snapshot is handed to it to be written in
+    the background.  The command's events are already committed, so an error while
+    creating or storing the snapshot is logged rather than raised.
 
     Args:
         aggregate_id:
@@ -216,24 +617,49 @@ async def _record_new_snapshot_if_applicable(aggregate_id: any, aggregate: Aggre
     if not _is_snapshotting(aggregate):
         return
 
-    updated_version = aggregate.version + len(aggregate.new_events)
+    updated_version = max(
+        [aggregate.version]
+        + [
+            event.version
+            for (current_aggregate_id, event) in aggregate.new_events
+            if current_aggregate_id == aggregate_id
+        ]
+    )
     snapshotable: Snapshottable = aggregate
+    events_since_snapshot = updated_version - snapshotable.snapshot_version
 
-    if updated_version % snapshotable.get_snapshot_frequency() == 0:
+    if snapshot_policy_instance().should_snapshot(snapshotable, events_since_snapshot):
+        sink = metrics_sink_instance()
+        if sink:
+            start = time.perf_counter()
         # BEFORE a snapshot is created, it's important to apply the new
         # events that were created from the command validators.  Normally
         # these events are NOT applied until the next time the aggregate
         # is instantiated!
-        aggregate.apply_events(
-            [
-                event
-                for (current_aggregate_id, event) in aggregate.new_events
-                if current_aggregate_id == aggregate_id
-            ]
-        )
-        await snapshot_repository_instance().store_snapshot(
-            aggregate_id, aggregate.version, snapshotable.get_snapshot()
-        )
+        _apply_new_events(aggregate_id, aggregate)
+        try:
+            snapshot = snapshotable.get_snapshot()
+            snapshot_writer = snapshot_writer_instance()
+            if snapshot_writer.is_running:
+                await snapshot_writer.enqueue(aggregate_id, aggregate.version, snapshot)
+            else:
+                await snapshot_repository_instance().store_snapshot(
+                    aggregate_id, aggregate.version, snapshot
+                )
+        except Exception as e:
+            log(
+                LogToggles.snapshot_write_failed,
+                "Failed to write snapshot",
+                {"aggregate_id": aggregate.id, "aggregate_type": str(type(aggregate))},
+                exc_info=e,
+            )
+            return
+        snapshotable.snapshot_version = aggregate.version
+        _record_snapshot_version_hint(aggregate, aggregate.version)
+        if sink:
+            sink.record_duration(
+                Metrics.command_snapshot_write, time.perf_counter() - start
+            )
         log(
             LogToggles.snapshot_taken,
             "Snapshot recorded",
@@ -255,6 +681,66 @@ async def _record_new_snapshot_if_applicable(aggregate_id: any, aggregate: Aggre
         )
 
 
+def _cache_aggregate(aggregate_id: any, aggregate: Aggregate, is_committed: bool):
+    """Returns an aggregate to the aggregate cache.
+
+    The aggregate's new events are normally not applied until the next time the
+    aggregate is instantiated.  A cached aggregate is never re-instantiated, so any
+    committed events belonging to the aggregate that haven't already been applied (see
+    `_record_new_snapshot_if_applicable`) are applied here.  Uncommitted events are
+    discarded.
+
+    Args:
+        aggregate_id:
+            Aggregate ID of the `aggregate` arg.
+        aggregate:
+            The aggregate to cache.
+        is_committed:
+            True if the aggregate's new events were committed to the event store.
+    """
+
+    aggregate_cache = aggregate_cache_instance()
+    if not aggregate_cache.is_enabled:
+        return
+    if is_committed:
+        try:
+            _apply_new_events(aggregate_id, aggregate)
+        except ReconstituteStateError:
+            # The events are already committed, so the command succeeded.  The
+            # aggregate will be rebuilt from the event store next time.
+            return
+    aggregate.new_events.clear()
+    aggregate_cache.checkin(aggregate)
+
+
+def _apply_new_events(aggregate_id: any, aggregate: Aggregate):
+    """Applies the aggregate's own new events that haven't already been applied.
+
+    Events posted for other aggregates are ignored.
+    """
+
+    aggregate.apply_events(
+        [
+            event
+            for (current_aggregate_id, event) in aggregate.new_events
+            if current_aggregate_id == aggregate_id
+            and event.version > aggregate.version
+        ]
+    )
+
+
+def _record_snapshot_version_hint(aggregate: Aggregate, version: int):
+    "Remembers an aggregate's snapshot version.  See `_reconstitute_aggregate`."
+
+    if not get_prefetch_events_with_snapshot():
+        return
+    key = (type(aggregate), aggregate.id)
+    _snapshot_version_hints[key] = version
+    _snapshot_version_hints.move_to_end(key)
+    while len(_snapshot_version_hints) > _MAX_SNAPSHOT_VERSION_HINTS:
+        _snapshot_version_hints.popitem(last=False)
+
+
 def _is_snapshotting(aggregate: Aggregate) -> bool:
     """Determines if snapshotting is turned on for `aggregate`."""
     return (
@@ -262,20 +748,31 @@ def _is_snapshotting(aggregate: Aggregate) -> bool:
     )
 
 
-async def _dispatch_events_locally(events: list[VersionedEvent]):
+async def _dispatch_events_locally(
+    aggregate_id_and_event_tuples: list[tuple[any, VersionedEvent]]
+):
     "Dispatches events to a queue that is monitored by the registered event dispatcher."
 
     if not event_dispatcher_instance():
         return
 
-    for event in events:
-        await enqueue_committed_event_for_dispatch(event)
-        log(
-            LogToggles.queued_event_for_local_dispatch,
-            "Events queued for local dispatch.",
-            {
-                "events": [
-                    {"event_type": str(type(e)), "event_data": vars(e)} for e in events
-                ]
-            },
+    sink = metrics_sink_instance()
+    if sink:
+        start = time.perf_counter()
+    for aggregate_id, event in aggregate_id_and_event_tuples:
+        await enqueue_committed_event_for_dispatch(event, aggregate_id)
+    if sink:
+        sink.record_duration(
+            Metrics.command_enqueue_for_dispatch, time.perf_counter() - start
         )
+    log(
+        LogToggles.queued_event_for_local_dispatch,
+        "Events queued for local dispatch.",
+        lambda: {
+            "events": [
+                {"event_type": str(type(event)), "event_data": log_vars(event)}
+                for (_, event) in aggregate_id_and_event_tuples
+            ]
+        },
+        lazy=True,
+    )
@@ -0,0 +1,142 @@
+import abc
+import dataclasses
+from datetime import datetime, timedelta, timezone, tzinfo
+
+from pyjangle import Event, VersionedEvent, event_id_factory_instance
+
+_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Fields of `CompactEvent` that are stored by descriptors rather than in slots of the
+# same name.
+_DESCRIPTOR_FIELD_NAMES = ("id", "created_at")
+
+
+class _CompactEventMeta(abc.ABCMeta):
+    """Keeps `@dataclass(slots=True)` from shadowing `CompactEvent`'s descriptors.
+
+    A slotted dataclass creates a slot for every field that isn't already a slot of a
+    base class, which would hide the `id` and `created_at` descriptors.
+    """
+
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        slots = namespace.get("__slots__")
+        if bases and slots != None and not isinstance(slots, str):
+            namespace["__slots__"] = tuple(
+                slot for slot in slots if slot not in _DESCRIPTOR_FIELD_NAMES
+            )
+        return super().__new__(mcls, name, bases, namespace, **kwargs)
+
+
+class _IdDescriptor:
+    "Stores the event id in the `_id` slot, generating one when none is given."
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # Default value of the dataclass field.
+            return None
+        return obj._id
+
+    def __set__(self, obj, value):
+        obj._id = event_id_factory_instance()() if value == None else value
+
+
+class _CreatedAtDescriptor:
+    """Stores `created_at` as integer nanoseconds, materializing a `datetime` on access.
+
+    Naive datetimes are stored as nanoseconds since the naive epoch, which converts
+    exactly in both directions.  Aware datetimes are stored as nanoseconds since the
+    UTC epoch along with their `tzinfo`.  An `int` is taken to already be nanoseconds
+    since the naive epoch.
+    """
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # Default value of the dataclass field.
+            return None
+        microseconds = obj._created_at_ns // 1000
+        if obj._created_at_tz == None:
+            return _EPOCH + timedelta(microseconds=microseconds)
+        return (_UTC_EPOCH + timedelta(microseconds=microseconds)).astimezone(
+            obj._created_at_tz
+        )
+
+    def __set__(self, obj, value):
+        if value == None:
+            value = datetime.now()
+        if isinstance(value, int):
+            obj._created_at_ns = value
+            obj._created_at_tz = None
+        elif value.tzinfo == None:
+            obj._created_at_ns = (value - _EPOCH) // _MICROSECOND * 1000
+            obj._created_at_tz = None
+        else:
+            obj._created_at_ns = (value - _UTC_EPOCH) // _MICROSECOND * 1000
+            obj._created_at_tz = value.tzinfo
+
+
+@dataclasses.dataclass(kw_only=True)
+class CompactEvent(metaclass=_CompactEventMeta):
+    """Memory-efficient alternative to `Event`.
+
+    `Event` instances carry a `__dict__` and a `datetime` object, which adds up when
+    millions of events are held in memory for replays, caches, or projection rebuilds.
+    `CompactEvent` keeps its state in slots and stores `created_at` as an integer
+    number of nanoseconds, see `created_at_ns`, which is only turned into a `datetime`
+    when `created_at` is read.  `id` and `created_at` can be passed to the constructor
+    and assigned just like they can on `Event`.
+
+    Subclasses are declared like any other event.  Add `slots=True` to the dataclass
+    decorator, otherwise the subclass's instances get a `__dict__` and most of the
+    savings are lost:
+
+        @RegisterEvent
+        @dataclass(kw_only=True, slots=True)
+        class WidgetOrdered(CompactVersionedEvent):
+            quantity: int
+
+    `CompactEvent` is registered as a virtual subclass of `Event`, so it's accepted
+    anywhere an `Event` is.  For a compact `id`, register an event id factory that
+    returns integers instead of UUIDs.
+    """
+
+    __slots__ = ("_id", "_created_at_ns", "_created_at_tz")
+
+    id: any = _IdDescriptor()
+    created_at: datetime = _CreatedAtDescriptor()
+
+    @property
+    def created_at_ns(self) -> int:
+        """`created_at` as an integer number of nanoseconds.
+
+        Nanoseconds are counted from the naive epoch, or the UTC epoch if `created_at`
+        has a timezone.  Comparing these is cheaper than comparing datetimes."""
+        return self._created_at_ns
+
+    @property
+    def created_at_tz(self) -> tzinfo | None:
+        "The timezone of `created_at`, or None if it's naive."
+        return self._created_at_tz
+
+    @classmethod
+    def deserialize(cls, data: any) -> any:
+        """Converts serialized representation to an Event.
+
+        Args:
+            data:
+                Format depends on the persistence mechanism being used.  However, a
+                dictionary is a broadly useful data structure to use for this argument.
+        """
+        return cls(**data)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class CompactVersionedEvent(CompactEvent):
+    """Memory-efficient alternative to `VersionedEvent`.  See `CompactEvent`."""
+
+    version: int
+
+
+Event.register(CompactEvent)
+VersionedEvent.register(CompactVersionedEvent)
@@ -1,15 +1,30 @@
-from asyncio import Task, create_task, sleep, CancelledError
+from asyncio import (
+    Semaphore,
+    Task,
+    create_task,
+    get_running_loop,
+    sleep,
+    wait,
+    CancelledError,
+)
 from datetime import timedelta
 from pyjangle import (
     EventDispatcherMissingError,
     event_dispatcher_instance,
+    is_batch_event_dispatcher,
     event_repository_instance,
     LogToggles,
     JangleError,
     get_batch_size,
     get_failed_events_retry_interval,
     log,
+    log_vars,
     get_failed_events_max_age,
+    get_failed_events_retry_concurrency,
+    get_failed_events_max_retries_per_pass,
+    get_failed_events_max_retries_per_second,
+    EventRepository,
+    VersionedEvent,
 )
 from pyjangle.registration import background_tasks
 
@@ -19,10 +34,38 @@ class RetryFailedEventsError(JangleError):
     pass
 
 
+class RetryFailedEventsStats:
+    """Progress of a call to `retry_failed_events`.
+
+    Attributes:
+        retried:
+            Number of failed events that have been redispatched.
+        succeeded:
+            Number of redispatched events for which the event dispatcher completed
+            without an error.
+        failed:
+            Number of redispatched events for which the event dispatcher raised an
+            error.
+        backlog_estimate:
+            The event repository's estimate of the number of failed events at the
+            start of the pass, or None if the repository doesn't provide an estimate.
+            See `EventRepository.estimate_unhandled_event_count`.
+    """
+
+    def __init__(self, backlog_estimate: int = None):
+        self.retried = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.backlog_estimate = backlog_estimate
+
+
 async def retry_failed_events(
     batch_size: int = get_batch_size(),
     max_age_time_delta: timedelta = timedelta(seconds=30),
-):
+    max_concurrency: int = None,
+    max_events: int = None,
+    max_events_per_second: float = None,
+) -> RetryFailedEventsStats:
     """Retries failed events.
 
     When an event handler fails to process an event without an exception, the event is
@@ -31,6 +74,13 @@ async def retry_failed_events(
     those events and redispatches them.  Each event is guaranteed to be retried once
     independent of the outcome of other events.
 
+    Failed events are streamed from the event repository `batch_size` at a time, and up
+    to `max_concurrency` of them are redispatched concurrently.  After an outage, the
+    backlog of failed events can be large.  Use `max_events` and
+    `max_events_per_second` to keep a retry pass from starving the dispatch of newly
+    committed events--events that aren't retried are picked up by the next pass.
+    Progress is logged after every `batch_size` events.
+
     Regarding the batch_size argument, be sure to specify value that takes system memory
     into account.  And for the max_age_time_delta argument, keep in mind that just
     because an event is marked as not completed doesn't mean its completion is not
@@ -50,42 +100,87 @@ async def retry_failed_events(
         max_age_in_seconds:
             Events are retried when this period of time has elapsed since it was
             published, and it has not been marked as completed.
+        max_concurrency:
+            The maximum number of events that are redispatched concurrently.  Defaults
+            to `get_failed_events_retry_concurrency`.
+        max_events:
+            The maximum number of events to retry.  0 is unlimited.  Defaults to
+            `get_failed_events_max_retries_per_pass`.
+        max_events_per_second:
+            The maximum rate at which events are redispatched.  0 is unlimited.
+            Defaults to `get_failed_events_max_retries_per_second`.
+
+    Returns:
+        Counts of the events that were retried.
 
     Raises:
         RetryFailedEventsError:
             An error occurred while retrying failed events.
     """
 
+    max_concurrency = max(
+        1,
+        (
+            get_failed_events_retry_concurrency()
+            if max_concurrency == None
+            else max_concurrency
+        ),
+    )
+    if max_events == None:
+        max_events = get_failed_events_max_retries_per_pass()
+    if max_events_per_second == None:
+        max_events_per_second = get_failed_events_max_retries_per_second()
     try:
         repo = event_repository_instance()
-        unhandled_events = repo.get_unhandled_events(
-            batch_size=batch_size, time_delta=max_age_time_delta
+        event_dispatcher = event_dispatcher_instance()
+        stats = RetryFailedEventsStats(
+            await repo.estimate_unhandled_event_count(max_age_time_delta)
         )
         log(
             LogToggles.retrying_failed_events,
             f"Retrying failed events...",
+            {"backlog_estimate": stats.backlog_estimate},
         )
-        count = 0
-        async for event in unhandled_events:
-            count += 1
-            event_repo = event_repository_instance()
-            event_dispatcher = event_dispatcher_instance()
-            try:
-                await event_dispatcher(event, event_repo.mark_event_handled)
-            except Exception as e:
-                log(
-                    LogToggles.event_failed_on_retry,
-                    "An event failed to process on retry.",
-                    {
-                        "event_type": str(type(event)),
-                        "event": vars(event),
-                    },
-                    exc_info=e,
+        unhandled_events = repo.get_unhandled_events(
+            batch_size=batch_size, time_delta=max_age_time_delta
+        )
+        semaphore = Semaphore(max_concurrency)
+        tasks = set()
+        loop = get_running_loop()
+        start_time = loop.time()
+        try:
+            async for event in unhandled_events:
+                if max_events and stats.retried >= max_events:
+                    break
+                if max_events_per_second:
+                    delay = start_time + stats.retried / max_events_per_second
+                    await sleep(max(0, delay - loop.time()))
+                await semaphore.acquire()
+                stats.retried += 1
+                task = create_task(
+                    _retry_failed_event(event, event_dispatcher, repo, stats, semaphore)
                 )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if stats.retried % batch_size == 0:
+                    log(
+                        LogToggles.retrying_failed_events,
+                        f"Retried {stats.retried} failed events...",
+                        vars(stats),
+                    )
+        finally:
+            # Release the repository's resources, e.g. a cursor, when stopping early
+            # rather than whenever the generator is garbage collected.
+            if hasattr(unhandled_events, "aclose"):
+                await unhandled_events.aclose()
+            if tasks:
+                await wait(tasks)
         log(
             LogToggles.retrying_failed_events,
-            f"Finished retrying {count} failed events",
+            f"Finished retrying {stats.retried} failed events",
+            vars(stats),
         )
+        return stats
     except Exception as e:
         log(
             LogToggles.retrying_failed_events_error,
@@ -95,10 +190,41 @@ async def retry_failed_events(
         raise RetryFailedEventsError from e
 
 
+async def _retry_failed_event(
+    event: VersionedEvent,
+    event_dispatcher,
+    event_repo: EventRepository,
+    stats: RetryFailedEventsStats,
+    semaphore: Semaphore,
+):
+    try:
+        if is_batch_event_dispatcher():
+            await event_dispatcher([event], event_repo.mark_events_handled)
+        else:
+            await event_dispatcher(event, event_repo.mark_event_handled)
+        stats.succeeded += 1
+    except Exception as e:
+        stats.failed += 1
+        log(
+            LogToggles.event_failed_on_retry,
+            "An event failed to process on retry.",
+            {
+                "event_type": str(type(event)),
+                "event": log_vars(event),
+            },
+            exc_info=e,
+        )
+    finally:
+        semaphore.release()
+
+
 def begin_retry_failed_events_loop(
     frequency_in_seconds: float = get_failed_events_retry_interval(),
     batch_size: int = get_batch_size(),
     max_age_time_delta: timedelta = timedelta(seconds=get_failed_events_max_age()),
+    max_concurrency: int = None,
+    max_events: int = None,
+    max_events_per_second: float = None,
 ) -> Task:
     """Calls `retry_failed_events` at a specified interval.
 
@@ -119,6 +245,12 @@ def begin_retry_failed_events_loop(
         max_age_time_delta:
             Events are retried when this period of time has elapsed since it was
             published, and it has not been marked as completed.
+        max_concurrency:
+            See `retry_failed_events`.
+        max_events:
+            See `retry_failed_events`.
+        max_events_per_second:
+            See `retry_failed_events`.
 
     Returns:
         A reference to the background task that is created.
@@ -143,7 +275,11 @@ def begin_retry_failed_events_loop(
             await sleep(frequency_in_seconds)
             try:
                 await retry_failed_events(
-                    batch_size=batch_size, max_age_time_delta=max_age_time_delta
+                    batch_size=batch_size,
+                    max_age_time_delta=max_age_time_delta,
+                    max_concurrency=max_concurrency,
+                    max_events=max_events,
+                    max_events_per_second=max_events_per_second,
                 )
             except Exception as e:
                 if isinstance(e, CancelledError):
@@ -1,6 +1,16 @@
-from asyncio import Queue, Task, create_task
+from asyncio import (
+    Queue,
+    Task,
+    TimeoutError,
+    create_task,
+    gather,
+    get_running_loop,
+    wait,
+    wait_for,
+)
 import inspect
 import os
+import time
 from typing import Awaitable, Callable, List
 
 from pyjangle import (
@@ -8,20 +18,37 @@ from pyjangle import (
     VersionedEvent,
     EventHandlerMissingError,
     LogToggles,
+    Metrics,
     log,
+    log_vars,
+    metrics_sink_instance,
     event_repository_instance,
     event_type_to_handler_instance,
     get_events_ready_for_dispatch_queue_size,
+    get_event_dispatch_worker_count,
+    get_order_event_dispatch_by_aggregate,
+    get_event_dispatch_batch_size,
+    get_event_dispatch_batch_linger_milliseconds,
 )
 from pyjangle import background_tasks
 
 # Registered event dispatcher singleton.
 _event_dispatcher = None
 
+# True if `_event_dispatcher` was registered with `register_batch_event_dispatcher`.
+_is_batch_event_dispatcher = False
+
 # Queue of events that have been committed to the event store and are ready to
-# dispatched elsewhere within the current process.
+# dispatched elsewhere within the current process.  Items are (aggregate_id, event)
+# tuples.
 _committed_event_queue = Queue(maxsize=get_events_ready_for_dispatch_queue_size())
 
+# Task created by the most recent call to `begin_processing_committed_events`.
+_event_dispatch_task: Task = None
+
+# When events are dispatched in order by aggregate, each worker consumes its own queue.
+_event_dispatch_worker_queues: list[Queue] = []
+
 
 class EventDispatcherBadSignatureError(JangleError):
     "Event dispatcher signature is invalid."
@@ -38,7 +65,9 @@ class DuplicateEventDispatcherError(JangleError):
     pass
 
 
-def begin_processing_committed_events() -> Task:
+def begin_processing_committed_events(
+    worker_count: int = None, order_by_aggregate: bool = None
+) -> Task:
     """Begins processing events that are ready to be dispatched.
 
     Calling this method will begin a background task that continuously processes events
@@ -46,6 +75,22 @@ def begin_processing_committed_events() -> Task:
     task is automatically added to `tasks.background_tasks` in order to prevent it from
     being garbage collected.  The task is also returned from this function call.
 
+    Events are dispatched by a pool of `worker_count` workers so that a slow event
+    handler doesn't hold up every other event.  When `order_by_aggregate` is True,
+    each aggregate is assigned to a single worker so that its events are dispatched one
+    at a time in the order they were committed while events from different aggregates
+    are still dispatched concurrently.  Events enqueued without an aggregate ID are
+    spread across the workers with no ordering guarantee.  Use
+    `stop_processing_committed_events` to drain the pool during shutdown.
+
+    Args:
+        worker_count:
+            Number of events that can be dispatched concurrently.  Defaults to
+            `get_event_dispatch_worker_count`.
+        order_by_aggregate:
+            Whether each aggregate's events are dispatched in commit order.  Defaults
+            to `get_order_event_dispatch_by_aggregate`.
+
     Returns:
         A reference to the background task that is created.
 
@@ -59,34 +104,209 @@ def begin_processing_committed_events() -> Task:
         raise EventDispatcherMissingError(
             "Unable to process committed events--no event dispatcher registered"
         )
-    log(LogToggles.event_dispatcher_ready, "Event dispatcher ready to process events")
+    worker_count = max(
+        1, get_event_dispatch_worker_count() if worker_count == None else worker_count
+    )
+    order_by_aggregate = (
+        get_order_event_dispatch_by_aggregate()
+        if order_by_aggregate == None
+        else order_by_aggregate
+    )
+    log(
+        LogToggles.event_dispatcher_ready,
+        "Event dispatcher ready to process events",
+        {"worker_count": worker_count, "order_by_aggregate": order_by_aggregate},
+    )
+
+    global _event_dispatch_task, _event_dispatch_worker_queues
+    # A single worker already dispatches every event in order.
+    if order_by_aggregate and worker_count > 1:
+        worker_queues = [
+            Queue(maxsize=get_events_ready_for_dispatch_queue_size())
+            for _ in range(worker_count)
+        ]
+        workers = [_route_committed_events(worker_queues)] + [
+            _dispatch_committed_events(q) for q in worker_queues
+        ]
+    else:
+        worker_queues = []
+        workers = [_dispatch_committed_events() for _ in range(worker_count)]
 
     async def _task():
-        while True:
-            event = await _committed_event_queue.get()
-            await _invoke_registered_event_dispatcher(event)
+        await gather(*workers)
 
     task = create_task(_task())
     background_tasks.append(task)
+    _event_dispatch_task = task
+    _event_dispatch_worker_queues = worker_queues
     return task
 
 
+async def drain_committed_events():
+    """Waits until every event that is queued for dispatch has been dispatched.
+
+    Events that are enqueued while waiting are also waited on.
+    """
+    await _committed_event_queue.join()
+    for q in _event_dispatch_worker_queues:
+        await q.join()
+
+
+async def stop_processing_committed_events(timeout: float = None):
+    """Dispatches queued events and then stops dispatching committed events.
+
+    Stops the task started by `begin_processing_committed_events`.  Call this method
+    during shutdown so that events that were committed, but not yet dispatched, aren't
+    left to the failed events retry mechanism.
+
+    Args:
+        timeout:
+            Maximum number of seconds to wait for queued events to be dispatched.  The
+            workers are stopped once the timeout elapses regardless of whether events
+            are still queued.  If None, waits indefinitely.
+    """
+    global _event_dispatch_task, _event_dispatch_worker_queues
+    task = _event_dispatch_task
+    if task == None:
+        return
+    try:
+        await wait_for(drain_committed_events(), timeout)
+    except TimeoutError:
+        log(
+            LogToggles.event_dispatching_error,
+            "Stopped event dispatch before all queued events were dispatched",
+            {"queued_event_count": _queued_event_count()},
+        )
+    finally:
+        task.cancel()
+        await wait([task])
+        _event_dispatch_task = None
+        _event_dispatch_worker_queues = []
+
+
+def _queued_event_count() -> int:
+    return _committed_event_queue.qsize() + sum(
+        q.qsize() for q in _event_dispatch_worker_queues
+    )
+
+
+async def _route_committed_events(worker_queues: list[Queue]):
+    "Assigns each aggregate's events to the same worker queue."
+    while True:
+        aggregate_id, event = await _committed_event_queue.get()
+        try:
+            key = event.id if aggregate_id == None else aggregate_id
+            await worker_queues[hash(key) % len(worker_queues)].put(
+                (aggregate_id, event)
+            )
+        finally:
+            _committed_event_queue.task_done()
+
+
+async def _dispatch_committed_events(queue: Queue = None):
+    "Dispatches events from `queue`, or the committed event queue if None."
+    while True:
+        q = _committed_event_queue if queue == None else queue
+        if _is_batch_event_dispatcher:
+            events = [event for (_, event) in await _get_event_batch(q)]
+            try:
+                await _invoke_registered_batch_event_dispatcher(events)
+            finally:
+                for _ in events:
+                    q.task_done()
+        else:
+            _, event = await q.get()
+            try:
+                await _invoke_registered_event_dispatcher(event)
+            finally:
+                q.task_done()
+
+
+async def _get_event_batch(q: Queue) -> list[tuple[any, VersionedEvent]]:
+    """Waits for an item on `q` and then gathers a micro-batch of items.
+
+    Items that are already queued are added to the batch immediately.  The batch is
+    closed once it reaches `get_event_dispatch_batch_size` items, or once
+    `get_event_dispatch_batch_linger_milliseconds` elapse after the first item.
+    """
+    batch = [await q.get()]
+    max_size = max(1, get_event_dispatch_batch_size())
+    loop = get_running_loop()
+    deadline = loop.time() + get_event_dispatch_batch_linger_milliseconds() / 1000
+    while len(batch) < max_size:
+        if not q.empty():
+            batch.append(q.get_nowait())
+            continue
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await wait_for(q.get(), remaining))
+        except TimeoutError:
+            break
+    return batch
+
+
 async def _invoke_registered_event_dispatcher(event: VersionedEvent):
+    sink = metrics_sink_instance()
+    if sink:
+        start = time.perf_counter()
     try:
         event_repo = event_repository_instance()
         await _event_dispatcher(event, event_repo.mark_event_handled)
     except Exception as e:
+        if sink:
+            sink.record_count(Metrics.event_dispatch_errors, 1)
         log(
             LogToggles.event_dispatching_error,
             "Encountered an error while dispatching event",
-            {"event_type": str(type(event)), "event": vars(event)},
+            {"event_type": str(type(event)), "event": log_vars(event)},
             exc_info=e,
         )
+    if sink:
+        sink.record_duration(Metrics.event_dispatch, time.perf_counter() - start)
+        sink.record_count(Metrics.events_dispatched, 1)
 
 
-async def enqueue_committed_event_for_dispatch(event: VersionedEvent):
-    "Enqueues a committed event for dispatch."
-    await _committed_event_queue.put(event)
+async def _invoke_registered_batch_event_dispatcher(events: list[VersionedEvent]):
+    sink = metrics_sink_instance()
+    if sink:
+        start = time.perf_counter()
+    try:
+        event_repo = event_repository_instance()
+        await _event_dispatcher(events, event_repo.mark_events_handled)
+    except Exception as e:
+        if sink:
+            sink.record_count(Metrics.event_dispatch_errors, 1)
+        log(
+            LogToggles.event_dispatching_error,
+            "Encountered an error while dispatching a batch of events",
+            {
+                "events": [
+                    {"event_type": str(type(event)), "event": log_vars(event)}
+                    for event in events
+                ]
+            },
+            exc_info=e,
+        )
+    if sink:
+        sink.record_duration(Metrics.event_dispatch, time.perf_counter() - start)
+        sink.record_count(Metrics.events_dispatched, len(events))
+
+
+async def enqueue_committed_event_for_dispatch(
+    event: VersionedEvent, aggregate_id: any = None
+):
+    """Enqueues a committed event for dispatch.
+
+    Args:
+        event:
+            The committed event.
+        aggregate_id:
+            ID of the aggregate that committed the event.  Used to dispatch an
+            aggregate's events in order.  See `begin_processing_committed_events`.
+    """
+    await _committed_event_queue.put((aggregate_id, event))
 
 
 def register_event_dispatcher(wrapped: Callable):
@@ -119,6 +339,46 @@ def register_event_dispatcher(wrapped: Callable):
             Attempted to register multiple event dispatchers.
     """
 
+    _register_event_dispatcher(wrapped, is_batch=False)
+    return wrapped
+
+
+def register_batch_event_dispatcher(wrapped: Callable):
+    """Decorates a function that dispatches batches of events.
+
+    Registering a batch event dispatcher is an alternative to `register_event_dispatcher`
+    for dispatchers that can process several events at once, such as a dispatcher that
+    publishes to a message broker.  Committed events are gathered into micro-batches of
+    up to `get_event_dispatch_batch_size` events, waiting at most
+    `get_event_dispatch_batch_linger_milliseconds` for a batch to fill.  The
+    `completed_callback` marks a list of event IDs as handled with a single call to
+    `EventRepository.mark_events_handled`.  See the default implementation in
+    `default_batch_event_dispatcher`.
+
+    *Failure to mark an event completed will cause it to be processed repeatedly ad
+    infinitum by a retry mechanism.*  Events that are retried by `retry_failed_events`
+    are dispatched in batches of one.
+
+    Only one event dispatcher, batched or not, can be registered.
+
+    Signature:
+        async def func_name(
+            events: list[Event],
+            completed_callback: Callable[[list[any]], Awaitable[any]]
+        )
+
+    Raises:
+        EventDispatcherBadSignatureError:
+            Event dispatcher signature is invalid.
+        DuplicateEventDispatcherError:
+            Attempted to register multiple event dispatchers.
+    """
+
+    _register_event_dispatcher(wrapped, is_batch=True)
+    return wrapped
+
+
+def _register_event_dispatcher(wrapped: Callable, is_batch: bool):
     if (
         not callable(wrapped)
         or len(inspect.signature(wrapped).parameters) != 2
@@ -131,8 +391,15 @@ def register_event_dispatcher(wrapped: Callable):
                 completed_callback: Callable[[any], Awaitable[any]]
             )
             """
+            if not is_batch
+            else """@register_batch_event_dispatcher must decorate a method with 2 parameters: 
+            async def func_name(
+                events: list[Event], 
+                completed_callback: Callable[[list[any]], Awaitable[any]]
+            )
+            """
         )
-    global _event_dispatcher
+    global _event_dispatcher, _is_batch_event_dispatcher
     if _event_dispatcher != None:
         raise DuplicateEventDispatcherError(
             "Cannot register multiple event dispatchers: "
@@ -141,12 +408,15 @@ def register_event_dispatcher(wrapped: Callable):
             + str(wrapped)
         )
     _event_dispatcher = wrapped
+    _is_batch_event_dispatcher = is_batch
     log(
         LogToggles.event_dispatcher_registration,
         "Event dispatcher registered",
-        {"event_dispatcher_type": wrapped.__module__ + "." + wrapped.__name__},
+        {
+            "event_dispatcher_type": wrapped.__module__ + "." + wrapped.__name__,
+            "is_batch": is_batch,
+        },
     )
-    return wrapped
 
 
 def event_dispatcher_instance() -> (
@@ -156,6 +426,11 @@ def event_dispatcher_instance() -> (
     return _event_dispatcher
 
 
+def is_batch_event_dispatcher() -> bool:
+    "True if the registered event dispatcher receives batches of events."
+    return _is_batch_event_dispatcher
+
+
 async def default_event_dispatcher(
     event: VersionedEvent, completed_callback: Callable[[any], Awaitable]
 ):
@@ -191,6 +466,43 @@ async def default_event_dispatcher(
     return
 
 
+async def default_batch_event_dispatcher(
+    events: list[VersionedEvent], completed_callback: Callable[[list[any]], Awaitable]
+):
+    """Dispatches batches of events to registered event handlers.
+
+    Each event is dispatched as it would be by `default_event_dispatcher`.  An error
+    while dispatching one event is logged and does not prevent the remaining events
+    from being dispatched.  The events that were dispatched successfully are then
+    marked as handled with a single call to `completed_callback`.
+
+    Args:
+        events:
+            The events to dispatch.
+        completed_callback:
+            Callback to invoke with the IDs of the events that were successfully
+            dispatched.
+    """
+
+    handled_event_ids = []
+
+    async def mark_handled(event_id: any):
+        handled_event_ids.append(event_id)
+
+    for event in events:
+        try:
+            await default_event_dispatcher(event, mark_handled)
+        except Exception as e:
+            log(
+                LogToggles.event_dispatching_error,
+                "Encountered an error while dispatching event",
+                {"event_type": str(type(event)), "event": log_vars(event)},
+                exc_info=e,
+            )
+    if handled_event_ids:
+        await completed_callback(handled_event_ids)
+
+
 def default_event_dispatcher_with_blacklist(
     *blacklisted_event_types: type,
 ) -> Awaitable:
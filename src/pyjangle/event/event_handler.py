@@ -2,7 +2,7 @@ import functools
 import inspect
 from typing import Callable, List, Type
 
-from pyjangle import JangleError, VersionedEvent, LogToggles, log
+from pyjangle import JangleError, VersionedEvent, LogToggles, log, log_vars
 
 # Registered event handlers singleton instance.
 _event_type_to_event_handler_handler_map: dict[
@@ -97,7 +97,7 @@ def register_event_handler(event_type: any):
                     {
                         "event_type": str(event_type),
                         "event_handler_type": str(wrapped),
-                        "event": vars(event),
+                        "event": log_vars(event),
                     },
                     exc_info=e,
                 )
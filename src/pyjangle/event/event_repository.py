@@ -1,6 +1,6 @@
 import abc
-from datetime import datetime
-from typing import Iterator
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterator
 
 from pyjangle import JangleError, VersionedEvent, LogToggles, log, get_batch_size
 
@@ -64,7 +64,7 @@ class EventRepository(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     async def get_events(
         self, aggregate_id: any, current_version=0, batch_size: int = get_batch_size()
-    ) -> Iterator[VersionedEvent]:
+    ) -> Iterator[VersionedEvent] | AsyncIterator[VersionedEvent]:
         """Returns events for a particular aggregate.
 
         If snaphsots are being utilized, use the `current_version` parameter to exclude
@@ -73,6 +73,14 @@ class EventRepository(metaclass=abc.ABCMeta):
         set in memory at a given time--use the batch-size parameter to leverage this
         mechanism when available.
 
+        Implementations may return a list (or any other iterable) of events, or they
+        may stream events by returning an asynchronous iterator.  This method can also
+        be implemented as an asynchronous generator (`async def` with `yield`).  When
+        streaming, events *must* be produced in ascending version order, and
+        `handle_command` applies each event to the aggregate as it arrives so that
+        aggregates with very long histories can be reconstituted without holding every
+        event in memory.  Lists are sorted by version before they are applied.
+
         Args:
             aggregate_id:
                 Events with this aggregate identifier will be returned.
@@ -84,8 +92,8 @@ class EventRepository(metaclass=abc.ABCMeta):
                 limit how many events concurrently reside in memory.
 
         Returns:
-            A list of events corresponding to an aggregate, or an empty list if there
-            are no matching events.
+            The events corresponding to an aggregate, or an empty list if there are no
+            matching events.
         """
         pass
 
@@ -99,6 +107,8 @@ class EventRepository(metaclass=abc.ABCMeta):
         version.  Because commands can often result in multiple events, some of which
         may even be associated with another (new) aggregate, this method expects a list
         of tuples containing the aggregate identifier followed by the event.
+        Either all of the events are committed, or none of them are.  `handle_commands`
+        relies on this to commit the events of many aggregates at once.
 
         Args:
             aggregate_id_and_event_tuples:
@@ -127,6 +137,35 @@ class EventRepository(metaclass=abc.ABCMeta):
         """
         pass
 
+    async def mark_events_handled(self, event_ids: list[any]):
+        """Tags several events as having been handled.
+
+        Used by batch event dispatchers (see `register_batch_event_dispatcher`).  The
+        default implementation calls `mark_event_handled` once per event.  Override
+        this method when the persistence mechanism can mark many events with a single
+        statement.
+
+        Args:
+            event_ids:
+                The ids of the events to mark as handled.
+        """
+        for event_id in event_ids:
+            await self.mark_event_handled(event_id)
+
+    async def estimate_unhandled_event_count(self, time_delta: timedelta) -> int | None:
+        """Estimates the number of events that `get_unhandled_events` would return.
+
+        Used to report the size of the failed events backlog while retrying failed
+        events.  The estimate doesn't need to be exact, so prefer an inexpensive
+        approximation over an exact count.  The default implementation returns None,
+        meaning that no estimate is available.
+
+        Args:
+            time_delta:
+                See `get_unhandled_events`.
+        """
+        return None
+
     @abc.abstractmethod
     async def get_unhandled_events(
         self, batch_size: int, time_delta: datetime
@@ -138,6 +177,11 @@ class EventRepository(metaclass=abc.ABCMeta):
         committed for a certain period of time, it is considered to be unhandled and is
         returned by this method.
 
+        When event ids are created by `SnowflakeEventIdFactory`, the ids increase with
+        time, so the age cutoff can be expressed as an id range with
+        `SnowflakeEventIdFactory.lower_bound`, and batches can be paged using the last
+        id of the previous batch as a cursor.
+
         Args:
             batch_size:
                 Maximum number of events in the result set that are buffered in memory
@@ -1,65 +1,92 @@
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 from typing import Iterator, List
 from pyjangle import VersionedEvent, get_batch_size, DuplicateKeyError, EventRepository
 
 
 class InMemoryEventRepository(EventRepository):
+    """Non-durable event repository that keeps events in process memory.
+
+    Each aggregate's events are kept in version order alongside a parallel list of
+    their versions.  Committing an event is therefore proportional to the number of
+    events being committed rather than the number of events in the repository, and
+    `get_events` is a binary search followed by a slice.
+    """
+
     def __init__(self) -> None:
         super().__init__()
+        # Events of each aggregate, sorted by version.
         self._events_by_aggregate_id: dict[any, list[VersionedEvent]] = dict()
+        # Versions of the events in `_events_by_aggregate_id`, in the same order.
+        self._versions_by_aggregate_id: dict[any, list[int]] = dict()
         self._events_by_event_id: dict[any, VersionedEvent] = dict()
-        self._unhandled_events = set()
+        # Used as an insertion-ordered set of event ids.
+        self._unhandled_events: dict[any, None] = dict()
 
     async def get_events(
         self, aggregate_id: any, current_version=0, batch_size=get_batch_size()
     ) -> List[VersionedEvent]:
-        return sorted(
-            [
-                event
-                for event in self._events_by_aggregate_id.get(aggregate_id, [])
-                if event.version > current_version
-            ],
-            key=lambda event: event.version,
-        )
+        versions = self._versions_by_aggregate_id.get(aggregate_id)
+        if not versions:
+            return []
+        start = bisect_right(versions, current_version)
+        return self._events_by_aggregate_id[aggregate_id][start:]
 
     async def commit_events(
         self, aggregate_id_and_event_tuples: list[tuple[any, VersionedEvent]]
     ):
-        duplicate_detector: dict[any, set[int]] = dict()
-        duplicate_events_found = False
-
-        existing_events = list()
-        for kvp in self._events_by_aggregate_id.items():
-            for e in kvp[1]:
-                existing_events.append((kvp[0], e))
-
-        for aggregate_id, event in aggregate_id_and_event_tuples + existing_events:
-            if not aggregate_id in duplicate_detector:
-                duplicate_detector[aggregate_id] = set()
-            if event.version in duplicate_detector[aggregate_id]:
-                duplicate_events_found = True
-                break
-            duplicate_detector[aggregate_id].add(event.version)
-
-        if duplicate_events_found:
-            raise DuplicateKeyError()
+        # Check every event before storing any of them so that a duplicate leaves the
+        # repository unchanged.
+        pending_versions: dict[any, set[int]] = dict()
+        for aggregate_id, event in aggregate_id_and_event_tuples:
+            versions = pending_versions.setdefault(aggregate_id, set())
+            if event.version in versions or self._is_version_committed(
+                aggregate_id, event.version
+            ):
+                raise DuplicateKeyError()
+            versions.add(event.version)
 
         for aggregate_id, event in aggregate_id_and_event_tuples:
-            if aggregate_id not in self._events_by_aggregate_id:
-                self._events_by_aggregate_id[aggregate_id] = []
-            self._events_by_aggregate_id[aggregate_id].append(event)
+            versions = self._versions_by_aggregate_id.setdefault(aggregate_id, [])
+            events = self._events_by_aggregate_id.setdefault(aggregate_id, [])
+            if not versions or versions[-1] < event.version:
+                versions.append(event.version)
+                events.append(event)
+            else:
+                index = bisect_left(versions, event.version)
+                versions.insert(index, event.version)
+                events.insert(index, event)
             self._events_by_event_id[event.id] = event
-            self._unhandled_events.add(event.id)
+            self._unhandled_events[event.id] = None
+
+    def _is_version_committed(self, aggregate_id: any, version: int) -> bool:
+        versions = self._versions_by_aggregate_id.get(aggregate_id)
+        if not versions or versions[-1] < version:
+            # New events almost always have the highest version.
+            return False
+        index = bisect_left(versions, version)
+        return index < len(versions) and versions[index] == version
 
     async def mark_event_handled(self, id: str):
-        if id in self._unhandled_events:  # pragma no cover
-            self._unhandled_events.remove(id)
+        self._unhandled_events.pop(id, None)
+
+    async def mark_events_handled(self, ids: list[str]):
+        for id in ids:
+            self._unhandled_events.pop(id, None)
+
+    async def estimate_unhandled_event_count(self, time_delta: timedelta) -> int:
+        # Counting only the events older than `time_delta` would require a scan, so
+        # include every unhandled event.
+        return len(self._unhandled_events)
 
     async def get_unhandled_events(
         self, batch_size: int = 100, time_delta: timedelta = timedelta(seconds=30)
     ) -> Iterator[VersionedEvent]:
-        for id in self._unhandled_events:
-            cutoff_time = datetime.now() - time_delta
+        cutoff_time = datetime.now() - time_delta
+        # Iterate over a copy since events can be marked handled between yields.
+        for id in list(self._unhandled_events):
+            if id not in self._unhandled_events:
+                continue
             event = self._events_by_event_id[id]
             if event.created_at < cutoff_time:  # pragma no cover
                 yield event
@@ -126,3 +126,8 @@ def get_event_name(event_type: type) -> str:
             f"""{str(event_type)} is not registered as an event.  Ensure the event is 
             decorated with @RegisterEvent."""
         )
+
+
+def get_event_names() -> list[str]:
+    """Returns the names of every event registered with `RegisterEvent`."""
+    return list(_name_to_event_type_map)
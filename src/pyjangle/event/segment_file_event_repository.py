@@ -0,0 +1,624 @@
+"""Durable event repository that stores events in append-only files on local disk.
+
+Events are appended to numbered segment files in a single directory.  Once a segment
+reaches `SegmentFileEventRepository.max_segment_bytes`, a new one is started.  Each
+segment starts with `_SEGMENT_MAGIC` followed by records that look like this
+(little-endian):
+
+    payload length  (4 bytes)
+    payload crc32   (4 bytes)
+    payload         (record kind followed by the record's contents)
+
+A commit record holds every event passed to a call to `commit_events`, so the events
+are either all recovered or none of them are.  Each event in it is stored as its
+aggregate id and event id (encoded like `EventCodec` field values), its version, and the
+event encoded by `EventCodec`.  A handled record holds the ids of events that were
+marked handled.
+
+A crash can leave a partially written record at the end of the newest segment.  It is
+detected by its length or checksum and truncated when the repository is opened.
+"""
+
+from asyncio import CancelledError, Task, create_task, shield, sleep, to_thread
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import mmap
+import os
+import struct
+from typing import AsyncIterator
+from zlib import crc32
+
+from pyjangle import (
+    DuplicateKeyError,
+    EventRepository,
+    JangleError,
+    LogToggles,
+    VersionedEvent,
+    event_codec_instance,
+    get_batch_size,
+    log,
+)
+from pyjangle.serialization.event_codec import _decode_value, _encode_value
+
+try:
+    import fcntl
+except ImportError:  # pragma no cover
+    # Windows.  Nothing prevents two processes from opening the same directory.
+    fcntl = None
+
+_SEGMENT_MAGIC = b"PJSEG\x00\x00\x01"
+_SEGMENT_SUFFIX = ".segment"
+_LOCK_FILE_NAME = "LOCK"
+
+# Record kinds.
+_COMMIT = 1
+_HANDLED = 2
+
+_RECORD_HEADER = struct.Struct("<II")
+_KIND_AND_COUNT = struct.Struct("<BI")
+_VERSION_AND_LENGTH = struct.Struct("<qI")
+
+
+class SegmentFileEventRepositoryError(JangleError):
+    "The event segment files could not be opened, read, or written."
+    pass
+
+
+class _Segment:
+    "A segment file and its read-only memory map."
+
+    __slots__ = ("path", "map")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.map: mmap.mmap = None
+
+    def view(self, offset: int, length: int) -> memoryview:
+        "Returns a view of part of the segment without copying it."
+        if self.map == None or offset + length > len(self.map):
+            # The newest segment grows after it's mapped.  Views of the previous map
+            # keep it open until they're released.
+            with open(self.path, "rb") as file:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self.map)[offset : offset + length]
+
+    def close(self):
+        if self.map != None:
+            try:
+                self.map.close()
+            except BufferError:  # pragma no cover
+                # Still being read.  Closed once the last view is released.
+                pass
+            self.map = None
+
+
+def _retrieve_exception(task: Task):
+    "Keeps asyncio from logging a failure that's handled elsewhere."
+    if not task.cancelled():
+        task.exception()
+
+
+def _fsync_directory(path: str):
+    "Flushes a directory's entries to disk so that files created in it survive a crash."
+    if fcntl == None:  # pragma no cover
+        # Windows can't open directories.
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_and_close(fd: int):
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SegmentFileEventRepository(EventRepository):
+    """Durable, dependency-free event repository backed by files on local disk.
+
+    Intended for deployments where running a database server isn't an option.  Events
+    are appended to segment files in `directory`, see the module documentation for the
+    format, and an index of where each aggregate's events are located is kept in memory.
+    The index and the set of unhandled events are rebuilt from the segments when the
+    repository is opened, which takes time proportional to the number of events.
+    Subclass it to specify the directory, and register the subclass:
+
+        @RegisterEventRepository
+        class EventRepository(SegmentFileEventRepository):
+            directory = "/var/lib/my-app/events"
+
+    `commit_events` returns once the events are durable, and the events aren't returned
+    by `get_events` until then.  Commits that arrive while the segment is being flushed
+    to disk with `fsync` are flushed together by the next `fsync`, so concurrent
+    commands share the cost instead of waiting in line.  A commit that is cancelled
+    while it waits is still applied once it's flushed.  If the flush fails, the events
+    are not indexed, but they may have reached the disk and be recovered when the
+    repository is opened again.
+    `DuplicateKeyError` is raised, and nothing is written, if any event's aggregate id
+    and version was already committed.  Marking events handled is not waited on--if it
+    is lost in a crash, the events are dispatched again, which event handlers must
+    already tolerate.
+
+    `get_events` streams events straight out of memory-mapped segments.  Events are
+    decoded by `event_codec_instance`, so they must be dataclasses registered with
+    `RegisterEvent`, and their fields must be supported by `EventCodec`.  Aggregate
+    ids and event ids must also be values that `EventCodec` supports.
+
+    Only one process can open a directory at a time.  Call `close` during shutdown.
+
+    Attributes:
+        directory:
+            Directory containing the segment files.  Created if it doesn't exist.
+        max_segment_bytes:
+            Size at which a new segment file is started.
+        fsync:
+            Whether `commit_events` waits for events to be flushed to disk.  Disabling
+            it is faster, but recently committed events can be lost if the machine
+            loses power.  Events are never lost if only the process crashes.
+
+    Raises:
+        SegmentFileEventRepositoryError:
+            The directory is locked by another process, a segment is corrupt, or a
+            segment couldn't be written.
+    """
+
+    directory: str = None
+    max_segment_bytes: int = 64 * 1024 * 1024
+    fsync: bool = True
+
+    def __init__(
+        self,
+        directory: str = None,
+        max_segment_bytes: int = None,
+        fsync: bool = None,
+    ) -> None:
+        super().__init__()
+        if directory != None:
+            self.directory = directory
+        if max_segment_bytes != None:
+            self.max_segment_bytes = max_segment_bytes
+        if fsync != None:
+            self.fsync = fsync
+        if self.directory == None:
+            raise SegmentFileEventRepositoryError("No directory specified.")
+        # Versions of each aggregate's events in ascending order.
+        self._versions_by_aggregate_id: dict[any, list[int]] = dict()
+        # (segment number, offset, length) of each encoded event, in the same order as
+        # `_versions_by_aggregate_id`.
+        self._locations_by_aggregate_id: dict[any, list[tuple[int, int, int]]] = dict()
+        # Used as an insertion-ordered set.  Maps event id to the event's location.
+        self._unhandled_events: dict[any, tuple[int, int, int]] = dict()
+        # Versions of events that are written but aren't indexed until they're on disk.
+        self._pending_versions: dict[any, set[int]] = dict()
+        self._segments: list[_Segment] = []
+        self._file = None
+        self._file_size = 0
+        # Numbers of records appended and of records known to be on disk.
+        self._written_count = 0
+        self._synced_count = 0
+        self._sync_task: Task = None
+        # Set while the newest segment is being sealed and a new one started.
+        self._seal_task: Task = None
+        # Set when a failed write leaves the files in an unknown state.
+        self._failure: Exception = None
+        is_new_directory = not os.path.isdir(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        if self.fsync and is_new_directory:
+            # The new directory's entry is in its parent.
+            _fsync_directory(os.path.dirname(os.path.abspath(self.directory)))
+        self._lock_file = self._lock_directory()
+        try:
+            self._open_segments()
+            if self.fsync:
+                # A segment may have been created.
+                _fsync_directory(self.directory)
+        except BaseException:
+            self.close()
+            raise
+
+    async def get_events(
+        self, aggregate_id: any, current_version=0, batch_size=get_batch_size()
+    ) -> AsyncIterator[VersionedEvent]:
+        versions = self._versions_by_aggregate_id.get(aggregate_id)
+        if not versions:
+            return
+        start = bisect_right(versions, current_version)
+        locations = self._locations_by_aggregate_id[aggregate_id][start:]
+        batch_size = max(1, batch_size)
+        for index, location in enumerate(locations, 1):
+            yield self._read_event(location)
+            if index % batch_size == 0:
+                # Let other tasks run while long histories are replayed.
+                await sleep(0)
+
+    async def commit_events(
+        self, aggregate_id_and_event_tuples: list[tuple[any, VersionedEvent]]
+    ):
+        self._raise_if_failed()
+        # Check every event before writing any of them so that a duplicate leaves the
+        # repository unchanged.
+        new_versions: dict[any, set[int]] = dict()
+        for aggregate_id, event in aggregate_id_and_event_tuples:
+            versions = new_versions.setdefault(aggregate_id, set())
+            if event.version in versions or self._is_version_committed(
+                aggregate_id, event.version
+            ):
+                raise DuplicateKeyError()
+            versions.add(event.version)
+        if not aggregate_id_and_event_tuples:
+            return
+
+        codec = event_codec_instance()
+        record = bytearray(
+            _KIND_AND_COUNT.pack(_COMMIT, len(aggregate_id_and_event_tuples))
+        )
+        # Offsets of the encoded events within the record.
+        event_offsets = []
+        for aggregate_id, event in aggregate_id_and_event_tuples:
+            encoded_event = codec.encode(event)
+            _encode_value(record, aggregate_id)
+            _encode_value(record, event.id)
+            record += _VERSION_AND_LENGTH.pack(event.version, len(encoded_event))
+            event_offsets.append((len(record), len(encoded_event)))
+            record += encoded_event
+        for aggregate_id, versions in new_versions.items():
+            self._pending_versions.setdefault(aggregate_id, set()).update(versions)
+
+        try:
+            await self._reserve_space(len(record))
+            segment_number, offset = self._append(record)
+        except BaseException:
+            self._release_pending_versions(new_versions)
+            raise
+        entries = [
+            (aggregate_id, event, (segment_number, offset + event_offset, length))
+            for (aggregate_id, event), (event_offset, length) in zip(
+                aggregate_id_and_event_tuples, event_offsets
+            )
+        ]
+        if not self.fsync:
+            self._index_commit(new_versions, entries)
+            return
+        # The record is written, so the commit is finished even if the caller is
+        # cancelled, and its events are indexed once they're on disk.
+        commit = create_task(
+            self._index_commit_once_synced(self._written_count, new_versions, entries)
+        )
+        try:
+            await shield(commit)
+        except CancelledError:
+            # A failure is recorded in `_failure` since nobody is left to raise it to.
+            commit.add_done_callback(_retrieve_exception)
+            raise
+
+    async def mark_event_handled(self, id: any):
+        await self.mark_events_handled([id])
+
+    async def mark_events_handled(self, ids: list[any]):
+        self._raise_if_failed()
+        ids = [id for id in ids if self._unhandled_events.pop(id, None) != None]
+        if not ids:
+            return
+        record = bytearray(_KIND_AND_COUNT.pack(_HANDLED, len(ids)))
+        for id in ids:
+            _encode_value(record, id)
+        await self._reserve_space(len(record))
+        self._append(record)
+
+    async def estimate_unhandled_event_count(self, time_delta: timedelta) -> int:
+        # Counting only the events older than `time_delta` would require decoding each
+        # of them, so include every unhandled event.
+        return len(self._unhandled_events)
+
+    async def get_unhandled_events(
+        self, batch_size: int = 100, time_delta: timedelta = timedelta(seconds=30)
+    ) -> AsyncIterator[VersionedEvent]:
+        cutoff_time = datetime.now() - time_delta
+        batch_size = max(1, batch_size)
+        # Iterate over a copy since events can be marked handled between yields.
+        for index, id in enumerate(list(self._unhandled_events), 1):
+            location = self._unhandled_events.get(id)
+            if location == None:
+                continue
+            event = self._read_event(location)
+            if event.created_at < cutoff_time:
+                yield event
+            if index % batch_size == 0:
+                await sleep(0)
+
+    def close(self):
+        """Flushes the newest segment to disk and closes the segment files.
+
+        The repository can't be used after it's closed.
+        """
+        if self._file != None:
+            try:
+                if self.fsync and self._failure == None:
+                    os.fsync(self._file.fileno())
+            finally:
+                self._file.close()
+                self._file = None
+        for segment in self._segments:
+            segment.close()
+        self._release_lock()
+        self._failure = SegmentFileEventRepositoryError("Repository is closed.")
+
+    async def _index_commit_once_synced(
+        self,
+        record_count: int,
+        new_versions: dict[any, set[int]],
+        entries: list[tuple[any, VersionedEvent, tuple[int, int, int]]],
+    ):
+        try:
+            await self._wait_until_synced(record_count)
+        except BaseException:
+            # The repository is unusable, so the events are never indexed.
+            self._release_pending_versions(new_versions)
+            raise
+        self._index_commit(new_versions, entries)
+
+    def _index_commit(
+        self,
+        new_versions: dict[any, set[int]],
+        entries: list[tuple[any, VersionedEvent, tuple[int, int, int]]],
+    ):
+        "Makes the events of a written commit record visible."
+        self._release_pending_versions(new_versions)
+        for aggregate_id, event, location in entries:
+            self._index_event(aggregate_id, event.version, location)
+            self._unhandled_events[event.id] = location
+
+    def _release_pending_versions(self, new_versions: dict[any, set[int]]):
+        for aggregate_id, versions in new_versions.items():
+            pending_versions = self._pending_versions[aggregate_id]
+            pending_versions -= versions
+            if not pending_versions:
+                del self._pending_versions[aggregate_id]
+
+    def _is_version_committed(self, aggregate_id: any, version: int) -> bool:
+        "Whether the version is committed or is being committed."
+        if version in self._pending_versions.get(aggregate_id, ()):
+            return True
+        versions = self._versions_by_aggregate_id.get(aggregate_id)
+        if not versions or versions[-1] < version:
+            # New events almost always have the highest version.
+            return False
+        index = bisect_left(versions, version)
+        return index < len(versions) and versions[index] == version
+
+    def _index_event(
+        self, aggregate_id: any, version: int, location: tuple[int, int, int]
+    ):
+        versions = self._versions_by_aggregate_id.setdefault(aggregate_id, [])
+        locations = self._locations_by_aggregate_id.setdefault(aggregate_id, [])
+        if not versions or versions[-1] < version:
+            versions.append(version)
+            locations.append(location)
+        else:
+            index = bisect_left(versions, version)
+            versions.insert(index, version)
+            locations.insert(index, location)
+
+    def _read_event(self, location: tuple[int, int, int]) -> VersionedEvent:
+        segment_number, offset, length = location
+        with self._segments[segment_number].view(offset, length) as view:
+            return event_codec_instance().decode(view)
+
+    def _raise_if_failed(self):
+        if self._failure != None:
+            raise SegmentFileEventRepositoryError(
+                "The event segment files are unusable."
+            ) from self._failure
+
+    def _append(self, payload: bytearray) -> tuple[int, int]:
+        """Appends a record to the newest segment.
+
+        Returns:
+            The segment number and offset of the record's payload.
+        """
+        record_size = _RECORD_HEADER.size + len(payload)
+        header = _RECORD_HEADER.pack(len(payload), crc32(payload))
+        previous_size = self._file_size
+        try:
+            self._write(header + payload)
+        except OSError as e:
+            try:
+                # Remove the partial record so that later records can be recovered.
+                os.ftruncate(self._file.fileno(), previous_size)
+                self._file.seek(previous_size)
+            except OSError:
+                self._failure = e
+            raise SegmentFileEventRepositoryError("Unable to write record.") from e
+        self._file_size += record_size
+        self._written_count += 1
+        return len(self._segments) - 1, previous_size + _RECORD_HEADER.size
+
+    def _write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            written = self._file.write(view)
+            view = view[written:]
+
+    async def _reserve_space(self, payload_size: int):
+        "Starts a new segment first if a record won't fit in the newest one."
+        record_size = _RECORD_HEADER.size + payload_size
+        while self._seal_task != None or (
+            self._file_size > len(_SEGMENT_MAGIC)
+            and self._file_size + record_size > self.max_segment_bytes
+        ):
+            if self._seal_task == None:
+                self._seal_task = create_task(self._seal_segment())
+            # Other writers share the task, so don't let it be cancelled.
+            await shield(self._seal_task)
+        self._raise_if_failed()
+
+    async def _wait_until_synced(self, record_count: int):
+        "Waits until at least `record_count` records are on disk."
+        while self._synced_count < record_count:
+            if self._sync_task == None:
+                self._sync_task = create_task(self._sync())
+            # Other commits share the task, so don't let it be cancelled.
+            await shield(self._sync_task)
+
+    async def _sync(self):
+        try:
+            await self._fsync_newest_segment()
+        finally:
+            self._sync_task = None
+
+    async def _seal_segment(self):
+        try:
+            if self.fsync:
+                # Sealed segments are always on disk.  Nothing is written while this
+                # runs, so the segment is complete once it's flushed.
+                await self._fsync_newest_segment()
+            self._file.close()
+            self._start_segment()
+            if self.fsync:
+                # Records in the new segment are lost with it unless its directory
+                # entry is on disk.
+                await self._sync_directory()
+        finally:
+            self._seal_task = None
+
+    async def _sync_directory(self):
+        try:
+            await to_thread(_fsync_directory, self.directory)
+        except OSError as e:
+            self._failure = e
+            raise SegmentFileEventRepositoryError("Unable to sync directory.") from e
+
+    async def _fsync_newest_segment(self):
+        "Flushes the newest segment to disk without blocking the event loop."
+        record_count = self._written_count
+        # The segment may be closed while the duplicate is being flushed.
+        fd = os.dup(self._file.fileno())
+        try:
+            await to_thread(_fsync_and_close, fd)
+        except OSError as e:
+            # Whether the data reached the disk is unknown, and retrying fsync doesn't
+            # help on every operating system.
+            self._failure = e
+            raise SegmentFileEventRepositoryError("Unable to sync segment.") from e
+        self._synced_count = max(self._synced_count, record_count)
+
+    def _start_segment(self):
+        path = self._segment_path(len(self._segments))
+        self._file = open(path, "xb", buffering=0)
+        self._write(_SEGMENT_MAGIC)
+        self._file_size = len(_SEGMENT_MAGIC)
+        self._segments.append(_Segment(path))
+
+    def _segment_path(self, segment_number: int) -> str:
+        return os.path.join(self.directory, f"{segment_number:010d}{_SEGMENT_SUFFIX}")
+
+    def _open_segments(self):
+        "Rebuilds the index from the segment files and opens the newest for writing."
+        names = sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.endswith(_SEGMENT_SUFFIX)
+        )
+        for segment_number, name in enumerate(names):
+            path = self._segment_path(segment_number)
+            if os.path.join(self.directory, name) != path:
+                raise SegmentFileEventRepositoryError(f"Segment is missing: {path}")
+            segment = _Segment(path)
+            self._segments.append(segment)
+            is_newest = segment_number == len(names) - 1
+            valid_size = self._load_segment(segment_number, segment, is_newest)
+            if is_newest:
+                self._file = open(path, "r+b", buffering=0)
+                if valid_size < os.path.getsize(path):
+                    log(
+                        LogToggles.segment_file_truncated,
+                        "Truncating incomplete record at end of segment",
+                        {"path": path, "size": valid_size},
+                    )
+                    segment.close()
+                    self._file.truncate(valid_size)
+                    os.fsync(self._file.fileno())
+                self._file.seek(valid_size)
+                self._file_size = valid_size
+        if self._file == None:
+            self._start_segment()
+
+    def _load_segment(self, segment_number: int, segment: _Segment, is_newest: bool):
+        """Indexes the records in a segment.
+
+        Returns:
+            The size of the segment excluding an incomplete record at its end.
+        """
+        size = os.path.getsize(segment.path)
+        if size < len(_SEGMENT_MAGIC):
+            if is_newest:
+                # Crashed while the segment was being created.
+                with open(segment.path, "wb") as file:
+                    file.write(_SEGMENT_MAGIC)
+                return len(_SEGMENT_MAGIC)
+            raise SegmentFileEventRepositoryError(f"Segment is corrupt: {segment.path}")
+        with segment.view(0, size) as data:
+            if data[: len(_SEGMENT_MAGIC)] != _SEGMENT_MAGIC:
+                raise SegmentFileEventRepositoryError(
+                    f"Not a segment file: {segment.path}"
+                )
+            offset = len(_SEGMENT_MAGIC)
+            while offset < size:
+                if offset + _RECORD_HEADER.size > size:
+                    break
+                length, checksum = _RECORD_HEADER.unpack_from(data, offset)
+                start = offset + _RECORD_HEADER.size
+                end = start + length
+                if end > size or crc32(data[start:end]) != checksum:
+                    break
+                self._load_record(segment_number, data, start)
+                offset = end
+        if offset < size and not is_newest:
+            raise SegmentFileEventRepositoryError(
+                f"Segment is corrupt at offset {offset}: {segment.path}"
+            )
+        return offset
+
+    def _load_record(self, segment_number: int, data: memoryview, offset: int):
+        kind, count = _KIND_AND_COUNT.unpack_from(data, offset)
+        offset += _KIND_AND_COUNT.size
+        if kind == _COMMIT:
+            for _ in range(count):
+                aggregate_id, offset = _decode_value(data, offset)
+                event_id, offset = _decode_value(data, offset)
+                version, length = _VERSION_AND_LENGTH.unpack_from(data, offset)
+                offset += _VERSION_AND_LENGTH.size
+                location = (segment_number, offset, length)
+                self._index_event(aggregate_id, version, location)
+                self._unhandled_events[event_id] = location
+                offset += length
+        elif kind == _HANDLED:
+            for _ in range(count):
+                event_id, offset = _decode_value(data, offset)
+                self._unhandled_events.pop(event_id, None)
+        else:
+            raise SegmentFileEventRepositoryError(f"Unknown record kind: {kind}")
+
+    def _lock_directory(self):
+        "Prevents other processes from opening the directory."
+        lock_file = open(os.path.join(self.directory, _LOCK_FILE_NAME), "a+b")
+        if fcntl == None:  # pragma no cover
+            return lock_file
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            lock_file.close()
+            raise SegmentFileEventRepositoryError(
+                f"Directory is in use by another process: {self.directory}"
+            ) from e
+        return lock_file
+
+    def _release_lock(self):
+        if self._lock_file != None:
+            # Closing the file releases the lock.
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+import threading
+import time
+
+from pyjangle import get_event_id_node_id
+
+# Ids count milliseconds from this instant rather than from 1970 to make the most of the
+# 41 bit timestamp, which lasts for about 69 years.
+_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+_EPOCH_MILLISECONDS = int(_EPOCH.timestamp()) * 1000
+
+_NODE_ID_BITS = 10
+_SEQUENCE_BITS = 12
+_MAX_NODE_ID = (1 << _NODE_ID_BITS) - 1
+_MAX_SEQUENCE = (1 << _SEQUENCE_BITS) - 1
+_TIMESTAMP_SHIFT = _NODE_ID_BITS + _SEQUENCE_BITS
+
+
+class SnowflakeEventIdFactory:
+    """Creates time-ordered, 64 bit integer event ids.
+
+    Random UUIDs, the default event ids, are scattered uniformly across an index, so
+    every insert into a B-tree indexed event table touches a random page.  Ids from this
+    factory instead increase with time, so new events are appended to the end of the
+    index, and the id doubles as a cursor: `lower_bound` converts a point in time into
+    the smallest id created at or after it, which lets event repositories page through
+    events, such as in `get_unhandled_events`, using id ranges.
+
+    Each id is composed of, from most to least significant bits:
+
+        41 bits: milliseconds since 2020-01-01 UTC
+        10 bits: node id, see `EVENT_ID_NODE_ID`
+        12 bits: sequence number within the millisecond
+
+    Ids from a single factory are strictly increasing, even if the system clock moves
+    backwards, and ids from factories with different node ids never collide.  When more
+    than 4096 ids are requested in the same millisecond, the factory borrows from the
+    next millisecond rather than waiting for it.
+
+    Register the factory with `register_event_id_factory`:
+
+        register_event_id_factory(SnowflakeEventIdFactory())
+
+    Args:
+        node_id:
+            Between 0 and 1023.  Must be unique among the processes that create events.
+            Defaults to the `EVENT_ID_NODE_ID` setting.
+
+    Raises:
+        ValueError:
+            `node_id` is out of range.
+    """
+
+    def __init__(self, node_id: int = None):
+        node_id = get_event_id_node_id() if node_id == None else node_id
+        if not 0 <= node_id <= _MAX_NODE_ID:
+            raise ValueError(f"node_id must be between 0 and {_MAX_NODE_ID}: {node_id}")
+        self._node_bits = node_id << _SEQUENCE_BITS
+        self._last_timestamp = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> int:
+        "Returns a new event id."
+        return self.allocate(1).start
+
+    def allocate(self, count: int) -> range:
+        """Reserves a block of consecutive event ids with a single clock reading.
+
+        Useful when many events are created at once, such as when an event repository
+        writes a batch of events.
+
+        Args:
+            count:
+                The number of ids to reserve, at most 4096.
+
+        Returns:
+            The reserved ids.
+        """
+        if not 0 < count <= _MAX_SEQUENCE + 1:
+            raise ValueError(
+                f"count must be between 1 and {_MAX_SEQUENCE + 1}: {count}"
+            )
+        timestamp = time.time_ns() // 1_000_000 - _EPOCH_MILLISECONDS
+        with self._lock:
+            if timestamp > self._last_timestamp:
+                self._last_timestamp = timestamp
+                sequence = 0
+            else:
+                # The clock hasn't advanced, or has moved backwards.
+                sequence = self._sequence
+                if sequence + count > _MAX_SEQUENCE + 1:
+                    self._last_timestamp += 1
+                    sequence = 0
+            self._sequence = sequence + count
+            start = (
+                (self._last_timestamp << _TIMESTAMP_SHIFT) | self._node_bits | sequence
+            )
+        return range(start, start + count)
+
+    @staticmethod
+    def timestamp_of(event_id: int) -> datetime:
+        "Returns the UTC time, to the millisecond, at which `event_id` was created."
+        milliseconds = (event_id >> _TIMESTAMP_SHIFT) + _EPOCH_MILLISECONDS
+        return datetime.fromtimestamp(milliseconds / 1000, timezone.utc)
+
+    @staticmethod
+    def node_id_of(event_id: int) -> int:
+        "Returns the node id of the factory that created `event_id`."
+        return (event_id >> _SEQUENCE_BITS) & _MAX_NODE_ID
+
+    @staticmethod
+    def lower_bound(at: datetime) -> int:
+        """Returns the smallest id that can be created at or after `at`.
+
+        For example, events older than an hour have ids less than
+        `lower_bound(datetime.now(timezone.utc) - timedelta(hours=1))`.  Naive
+        datetimes are interpreted as local time.
+        """
+        milliseconds = int(at.timestamp() * 1000) - _EPOCH_MILLISECONDS
+        return max(milliseconds, 0) << _TIMESTAMP_SHIFT
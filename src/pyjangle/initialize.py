@@ -28,6 +28,7 @@ from pyjangle import (
     Command,
     register_command_dispatcher,
     register_event_dispatcher,
+    register_batch_event_dispatcher,
     register_deserializer,
     register_serializer,
     RegisterEventRepository,
@@ -40,6 +41,8 @@ from pyjangle import (
     begin_retry_failed_events_loop,
     begin_processing_committed_events,
     begin_retry_sagas_loop,
+    begin_saga_retry_scheduler,
+    begin_writing_snapshots,
     get_saga_retry_interval,
     get_batch_size,
     get_failed_events_retry_interval,
@@ -57,12 +60,14 @@ class BackgroundTasksError(JangleError):
 def init_background_tasks(
     process_committed_events: bool = True,
     retry_sagas: bool = True,
+    schedule_saga_retries: bool = False,
     saga_retry_interval_seconds: int = get_saga_retry_interval(),
     saga_batch_size: int = get_batch_size(),
     retry_failed_events: bool = True,
     failed_events_batch_size: int = get_batch_size(),
     failed_events_retry_interval_seconds: int = get_failed_events_retry_interval(),
     failed_events_age: int = get_failed_events_max_age(),
+    write_snapshots_in_background: bool = False,
 ):
     """Begins background tasks that may be useful depending on the system architecture.
 
@@ -72,6 +77,10 @@ def init_background_tasks(
             dispatcher.
         retry_sagas:
             Begins a task that retries sagas that meet the retry criteria.
+        schedule_saga_retries:
+            Begins a task that retries sagas committed by this process as soon as their
+            `retry_at` or `timeout_at` is reached, in addition to the `retry_sagas`
+            daemon.  Off by default.  See `begin_saga_retry_scheduler`.
         saga_retry_interval_in_seconds:
             Specifies a frequency to run the `retry_sagas` daemon.
         saga_batch_size:
@@ -85,6 +94,11 @@ def init_background_tasks(
         failed_events_age:
             An age, after which, an event is considered to be failed if not marked
             completed.
+        write_snapshots_in_background:
+            Begins a task that writes aggregate snapshots so that commands don't wait
+            for them to be stored.  See `begin_writing_snapshots`.  Only enable it if
+            every `Snapshottable.get_snapshot` returns a value that later events don't
+            modify, since the snapshot is written after the aggregate moves on.
     """
     try:
         asyncio.get_running_loop()
@@ -95,6 +109,10 @@ def init_background_tasks(
         begin_processing_committed_events()
     if retry_sagas:
         begin_retry_sagas_loop(saga_retry_interval_seconds, saga_batch_size)
+    if schedule_saga_retries:
+        begin_saga_retry_scheduler()
+    if write_snapshots_in_background:
+        begin_writing_snapshots()
     if retry_failed_events:
         begin_retry_failed_events_loop(
             frequency_in_seconds=failed_events_retry_interval_seconds,
@@ -110,6 +128,9 @@ def initialize_pyjangle(
     event_dispatcher_func: Callable[
         [Event, Callable[[any], Awaitable[any]]], Awaitable
     ] = default_event_dispatcher,
+    batch_event_dispatcher_func: Callable[
+        [list[Event], Callable[[list[any]], Awaitable[any]]], Awaitable
+    ] = None,
     deserializer: Callable[[any], any] = None,
     serializer: Callable[[any], any] = None,
     event_id_factory: Callable[[None], any] = default_event_id_factory,
@@ -131,6 +152,9 @@ def initialize_pyjangle(
             See the `register_command_dispatcher` decorator.
         event_dispatcher_func:
             See the `register_event_dispatcher` decorator.
+        batch_event_dispatcher_func:
+            See the `register_batch_event_dispatcher` decorator.  When specified, it is
+            registered instead of `event_dispatcher_func`.
         deserializer:
             See the `register_deserializer` decorator.  This component is not necessary
             when using an 'InMemory' saga, event, and snapshot repositories.
@@ -153,7 +177,10 @@ def initialize_pyjangle(
             See `set_events_ready_for_dispatch_queue_size`.
     """
     register_command_dispatcher(command_dispatcher_func)
-    register_event_dispatcher(event_dispatcher_func)
+    if batch_event_dispatcher_func:
+        register_batch_event_dispatcher(batch_event_dispatcher_func)
+    else:
+        register_event_dispatcher(event_dispatcher_func)
     if deserializer:
         register_deserializer(deserializer)
     if serializer:
@@ -1,4 +1,6 @@
+import dataclasses
 import logging
+from types import FunctionType
 
 
 # Logging levels
@@ -27,12 +29,43 @@ PROCESS = 15
 MESSAGE = 16
 
 
-def log(log_key, msg, *args, **kwargs):
+# Numeric level of each logging level, resolved once rather than on every call.
+_LEVEL_NUMBERS = {
+    DEBUG: logging.DEBUG,
+    INFO: logging.INFO,
+    WARNING: logging.WARNING,
+    ERROR: logging.ERROR,
+    FATAL: logging.FATAL,
+}
+
+
+def is_log_enabled(log_key) -> bool:
+    """Returns True if messages logged with log_key would be emitted.
+
+    Use this to skip building an expensive log payload on a hot path.  The root logger
+    caches the result of `isEnabledFor` for each level and clears the cache whenever a
+    logging level changes, so this is a pair of dictionary lookups.
+
+    Args:
+        log_key:
+            A constant from the `LogToggles` class.
+    """
+    return logging.root.isEnabledFor(_LEVEL_NUMBERS[log_key])
+
+
+def log(log_key, msg, *args, lazy: bool = False, **kwargs):
     """Logs a message.
 
     For details on the msg, *args, and **kwargs arguments, see
     https://docs.python.org/3/library/logging.html#logging.debug.
 
+    Nothing is evaluated if the logging level associated with log_key is disabled.
+    When lazy is true, each of *args that is a function, such as a lambda, is called to
+    produce the argument that is logged, so an expensive payload can be deferred until
+    it is known that the message will be emitted:
+
+        log(LogToggles.post_new_event, "Posted New Event", lambda: e.id, lazy=True)
+
     Args:
         log_key:
             A constant from the `LogToggles` class.  Associates a specific type of log
@@ -43,6 +76,10 @@ def log(log_key, msg, *args, **kwargs):
 
         *args:
 
+        lazy:
+            If true, the functions in *args are called to produce the arguments that
+            are logged.  Otherwise, every argument is logged as is.
+
         **kwargs:
             exc_info:
                 If not false, exception is added to log message.
@@ -51,10 +88,37 @@ def log(log_key, msg, *args, **kwargs):
             extra:
                 Dictionary with user-defined attributes for `LogRecord`.
     """
+    if not logging.root.isEnabledFor(_LEVEL_NUMBERS[log_key]):
+        return
+    if lazy:
+        args = tuple(arg() if type(arg) is FunctionType else arg for arg in args)
     logger = getattr(logging, log_key)
     logger(msg, *args, **kwargs)
 
 
+def log_vars(obj) -> dict:
+    """Returns the attributes of an event, command, or other object for a log payload.
+
+    Unlike `vars`, this works for objects without a `__dict__`, such as `CompactEvent`
+    subclasses declared with `@dataclass(slots=True)`.  The fields of dataclasses are
+    returned.  For other objects, the contents of `__dict__` or of the slots declared
+    by the object's classes are returned.
+    """
+    if dataclasses.is_dataclass(obj):
+        return {
+            field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)
+        }
+    if hasattr(obj, "__dict__"):
+        return vars(obj)
+    attributes = dict()
+    for cls in type(obj).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if hasattr(obj, name):
+                attributes[name] = getattr(obj, name)
+    return attributes
+
+
 class LogToggles:
     post_new_event = DEBUG
     event_applied_to_aggregate = DEBUG
@@ -73,6 +137,9 @@ class LogToggles:
     queued_event_for_local_dispatch = DEBUG
     retrieved_aggregate_events = DEBUG
     aggregate_created = DEBUG
+    aggregate_cache_hit = DEBUG
+    aggregate_cache_invalidated = DEBUG
+    aggregate_lock_contended = DEBUG
     aggregate_cant_find_state_reconstitutor = ERROR
     aggregate_event_application_failed = ERROR
     aggregate_event_applied = DEBUG
@@ -89,6 +156,7 @@ class LogToggles:
     event_dispatcher_ready = INFO
     query_handler_registration = INFO
     snapshot_repository_registration = INFO
+    metrics_sink_registration = INFO
     saga_repository_registration = INFO
     command_validation_succeeded = INFO
     command_validation_errored = ERROR
@@ -103,6 +171,8 @@ class LogToggles:
     committed_event = INFO
     command_received = INFO
     snapshot_application_failed = WARNING
+    snapshot_write_failed = ERROR
+    segment_file_truncated = WARNING
     serializer_registered = INFO
     deserializer_registered = INFO
     cancel_retry_saga_loop = ERROR
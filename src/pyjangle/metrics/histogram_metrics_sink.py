@@ -0,0 +1,130 @@
+import math
+
+from pyjangle.metrics.metrics_sink import MetricsSink
+
+# Each histogram bucket is this factor wider than the previous one, so percentiles are
+# accurate to within 5% regardless of the magnitude of the values.
+_BUCKET_GROWTH = 1.05
+_INVERSE_LOG_BUCKET_GROWTH = 1 / math.log(_BUCKET_GROWTH)
+
+
+class Histogram:
+    """Summarizes a stream of values using exponentially sized buckets.
+
+    Memory use is proportional to the range of magnitudes recorded rather than the
+    number of values, so a histogram can be left to accumulate indefinitely.
+
+    Attributes:
+        count:
+            Number of values recorded.
+        sum:
+            Sum of the values recorded.
+        min:
+            Smallest value recorded, or None.
+        max:
+            Largest value recorded, or None.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+        # Values that are zero or less.
+        self._non_positive_count = 0
+        # Maps bucket index, i, to the number of values in (GROWTH^(i-1), GROWTH^i].
+        self._buckets: dict[int, int] = dict()
+
+    def record(self, value: float):
+        "Adds a value to the histogram."
+        self.count += 1
+        self.sum += value
+        if self.min == None or value < self.min:
+            self.min = value
+        if self.max == None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self._non_positive_count += 1
+            return
+        index = math.ceil(math.log(value) * _INVERSE_LOG_BUCKET_GROWTH)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    @property
+    def mean(self) -> float | None:
+        "Mean of the values recorded, or None."
+        return self.sum / self.count if self.count else None
+
+    def percentile(self, percentile: float) -> float | None:
+        """Returns an estimate of a percentile of the values recorded.
+
+        Args:
+            percentile:
+                Between 0 and 100.
+
+        Returns:
+            The upper bound of the bucket containing the percentile, clamped to the
+            range of values recorded, or None if no values were recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = self._non_positive_count
+        if seen >= rank:
+            return min(self.max, 0)
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return max(self.min, min(self.max, _BUCKET_GROWTH**index))
+        return self.max
+
+    def to_dict(self) -> dict:
+        "Returns a JSON-serializable summary of the histogram."
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class HistogramMetricsSink(MetricsSink):
+    """In-process `MetricsSink` that keeps a `Histogram` of each metric.
+
+    Durations are recorded in seconds.  For example, to find out how much of the time
+    spent handling commands is spent replaying events:
+
+        sink = register_metrics_sink(HistogramMetricsSink())
+        ...
+        summary = sink.to_dict()
+        print(summary[Metrics.command_replay]["p99"])
+        print(summary[Metrics.command_total]["p99"])
+    """
+
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = dict()
+
+    def record_duration(self, name: str, seconds: float):
+        self._histogram(name).record(seconds)
+
+    def record_count(self, name: str, count: int):
+        self._histogram(name).record(count)
+
+    def to_dict(self) -> dict[str, dict]:
+        "Returns a JSON-serializable summary of each metric's histogram."
+        return {
+            name: histogram.to_dict() for name, histogram in self.histograms.items()
+        }
+
+    def reset(self):
+        "Discards all recorded values."
+        self.histograms.clear()
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram == None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
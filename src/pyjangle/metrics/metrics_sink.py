@@ -0,0 +1,121 @@
+import abc
+
+from pyjangle import JangleError, LogToggles, log
+
+# Registered metrics sink singleton.  Access via `metrics_sink_instance`.
+_metrics_sink = None
+
+
+class DuplicateMetricsSinkError(JangleError):
+    "Registered multiple metrics sinks."
+    pass
+
+
+class Metrics:
+    """Names of the metrics reported to the registered `MetricsSink`.
+
+    Durations are reported in seconds via `MetricsSink.record_duration`.  Counts are
+    reported via `MetricsSink.record_count`.
+    """
+
+    # Duration of `handle_command`, including time spent waiting for the aggregate lock
+    # and conflict retries.
+    command_total = "command.total"
+    # Time spent waiting for the `AggregateLock` when commands are serialized.
+    command_lock_wait = "command.lock_wait"
+    # Time spent retrieving a snapshot from the snapshot repository.
+    command_snapshot_fetch = "command.snapshot_fetch"
+    # Time spent waiting for the event repository to return an aggregate's events.
+    command_event_fetch = "command.event_fetch"
+    # Time spent applying events to the aggregate.  When the event repository streams
+    # events, this includes the time spent retrieving all but the first batch.
+    command_replay = "command.replay"
+    # Time spent validating commands.
+    command_validation = "command.validation"
+    # Time spent committing events to the event repository.
+    command_commit = "command.commit"
+    # Time spent creating and storing a snapshot.
+    command_snapshot_write = "command.snapshot_write"
+    # Time spent enqueuing committed events for dispatch.
+    command_enqueue_for_dispatch = "command.enqueue_for_dispatch"
+    # Number of events applied to an aggregate while reconstituting it.
+    command_events_replayed = "command.events_replayed"
+    # Number of events committed by a command.
+    command_events_committed = "command.events_committed"
+    # Incremented each time a commit fails with a `DuplicateKeyError` and the command
+    # is retried.
+    command_conflicts = "command.conflicts"
+    # Time spent by the event dispatcher on each event, or each batch of events.
+    event_dispatch = "event.dispatch"
+    # Number of events dispatched by each call to the event dispatcher.
+    events_dispatched = "event.dispatched"
+    # Incremented each time the event dispatcher raises an error.
+    event_dispatch_errors = "event.dispatch_errors"
+
+
+class MetricsSink(metaclass=abc.ABCMeta):
+    """Receives timings and counts from the command handler and event dispatcher.
+
+    Register an implementation with `register_metrics_sink` to find out where time is
+    spent while handling commands and dispatching events.  The names of the metrics are
+    listed in `Metrics`.  `HistogramMetricsSink` is an in-process implementation that
+    summarizes each metric as a histogram.  An implementation could also forward the
+    metrics to a monitoring system.
+
+    The methods are called on the hot path and are not awaited, so they must return
+    quickly and should never block.  When no sink is registered, the command handler
+    and event dispatcher don't take any timings at all.
+    """
+
+    @abc.abstractmethod
+    def record_duration(self, name: str, seconds: float):
+        """Records how long an operation took.
+
+        Args:
+            name:
+                A constant from `Metrics`.
+            seconds:
+                Duration of the operation.
+        """
+        pass
+
+    @abc.abstractmethod
+    def record_count(self, name: str, count: int):
+        """Records a number of things, such as events, involved in an operation.
+
+        Args:
+            name:
+                A constant from `Metrics`.
+            count:
+                The number of things.
+        """
+        pass
+
+
+def register_metrics_sink(sink: MetricsSink) -> MetricsSink:
+    """Registers a `MetricsSink` instance.
+
+    Raises:
+        DuplicateMetricsSinkError:
+            Registered multiple metrics sinks.
+    """
+    global _metrics_sink
+    if _metrics_sink != None:
+        raise DuplicateMetricsSinkError(
+            "Cannot register multiple metrics sinks: "
+            + str(_metrics_sink)
+            + ", "
+            + str(sink)
+        )
+    _metrics_sink = sink
+    log(
+        LogToggles.metrics_sink_registration,
+        "Metrics sink registered",
+        {"metrics_sink_type": str(type(sink))},
+    )
+    return sink
+
+
+def metrics_sink_instance() -> MetricsSink | None:
+    "Returns the registered metrics sink singleton, or None if none is registered."
+    return _metrics_sink
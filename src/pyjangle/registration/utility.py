@@ -87,3 +87,37 @@ def register_instance_methods(
             method, attribute_name_on_decorated_function
         )
         type_to_method_map[value_on_decorated_function] = method
+
+
+def find_decorated_functions(
+    cls: type, attribute_name_on_decorated_function: str
+) -> dict[any, Callable]:
+    """Maps the decorator arguments of a class's decorated methods to the methods.
+
+    Unlike `register_instance_methods`, this works on the class rather than an instance,
+    so the result can be computed once per class and shared by every instance.  The
+    methods are returned as plain functions that take the instance as their first
+    argument.  Methods of subclasses take precedence over those of base classes.
+
+    Args:
+        cls:
+            Methods of this class, including inherited methods, are considered.
+        attribute_name_on_decorated_function:
+            Methods containing an attribute with this name will be returned.
+
+    Returns:
+        Dictionary mapping the value of attribute_name_on_decorated_function on each
+        decorated method to the method.
+    """
+    value_to_function_map = dict()
+    for name in dir(cls):
+        if name.startswith("__"):
+            continue
+        function = inspect.getattr_static(cls, name)
+        if inspect.isfunction(function) and hasattr(
+            function, attribute_name_on_decorated_function
+        ):
+            value_to_function_map[
+                getattr(function, attribute_name_on_decorated_function)
+            ] = function
+    return value_to_function_map
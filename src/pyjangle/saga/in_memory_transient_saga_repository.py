@@ -1,3 +1,4 @@
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
 from pyjangle.event.event import VersionedEvent
 from pyjangle import DuplicateKeyError, get_batch_size
@@ -5,58 +6,125 @@ from pyjangle.saga.saga import Saga
 from pyjangle.saga.saga_repository import SagaRepository
 
 
+class _SagaMetadata:
+    "The non-event state of a committed saga."
+
+    __slots__ = ("saga_type", "retry_at", "timeout_at", "is_complete", "is_timed_out")
+
+    def __init__(self, saga: Saga):
+        self.saga_type = type(saga)
+        self.retry_at = saga.retry_at
+        self.timeout_at = saga.timeout_at
+        self.is_complete = saga.is_complete
+        self.is_timed_out = saga.is_timed_out
+
+
 class InMemorySagaRepository(SagaRepository):
+    """Non-durable saga repository that keeps sagas in process memory.
+
+    Each saga's event ids are kept in a set so that committing a saga is proportional to
+    the number of new events.  Sagas that are waiting to be retried are kept in an index
+    ordered by `retry_at`, so `get_retry_saga_ids` only visits sagas that are due.
+    Completed and timed out sagas are removed from the index.  A saga keeps its place
+    in the index when it's committed with the same `retry_at`, so that it isn't
+    returned again after an `after_id` cursor that has passed it.
+    """
+
     def __init__(self) -> None:
-        self.types = dict()
-        self.sagas = dict()
-        self.events = dict()
+        self._sagas: dict[any, _SagaMetadata] = dict()
+        # Events of each saga in the order they were committed.
+        self._events_by_saga_id: dict[any, list[VersionedEvent]] = dict()
+        self._event_ids_by_saga_id: dict[any, set] = dict()
+        # Sorted (retry_at, sequence_number, saga_id) entries of sagas awaiting a retry.
+        # The sequence number breaks ties without comparing saga ids.
+        self._retry_index: list[tuple[datetime, int, any]] = []
+        self._retry_index_entries: dict[any, tuple[datetime, int, any]] = dict()
+        # The latest retry index entry of each saga, including sagas that have left the
+        # index, so that any id returned by `get_retry_saga_ids` works as `after_id`.
+        self._last_retry_index_entries: dict[any, tuple[datetime, int, any]] = dict()
+        self._next_sequence_number = 0
+        self._snapshots: dict[any, tuple[int, dict]] = dict()
 
     async def get_saga(self, saga_id: any) -> Saga:
-        if saga_id not in self.types:
+        metadata = self._sagas.get(saga_id)
+        if metadata == None:
             return None
-        return self.types[saga_id](
+
+        async def get_events(skip: int) -> list[VersionedEvent]:
+            return self._events_by_saga_id[saga_id][skip:]
+
+        return await self._reconstitute_saga(
+            metadata.saga_type,
             saga_id,
-            [self.events[saga_id][event_id] for event_id in self.events[saga_id]],
-            self.sagas[saga_id].retry_at,
-            self.sagas[saga_id].timeout_at,
-            self.sagas[saga_id].is_complete,
+            get_events,
+            metadata.retry_at,
+            metadata.timeout_at,
+            metadata.is_complete,
         )
 
     async def commit_saga(self, saga: Saga):
-        if not saga.saga_id in self.events:
-            self.events[saga.saga_id] = dict()
-        if _has_duplicate_ids(
-            saga.new_events
-            + [
-                self.events[saga.saga_id][key]
-                for key in self.events[saga.saga_id].keys()
-            ]
-        ):
-            raise DuplicateKeyError()
-        self.sagas[saga.saga_id] = saga
-        self.types[saga.saga_id] = type(saga)
+        event_ids = self._event_ids_by_saga_id.get(saga.saga_id, set())
+        new_event_ids = set()
         for event in saga.new_events:
-            self.events[saga.saga_id][event.id] = event
+            if event.id in event_ids or event.id in new_event_ids:
+                raise DuplicateKeyError()
+            new_event_ids.add(event.id)
+        event_ids.update(new_event_ids)
+        self._event_ids_by_saga_id[saga.saga_id] = event_ids
+        self._events_by_saga_id.setdefault(saga.saga_id, []).extend(saga.new_events)
+        metadata = self._sagas[saga.saga_id] = _SagaMetadata(saga)
+        self._update_retry_index(saga.saga_id, metadata)
 
-    async def get_retry_saga_ids(self, batch_size: int = get_batch_size()) -> list[any]:
+    async def get_retry_saga_ids(
+        self, batch_size: int = get_batch_size(), after_id: any = None
+    ) -> list[any]:
         current_time = datetime.now()
-        return [
-            saga_id
-            for saga_id in self.sagas
-            if not self.sagas[saga_id].is_complete
-            and not self.sagas[saga_id].is_timed_out
-            and (
-                not self.sagas[saga_id].timeout_at
-                or self.sagas[saga_id].timeout_at > current_time
-            )
-            and (
-                self.sagas[saga_id].retry_at
-                and self.sagas[saga_id].retry_at < current_time
+        saga_ids = []
+        expired_saga_ids = []
+        start = 0
+        if after_id != None and after_id in self._last_retry_index_entries:
+            start = bisect_right(
+                self._retry_index, self._last_retry_index_entries[after_id]
             )
-        ]
+        for index in range(start, len(self._retry_index)):
+            retry_at, _, saga_id = self._retry_index[index]
+            if len(saga_ids) >= batch_size or not retry_at < current_time:
+                break
+            timeout_at = self._sagas[saga_id].timeout_at
+            if timeout_at and timeout_at <= current_time:
+                expired_saga_ids.append(saga_id)
+            else:
+                saga_ids.append(saga_id)
+        # Sagas past their timeout are never retried, so they can leave the index until
+        # they are committed again.
+        for saga_id in expired_saga_ids:
+            self._remove_from_retry_index(saga_id)
+        return saga_ids
+
+    async def get_saga_snapshot(self, saga_id: any) -> tuple[int, dict] | None:
+        return self._snapshots.get(saga_id)
+
+    async def store_saga_snapshot(self, saga_id: any, event_count: int, snapshot: dict):
+        self._snapshots[saga_id] = (event_count, snapshot)
+
+    async def delete_saga_snapshot(self, saga_id: any):
+        self._snapshots.pop(saga_id, None)
 
+    def _update_retry_index(self, saga_id: any, metadata: _SagaMetadata):
+        entry = self._retry_index_entries.get(saga_id)
+        if metadata.is_complete or metadata.is_timed_out or not metadata.retry_at:
+            self._remove_from_retry_index(saga_id)
+            return
+        if entry != None and entry[0] == metadata.retry_at:
+            return
+        self._remove_from_retry_index(saga_id)
+        entry = (metadata.retry_at, self._next_sequence_number, saga_id)
+        self._next_sequence_number += 1
+        insort(self._retry_index, entry)
+        self._retry_index_entries[saga_id] = entry
+        self._last_retry_index_entries[saga_id] = entry
 
-def _has_duplicate_ids(events: list[VersionedEvent]):
-    return len([event.id for event in events]) != len(
-        set([event.id for event in events])
-    )
+    def _remove_from_retry_index(self, saga_id: any):
+        entry = self._retry_index_entries.pop(saga_id, None)
+        if entry != None:
+            del self._retry_index[bisect_left(self._retry_index, entry)]
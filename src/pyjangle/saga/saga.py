@@ -3,14 +3,15 @@ import functools
 import inspect
 import logging
 import os
-from typing import Callable, Iterable, List
+import types
+from typing import Callable, Iterable, List, Mapping
 
 from pyjangle import (
-    find_decorated_method_names,
-    register_instance_methods,
+    find_decorated_functions,
     LogToggles,
     JangleError,
     log,
+    log_vars,
     Event,
     VersionedEvent,
     CommandResponse,
@@ -22,8 +23,8 @@ from pyjangle import (
 # Name of the attribute used to tag saga methods decorated with `event_receiver.` This
 # attribute holds the type of the event that the event receiver handles.
 _EVENT_RECEIVER_EVENT_TYPE = "_event_receiver_event_type"
-# The name of the attribute on each saga instance that holds a mapping of event_type to
-# instances of methods decorated with `event_receiver`.
+# The name of the attribute on each saga class that holds a mapping of event_type to
+# methods decorated with `event_receiver`.
 _EVENT_TYPE_TO_EVENT_RECEIVER_INSTANCE_METHOD = (
     "_event_type_to_event_receiver_instance_method"
 )
@@ -31,8 +32,8 @@ _EVENT_TYPE_TO_EVENT_RECEIVER_INSTANCE_METHOD = (
 # `reconstitute_saga_state`. This attribute holds the type of the event that the method
 # handles.
 _STATE_RECONSTITUTOR_EVENT_TYPE = "_state_reconstitutor_event_type"
-# Name of the attribute that each saga instance that holds a mapping of event_type to
-# instances of methods decorated with `reconstitute_saga_state`.
+# Name of the attribute on each saga class that holds a mapping of event_type to
+# methods decorated with `reconstitute_saga_state`.
 _EVENT_TYPE_TO_STATE_RECONSTITUTORS_INSTANCE_METHOD = (
     "_event_type_to_state_reconstitutor_instance_method"
 )
@@ -173,14 +174,15 @@ def event_receiver(
                 "@event_receiver must decorate a method with 1 parameters: self"
             )
         setattr(wrapped, _EVENT_RECEIVER_EVENT_TYPE, type)
+        # Freeze the flag predicates once rather than on every invocation.
+        required = frozenset(required_flags)
+        if require_event_type_in_flags:
+            required |= {type}
+        skip_if_any = frozenset(skip_if_any_flags_set)
 
         @functools.wraps(wrapped)
         async def wrapper(self: Saga, *args, **kwargs):
-            if require_event_type_in_flags and not type in self.flags:
-                return
-            if self.flags.issuperset(required_flags) and not self.flags.intersection(
-                skip_if_any_flags_set
-            ):
+            if required <= self.flags and skip_if_any.isdisjoint(self.flags):
                 try:
                     return await wrapped(self)
                 except Exception as e:
@@ -277,14 +279,34 @@ class Saga:
     precedence over the `timeout_at` property.
     """
 
-    # Cache of the names of methods decorated with `reconstitute_saga_state` with a key
-    # corresponding to the type of the saga, and a value corresponding to a list of
-    # method names as strings.
-    _saga_type_to_reconstitute_saga_state_method_names = dict()
-    # Cache of the names of methods decorated with `event_receiver` with a
-    # key corresponding to the type of the aggregate, and a value corresponding to a
-    # list of method names as strings.
-    _saga_type_to_event_receiver_method_names = dict()
+    # Maps of event types to state reconstitutors and event receivers.  Each subclass
+    # gets its own maps, compiled once when the class is created--see
+    # `__init_subclass__`--so that instantiating a saga doesn't involve searching for
+    # decorated methods.  The maps are read-only since every instance shares them.
+    _event_type_to_state_reconstitutor_instance_method: Mapping[type, Callable] = (
+        types.MappingProxyType(dict())
+    )
+    _event_type_to_event_receiver_instance_method: Mapping[type, Callable] = (
+        types.MappingProxyType(dict())
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        """Compiles the class's state reconstitutor and event receiver maps."""
+        super().__init_subclass__(**kwargs)
+        setattr(
+            cls,
+            _EVENT_TYPE_TO_STATE_RECONSTITUTORS_INSTANCE_METHOD,
+            types.MappingProxyType(
+                find_decorated_functions(cls, _STATE_RECONSTITUTOR_EVENT_TYPE)
+            ),
+        )
+        setattr(
+            cls,
+            _EVENT_TYPE_TO_EVENT_RECEIVER_INSTANCE_METHOD,
+            types.MappingProxyType(
+                find_decorated_functions(cls, _EVENT_RECEIVER_EVENT_TYPE)
+            ),
+        )
 
     def __init__(
         self,
@@ -295,55 +317,23 @@ class Saga:
         is_complete: bool = False,
         is_timed_out: bool = False,
     ):
-        saga_type = type(self)
-
-        # Update the cache with method names if needed.
-        if saga_type not in Saga._saga_type_to_reconstitute_saga_state_method_names:
-            Saga._saga_type_to_reconstitute_saga_state_method_names[
-                saga_type
-            ] = find_decorated_method_names(
-                self, lambda method: hasattr(method, _STATE_RECONSTITUTOR_EVENT_TYPE)
-            )
-        if saga_type not in Saga._saga_type_to_event_receiver_method_names:
-            Saga._saga_type_to_event_receiver_method_names[
-                saga_type
-            ] = find_decorated_method_names(
-                self, lambda method: hasattr(method, _EVENT_RECEIVER_EVENT_TYPE)
-            )
-
-        register_instance_methods(
-            self,
-            _EVENT_TYPE_TO_STATE_RECONSTITUTORS_INSTANCE_METHOD,
-            _STATE_RECONSTITUTOR_EVENT_TYPE,
-            Saga._saga_type_to_reconstitute_saga_state_method_names[saga_type],
-        )
-        register_instance_methods(
-            self,
-            _EVENT_TYPE_TO_EVENT_RECEIVER_INSTANCE_METHOD,
-            _EVENT_RECEIVER_EVENT_TYPE,
-            Saga._saga_type_to_event_receiver_method_names[saga_type],
-        )
-
         self.saga_id = saga_id
         self.flags = set()
+        # Saga repositories that store deadlines as text may pass ISO strings.
         self.retry_at = (
-            None
-            if retry_at == None
-            else retry_at
-            if isinstance(retry_at, datetime)
-            else datetime.fromisoformat(retry_at)
+            datetime.fromisoformat(retry_at) if isinstance(retry_at, str) else retry_at
         )
         self.timeout_at = (
-            None
-            if timeout_at == None
+            datetime.fromisoformat(timeout_at)
+            if isinstance(timeout_at, str)
             else timeout_at
-            if isinstance(timeout_at, datetime)
-            else datetime.fromisoformat(timeout_at)
         )
         self.is_timed_out = is_timed_out
         self.is_complete = is_complete
         self.new_events: list[VersionedEvent] = []
         self.is_dirty = False
+        # Number of events that have been applied to the saga, including new events.
+        self.event_count = 0
         self._apply_historical_events(events)
         try:
             self._command_dispatcher = command_dispatcher_instance()
@@ -413,7 +403,7 @@ class Saga:
     def flags_has_any(self, *args: any):
         "Returns true if any of `*args` exists if `flags`."
 
-        return set(args).intersection(self.flags)
+        return not self.flags.isdisjoint(args)
 
     async def evaluate(self, event: VersionedEvent = None):
         """Applies an event to the saga to progress its state.
@@ -435,23 +425,24 @@ class Saga:
         if self.is_complete:
             return
         self.retry_at = None
-        event_receiver_map: dict[
-            VersionedEvent, Callable[[VersionedEvent], None]
-        ] = getattr(self, _EVENT_TYPE_TO_EVENT_RECEIVER_INSTANCE_METHOD)
+        event_receiver_map: Mapping[
+            VersionedEvent, Callable[[Saga], None]
+        ] = self._event_type_to_event_receiver_instance_method
         if event:
             self._post_state_change_event(event)
             event_type = type(event)
             try:
-                return await event_receiver_map[event_type](event)
+                event_receiver = event_receiver_map[event_type]
             except KeyError as ke:
                 raise EventRceiverMissingError(
                     "Missing event receiver (@event_receiver) for "
                     + str(event_type)
                     + "}"
                 ) from ke
+            return await event_receiver(self)
         else:
             for receiver_method in event_receiver_map.values():
-                await receiver_method()
+                await receiver_method(self)
 
     def set_complete(self):
         "Call from an event receiver to mark the saga as completed."
@@ -493,12 +484,13 @@ class Saga:
             ReconstituteSagaStateMissingError:
                 reconstitute_saga_state method missing.
         """
-        event_to_state_reconstitutors_map = getattr(
-            self, _EVENT_TYPE_TO_STATE_RECONSTITUTORS_INSTANCE_METHOD
+        event_to_state_reconstitutors_map = (
+            self._event_type_to_state_reconstitutor_instance_method
         )
         try:
             for e in events:
-                event_to_state_reconstitutors_map[type(e)](e)
+                event_to_state_reconstitutors_map[type(e)](self, e)
+                self.event_count += 1
         except KeyError as ke:
             raise ReconstituteSagaStateMissingError(
                 "Missing state reconstitutor (@reconstitute_saga_state) for "
@@ -519,7 +511,7 @@ class Saga:
             "Command failed",
             {
                 "command_type": str(type(command)),
-                "command": vars(command) if command else None,
+                "command": log_vars(command) if command else None,
             },
             exc_info=exception,
         )
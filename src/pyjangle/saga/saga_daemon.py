@@ -1,24 +1,34 @@
-from asyncio import create_task, sleep
+from asyncio import Semaphore, create_task, sleep, wait
 import asyncio
+import inspect
 from pyjangle import (
     LogToggles,
     log,
     JangleError,
     saga_repository_instance,
+    store_saga_snapshot_if_applicable,
+    saga_retry_scheduler_instance,
     DuplicateKeyError,
     SagaNotFoundError,
     get_batch_size,
     background_tasks,
     get_saga_retry_interval,
+    get_saga_retry_concurrency,
 )
 
+# IDs of sagas that are currently being retried by `retry_sagas`.  A saga is never
+# retried more than once at a time within the process.
+_sagas_in_flight: set = set()
+
 
 class SagaRetryError(JangleError):
     "Error occurred while retrying saga."
     pass
 
 
-async def retry_sagas(max_batch_size: int = get_batch_size()):
+async def retry_sagas(
+    max_batch_size: int = get_batch_size(), max_concurrency: int = None
+) -> int:
     """Retries eligible sagas.
 
     There are many reasons why a saga would need to be retried such as a network or
@@ -27,6 +37,18 @@ async def retry_sagas(max_batch_size: int = get_batch_size()):
     method will retry all sagas that have signaled that a retry is necessary.  Each saga
     is guaranteed to be retried independent of the outcome of the other sagas.
 
+    Saga IDs are retrieved from the saga repository a page of `max_batch_size` at a
+    time, and up to `max_concurrency` sagas are retried concurrently.  Once a page has
+    been retried, the next page is retrieved by passing the last ID of the page as the
+    `after_id` cursor of `SagaRepository.get_retry_saga_ids`, so sagas whose retry
+    fails and remain due don't hold up the sagas behind them.  The call ends when a
+    page is empty.  A saga that is still being retried by an overlapping call is
+    skipped.
+
+    Repositories whose `get_retry_saga_ids` doesn't take `after_id` are paged by
+    requesting `max_batch_size` more IDs than the number already retried during the
+    call and skipping the IDs already retried.
+
     Regarding the max_batch_size argument, be sure to specify value that takes system
     memory into account.
 
@@ -36,31 +58,84 @@ async def retry_sagas(max_batch_size: int = get_batch_size()):
     Args:
         max_batch_size:
             The maximum number of sagas to keep in memory at a time.
+        max_concurrency:
+            The maximum number of sagas to retry concurrently.  Defaults to
+            `get_saga_retry_concurrency`.
 
+    Returns:
+        The number of sagas that were retried.
     """
+    max_concurrency = max(
+        1, get_saga_retry_concurrency() if max_concurrency == None else max_concurrency
+    )
     repo = saga_repository_instance()
-    saga_ids = await repo.get_retry_saga_ids(max_batch_size)
     log(
         LogToggles.retrying_sagas,
         f"Retrying sagas.",
     )
-    count = 0
-    for id in saga_ids:
-        count += 1
-        try:
-            await retry_saga(id)
-        except Exception as e:
-            log(
-                LogToggles.retrying_sagas_error,
-                f"Error retrying saga with id '{id}'",
-                exc_info=e,
+    semaphore = Semaphore(max_concurrency)
+    accepts_cursor = _accepts_after_id(repo)
+    retried_count = 0
+    saga_ids = []
+    # Only used to page through repositories that don't accept `after_id`.
+    retried_saga_ids = set()
+    while True:
+        if accepts_cursor:
+            saga_ids = await repo.get_retry_saga_ids(
+                max_batch_size, after_id=saga_ids[-1] if saga_ids else None
             )
-    log(LogToggles.retrying_sagas, f"Finished retrying {count} sagas.")
+        else:
+            saga_ids = [
+                id
+                for id in await repo.get_retry_saga_ids(
+                    max_batch_size + len(retried_saga_ids)
+                )
+                if not id in retried_saga_ids
+            ][:max_batch_size]
+            retried_saga_ids.update(saga_ids)
+        if not saga_ids:
+            break
+        retried_count += len(saga_ids)
+        tasks = []
+        for id in saga_ids:
+            if id in _sagas_in_flight:
+                continue
+            await semaphore.acquire()
+            _sagas_in_flight.add(id)
+            tasks.append(create_task(_retry_saga_in_pool(id, semaphore)))
+        if tasks:
+            await wait(tasks)
+    log(LogToggles.retrying_sagas, f"Finished retrying {retried_count} sagas.")
+    return retried_count
+
+
+def _accepts_after_id(repo) -> bool:
+    "Whether the repository's `get_retry_saga_ids` takes the `after_id` cursor."
+    parameters = inspect.signature(repo.get_retry_saga_ids).parameters.values()
+    return any(
+        parameter.name == "after_id" or parameter.kind == parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+async def _retry_saga_in_pool(saga_id: any, semaphore: Semaphore):
+    try:
+        await retry_saga(saga_id)
+    except Exception as e:
+        log(
+            LogToggles.retrying_sagas_error,
+            f"Error retrying saga with id '{saga_id}'",
+            exc_info=e,
+        )
+    finally:
+        _sagas_in_flight.discard(saga_id)
+        semaphore.release()
 
 
 def begin_retry_sagas_loop(
     frequency_in_seconds: float = get_saga_retry_interval(),
     batch_size: int = get_batch_size(),
+    max_concurrency: int = None,
 ):
     """Calls `retry_sagas` at a specified interval.
 
@@ -77,6 +152,8 @@ def begin_retry_sagas_loop(
             The interval *between* invocations of `retry_sagas`.
         batch_size:
             The maximum number of sagas to keep in memory at a time.
+        max_concurrency:
+            The maximum number of sagas to retry concurrently.  See `retry_sagas`.
 
     Returns:
         A reference to the background task that is created.
@@ -91,7 +168,7 @@ def begin_retry_sagas_loop(
         try:
             while True:
                 await sleep(frequency_in_seconds)
-                await retry_sagas(batch_size)
+                await retry_sagas(batch_size, max_concurrency)
         except asyncio.CancelledError as e:
             log(LogToggles.cancel_retry_saga_loop, "Ended retry saga loop.")
 
@@ -100,6 +177,65 @@ def begin_retry_sagas_loop(
     return task
 
 
+def begin_saga_retry_scheduler(max_concurrency: int = None):
+    """Begins retrying sagas as soon as their deadlines are reached.
+
+    Starts a background task that runs the `SagaRetryScheduler`.  Sagas committed in
+    this process while it runs are retried at their `retry_at` or `timeout_at`,
+    whichever comes first, instead of waiting for the next `retry_sagas` poll.  A
+    reference to the created task is automatically added to `tasks.background_tasks`
+    in order to prevent it from being garbage collected.  The task is also returned
+    from this function call.
+
+    Consider keeping `begin_retry_sagas_loop` running with a long interval to pick up
+    sagas that the scheduler doesn't know about.
+
+    Args:
+        max_concurrency:
+            The maximum number of sagas to retry concurrently.  Defaults to
+            `get_saga_retry_concurrency`.  A saga that is already being retried is
+            not retried again concurrently.
+
+    Returns:
+        A reference to the background task that is created.
+
+    Raises:
+        SagaRepositoryMissingError:
+            Saga repository is not registered.
+    """
+    saga_repository_instance()
+    semaphore = Semaphore(
+        max(
+            1,
+            (
+                get_saga_retry_concurrency()
+                if max_concurrency == None
+                else max_concurrency
+            ),
+        )
+    )
+    retry_tasks = set()
+
+    async def retry(saga_id: any):
+        if saga_id in _sagas_in_flight:
+            return
+        await semaphore.acquire()
+        _sagas_in_flight.add(saga_id)
+        retry_task = create_task(_retry_saga_in_pool(saga_id, semaphore))
+        retry_tasks.add(retry_task)
+        retry_task.add_done_callback(retry_tasks.discard)
+
+    async def _task():
+        try:
+            await saga_retry_scheduler_instance().run(retry)
+        except asyncio.CancelledError as e:
+            log(LogToggles.cancel_retry_saga_loop, "Ended saga retry scheduler.")
+
+    task = create_task(_task())
+    background_tasks.append(task)
+    return task
+
+
 async def retry_saga(saga_id: any):
     """Retries a saga.
 
@@ -126,7 +262,8 @@ async def retry_saga(saga_id: any):
     log(
         LogToggles.saga_retrieved,
         "Retrieved saga",
-        {"saga_id": saga_id, "saga": vars(saga)},
+        lambda: {"saga_id": saga_id, "saga": vars(saga)},
+        lazy=True,
     )
     if saga.is_complete or saga.is_timed_out:
         return
@@ -138,21 +275,34 @@ async def retry_saga(saga_id: any):
             log(
                 LogToggles.saga_duplicate_key,
                 "Concurrent saga execution detected.  This is unlikely and could indicate an issue.",
-                {
+                lambda: {
                     "saga_id": saga_id,
                     "saga_type": str(type(saga)),
                     "saga": vars(saga),
                 },
+                lazy=True,
             )
             return
+        await store_saga_snapshot_if_applicable(saga)
+        saga_retry_scheduler_instance().schedule(saga)
         log(
             LogToggles.saga_committed,
             "Committed saga to saga store.",
-            {"saga_id": saga_id, "saga_type": str(type(saga)), "saga": vars(saga)},
+            lambda: {
+                "saga_id": saga_id,
+                "saga_type": str(type(saga)),
+                "saga": vars(saga),
+            },
+            lazy=True,
         )
     else:
         log(
             LogToggles.saga_nothing_happened,
             "Saga state was not changed.",
-            {"saga_id": saga_id, "saga_type": str(type(saga)), "saga": vars(saga)},
+            lambda: {
+                "saga_id": saga_id,
+                "saga_type": str(type(saga)),
+                "saga": vars(saga),
+            },
+            lazy=True,
         )
@@ -3,8 +3,11 @@ from pyjangle import (
     VersionedEvent,
     LogToggles,
     log,
+    log_vars,
     Saga,
     saga_repository_instance,
+    store_saga_snapshot_if_applicable,
+    saga_retry_scheduler_instance,
     SagaNotFoundError,
 )
 
@@ -42,7 +45,8 @@ async def handle_saga_event(
         log(
             LogToggles.saga_retrieved,
             "Retrieved saga",
-            {"saga_id": saga_id, "saga": vars(saga)},
+            lambda: {"saga_id": saga_id, "saga": vars(saga)},
+            lazy=True,
         )
     else:
         log(
@@ -57,12 +61,13 @@ async def handle_saga_event(
     log(
         LogToggles.apply_event_to_saga,
         "Applied event to saga",
-        {
+        lambda: {
             "saga_id": saga_id,
             "saga_type": str(type(saga)),
             "saga": vars(saga),
-            "event": vars(event),
+            "event": log_vars(event),
         },
+        lazy=True,
     )
     if saga.is_dirty:
         try:
@@ -71,22 +76,35 @@ async def handle_saga_event(
             log(
                 LogToggles.saga_duplicate_key,
                 "Concurrent saga execution detected.  This is unlikely and could indicate an issue.",
-                {
+                lambda: {
                     "saga_id": saga_id,
                     "saga_type": str(type(saga)),
                     "saga": vars(saga),
-                    "event": vars(event),
+                    "event": log_vars(event),
                 },
+                lazy=True,
             )
             return
+        await store_saga_snapshot_if_applicable(saga)
+        saga_retry_scheduler_instance().schedule(saga)
         log(
             LogToggles.saga_committed,
             "Committed saga to saga store.",
-            {"saga_id": saga_id, "saga_type": str(type(saga)), "saga": vars(saga)},
+            lambda: {
+                "saga_id": saga_id,
+                "saga_type": str(type(saga)),
+                "saga": vars(saga),
+            },
+            lazy=True,
         )
     else:
         log(
             LogToggles.saga_nothing_happened,
             "Saga state was not changed.",
-            {"saga_id": saga_id, "saga_type": str(type(saga)), "saga": vars(saga)},
+            lambda: {
+                "saga_id": saga_id,
+                "saga_type": str(type(saga)),
+                "saga": vars(saga),
+            },
+            lazy=True,
         )
@@ -1,7 +1,16 @@
 import abc
 import functools
+from typing import Awaitable, Callable
 
-from pyjangle import LogToggles, log, Saga, JangleError
+from pyjangle import (
+    LogToggles,
+    log,
+    Saga,
+    JangleError,
+    SagaSnapshotError,
+    SnapshottableSaga,
+    VersionedEvent,
+)
 
 # Saga repository singleton.  Access this
 # via saga_repository_instance()
@@ -96,22 +105,175 @@ class SagaRepository(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    async def get_retry_saga_ids(self, batch_size: int) -> list[any]:
+    async def get_retry_saga_ids(
+        self, batch_size: int, after_id: any = None
+    ) -> list[any]:
         """Returns ids for saga's that need to be retried.
 
         If a saga is not completed, or timed out and the retry_at is in the past, the
         saga should be retried.  This methods returns the ids of all sagas meeting
         that criteria.
 
+        Ids are returned in an order that stays the same while a saga remains due, such
+        as by saga id, so that `retry_sagas` can page through them with `after_id`.
+        Implementations written before `after_id` existed still work, but
+        `retry_sagas` pages through them less efficiently.
+
         Args:
             batch_size:
                 The maximum number of sagas to buffer in memory concurrently.
+            after_id:
+                If specified, only ids that come after this saga's id in the order
+                described above are returned.  It is the last id of the previous page,
+                and that saga may have been completed since.
 
         Returns:
             List of saga ids.  Empty list if no sagas meet criteria.
         """
         pass
 
+    async def get_saga_snapshot(self, saga_id: any) -> tuple[int, dict] | None:
+        """Retrieve a saga snapshot by `saga_id`.
+
+        Saga snapshots are optional.  Implement this method along with
+        `store_saga_snapshot` and `delete_saga_snapshot` to support sagas that
+        implement `SnapshottableSaga`.  The default implementation never finds a
+        snapshot.  A snapshot accounts for the first `event_count` events of the saga
+        in the order they were committed, so `get_saga` should use
+        `_reconstitute_saga` to only retrieve the events that came after it.
+
+        Args:
+            saga_id:
+                ID of the saga whose snapshot is retrieved.
+
+        Returns:
+            None if there is no snapshot.  Tuple[event_count, snapshot], otherwise.
+        """
+        return None
+
+    async def store_saga_snapshot(self, saga_id: any, event_count: int, snapshot: dict):
+        """Stores a saga snapshot, replacing any existing snapshot.
+
+        Args:
+            saga_id:
+                ID of the saga to which the snapshot belongs.
+            event_count:
+                Number of the saga's events that are captured by the snapshot.
+            snapshot:
+                The snapshot returned by `SnapshottableSaga.get_saga_snapshot`.
+        """
+        pass
+
+    async def delete_saga_snapshot(self, saga_id: any):
+        """Deletes a saga snapshot.
+
+        Called when a snapshot can no longer be applied to its saga, typically because
+        the saga's code has changed.
+
+        Args:
+            saga_id:
+                ID of the saga whose snapshot is deleted.
+        """
+        pass
+
+    async def _reconstitute_saga(
+        self,
+        saga_type: type[Saga],
+        saga_id: any,
+        get_events: Callable[[int], Awaitable[list[VersionedEvent]]],
+        *args,
+        **kwargs,
+    ) -> Saga:
+        """Instantiates a saga from its snapshot, if any, and its events.
+
+        If `saga_type` is a `SnapshottableSaga` with a snapshot, the snapshot is applied
+        and only the events committed after it are replayed.  If the snapshot can't be
+        applied, it is deleted and the saga is rebuilt from all of its events.
+
+        Args:
+            saga_type:
+                The type of saga to instantiate.
+            saga_id:
+                ID of the saga.
+            get_events:
+                Returns the saga's events in commit order, skipping the number of
+                events that is passed as the argument.
+            *args, **kwargs:
+                Additional arguments passed to the saga's constructor, such as
+                `retry_at` and `timeout_at`.
+        """
+        snapshot_tuple = (
+            await self.get_saga_snapshot(saga_id)
+            if issubclass(saga_type, SnapshottableSaga)
+            else None
+        )
+        if snapshot_tuple:
+            event_count, snapshot = snapshot_tuple
+            saga = saga_type(saga_id, [], *args, **kwargs)
+            try:
+                saga.apply_snapshot(event_count, snapshot)
+                log(
+                    LogToggles.snapshot_applied,
+                    "Saga snapshot applied",
+                    {"saga_id": saga_id, "event_count": event_count},
+                )
+                saga._apply_historical_events(await get_events(event_count))
+                return saga
+            except SagaSnapshotError as e:
+                # A code change in the saga probably caused this snapshot to become
+                # outdated.  The snapshot will be deleted.
+                log(
+                    LogToggles.snapshot_application_failed,
+                    "Saga snapshot application failed",
+                    {"saga_id": saga_id, "saga_type": str(saga_type)},
+                    exc_info=e,
+                )
+                await self.delete_saga_snapshot(saga_id)
+        return saga_type(saga_id, await get_events(0), *args, **kwargs)
+
+
+async def store_saga_snapshot_if_applicable(saga: Saga):
+    """Stores a snapshot of a saga that was just committed, if applicable.
+
+    A snapshot is stored when `saga` is a `SnapshottableSaga` and the commit caused its
+    event count to reach or pass a multiple of its snapshot frequency.  A snapshot is
+    only an optimization and the saga is already committed, so an error while storing
+    it is logged rather than raised.
+
+    Args:
+        saga:
+            A saga that was committed to the saga repository.
+    """
+    if not isinstance(saga, SnapshottableSaga):
+        return
+    frequency = saga.get_snapshot_frequency()
+    if frequency <= 0:
+        return
+    previous_event_count = saga.event_count - len(saga.new_events)
+    if saga.event_count // frequency == previous_event_count // frequency:
+        return
+    try:
+        await saga_repository_instance().store_saga_snapshot(
+            saga.saga_id, saga.event_count, saga.get_saga_snapshot()
+        )
+    except Exception as e:
+        log(
+            LogToggles.snapshot_write_failed,
+            "Failed to write saga snapshot",
+            {"saga_id": saga.saga_id, "saga_type": str(type(saga))},
+            exc_info=e,
+        )
+        return
+    log(
+        LogToggles.snapshot_taken,
+        "Saga snapshot taken",
+        {
+            "saga_id": saga.saga_id,
+            "saga_type": str(type(saga)),
+            "event_count": saga.event_count,
+        },
+    )
+
 
 def saga_repository_instance() -> SagaRepository:
     """Retrieve singleton instance of saga repository."""
@@ -0,0 +1,135 @@
+from asyncio import Event, TimeoutError, wait_for
+from datetime import datetime
+import heapq
+from typing import Awaitable, Callable
+
+from pyjangle import LogToggles, log, Saga
+
+
+class SagaRetryScheduler:
+    """Retries sagas at their deadlines rather than on the next poll.
+
+    `begin_retry_sagas_loop` polls the saga repository for sagas that need to be
+    retried, so a saga waits up to a full retry interval after its `retry_at` has
+    passed.  The scheduler instead keeps a min-heap of the `retry_at` and `timeout_at`
+    deadlines of sagas committed by the current process and retries each saga as soon
+    as its earliest deadline is reached.  Retrying a saga after its `timeout_at` is what
+    marks it as timed out.
+
+    Sagas are added to the scheduler when they are committed by `handle_saga_event` or
+    `retry_saga`, but only while the scheduler is running--see
+    `begin_saga_retry_scheduler`.  Sagas committed by other processes, or before the
+    scheduler started, are unknown to the scheduler, so a polling loop with a long
+    interval is still useful as a safety net.
+
+    Rescheduling a saga doesn't remove its previous deadline from the heap.  Instead,
+    stale entries are skipped when they reach the top of the heap.
+    """
+
+    def __init__(self):
+        # Entries are (deadline, sequence_number, saga_id) tuples.
+        self._heap: list[tuple[datetime, int, any]] = []
+        # Sequence number of the current heap entry of each scheduled saga.
+        self._sequence_numbers: dict[any, int] = dict()
+        self._next_sequence_number = 0
+        self._wakeup = Event()
+        self._is_running = False
+
+    @property
+    def is_running(self) -> bool:
+        "True while `run` is executing."
+        return self._is_running
+
+    def schedule(self, saga: Saga):
+        """Schedules a saga to be retried at its earliest deadline.
+
+        Completed and timed out sagas, and sagas without a deadline, are removed from the
+        schedule.  Does nothing if the scheduler isn't running.
+        """
+        if not self._is_running:
+            return
+        deadlines = [d for d in (saga.retry_at, saga.timeout_at) if d != None]
+        if saga.is_complete or saga.is_timed_out or not deadlines:
+            self.unschedule(saga.saga_id)
+            return
+        sequence_number = self._next_sequence_number
+        self._next_sequence_number += 1
+        self._sequence_numbers[saga.saga_id] = sequence_number
+        heapq.heappush(self._heap, (min(deadlines), sequence_number, saga.saga_id))
+        self._compact_if_needed()
+        self._wakeup.set()
+
+    def unschedule(self, saga_id: any):
+        "Removes a saga from the schedule."
+        self._sequence_numbers.pop(saga_id, None)
+
+    def __len__(self):
+        return len(self._sequence_numbers)
+
+    async def run(self, retry: Callable[[any], Awaitable]):
+        """Calls `retry` with the ID of each saga whose deadline is reached.
+
+        Runs until cancelled.  `retry` should return promptly, for example by starting a
+        task, since sagas that are due at the same time are passed to it one after the
+        other.
+        """
+        self._is_running = True
+        try:
+            while True:
+                self._wakeup.clear()
+                for saga_id in self._pop_due_saga_ids():
+                    await retry(saga_id)
+                timeout = self._seconds_until_next_deadline()
+                if timeout == None or timeout > 0:
+                    try:
+                        await wait_for(self._wakeup.wait(), timeout)
+                    except TimeoutError:
+                        pass
+        finally:
+            self._is_running = False
+            self._heap.clear()
+            self._sequence_numbers.clear()
+
+    def _pop_due_saga_ids(self) -> list[any]:
+        current_time = datetime.now()
+        due_saga_ids = []
+        while self._heap and self._heap[0][0] <= current_time:
+            _, sequence_number, saga_id = heapq.heappop(self._heap)
+            if self._sequence_numbers.get(saga_id) == sequence_number:
+                del self._sequence_numbers[saga_id]
+                due_saga_ids.append(saga_id)
+        if due_saga_ids:
+            log(
+                LogToggles.retrying_sagas,
+                "Saga retry deadlines reached",
+                {"saga_count": len(due_saga_ids)},
+            )
+        return due_saga_ids
+
+    def _seconds_until_next_deadline(self) -> float | None:
+        while self._heap:
+            deadline, sequence_number, saga_id = self._heap[0]
+            if self._sequence_numbers.get(saga_id) == sequence_number:
+                return (deadline - datetime.now()).total_seconds()
+            heapq.heappop(self._heap)
+        return None
+
+    def _compact_if_needed(self):
+        "Removes stale entries once they make up most of the heap."
+        if len(self._heap) > 2 * len(self._sequence_numbers) + 64:
+            self._heap = [
+                entry
+                for entry in self._heap
+                if self._sequence_numbers.get(entry[2]) == entry[1]
+            ]
+            heapq.heapify(self._heap)
+
+
+# Singleton instance of the saga retry scheduler.
+# Access via saga_retry_scheduler_instance().
+_saga_retry_scheduler = SagaRetryScheduler()
+
+
+def saga_retry_scheduler_instance() -> SagaRetryScheduler:
+    "Returns the singleton instance of the saga retry scheduler."
+    return _saga_retry_scheduler
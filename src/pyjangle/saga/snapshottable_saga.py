@@ -0,0 +1,67 @@
+import abc
+
+from pyjangle import JangleError
+
+
+class SagaSnapshotError(JangleError):
+    "An error occurred while applying a saga snapshot."
+    pass
+
+
+class SnapshottableSaga(metaclass=abc.ABCMeta):
+    """Interface for a saga that can be snapshotted.
+
+    Long-running sagas, especially those that are retried many times, can accumulate
+    many state-change events.  A saga snapshot captures the saga's `flags` along with
+    the state returned by `get_snapshot` after a certain number of events.  When the
+    saga is retrieved from the saga repository, the snapshot is applied and only the
+    events committed after the snapshot are replayed.  Snapshots are taken whenever a
+    commit causes the saga's event count to reach or pass a multiple of
+    `get_snapshot_frequency`.
+
+    Saga snapshots rely on the saga repository returning a saga's events in the order
+    they were committed.  See `SagaRepository.get_saga_snapshot`.
+    """
+
+    @abc.abstractmethod
+    def apply_snapshot_hook(self, snapshot):
+        """Updates the saga state based on snapshot."""
+        pass
+
+    @abc.abstractmethod
+    def get_snapshot(self) -> any:
+        """Retrieves the current state, excluding flags, in the form of a snapshot."""
+        pass
+
+    @abc.abstractmethod
+    def get_snapshot_frequency(self) -> int:
+        """Represents the frequency at which snapshots are taken.
+
+        A snapshot is taken when a commit's events carry the saga's event count past a
+        multiple of the frequency, i.e. when
+        `event_count // frequency != (event_count - new_event_count) // frequency`.
+        A commit that adds several events therefore still triggers a snapshot even if
+        it skips over the multiple.  Return 0 to disable snapshots."""
+        pass
+
+    def get_saga_snapshot(self) -> dict:
+        """Returns the snapshot that is stored in the saga repository.
+
+        The snapshot is the saga's `flags` alongside the result of `get_snapshot`."""
+        return {"flags": set(self.flags), "state": self.get_snapshot()}
+
+    def apply_snapshot(self, event_count: int, saga_snapshot: dict):
+        """Applies a snapshot taken with `get_saga_snapshot` to a saga.
+
+        Implement apply_snapshot_hook to customize this method's behavior.
+
+        Raises:
+            SagaSnapshotError:
+                An error occurred while applying a saga snapshot.
+        """
+        try:
+            self.apply_snapshot_hook(saga_snapshot["state"])
+            self.flags = set(saga_snapshot["flags"])
+            self.event_count = event_count
+        except Exception as e:
+            raise SagaSnapshotError(e) from e
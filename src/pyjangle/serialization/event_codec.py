@@ -0,0 +1,455 @@
+"""Compact binary encoding of events, compiled per event type.
+
+Serializers registered with `register_serializer` are typically generic: they turn an
+event into a dictionary and encode it as JSON, and the matching deserializer has to
+guess which strings are really `datetime` or `Decimal` values.  `EventCodec` instead
+inspects the dataclass fields of each event registered with `RegisterEvent` once, and
+uses their type annotations to pick an encoder for each field.
+
+Encoded events look like this (little-endian):
+
+    format version  (1 byte)
+    event type tag  (4 bytes, crc32 of the name registered with `RegisterEvent`)
+    field count     (2 bytes)
+    fields          (1 byte value kind followed by the value, in field order)
+
+Because the tag is derived from the event's registered name, it is stable across
+processes without any coordination, and the name doesn't need to be stored alongside
+the event.  Fields are stored by position rather than by name, so new fields must be
+added to the end of an event (with a default value) to be able to decode events that
+were encoded before the field was added.
+
+`to_json_dict` and `from_json_dict` convert between events and the dictionaries
+produced by the JSON serializers used so far, with `datetime`, `Decimal`, and `UUID`
+values as strings.  Use them to migrate stored events from JSON to the binary encoding:
+
+    codec = event_codec_instance()
+    event = codec.from_json_dict(event_name, json.loads(serialized_event))
+    encoded_event = codec.encode(event)
+
+Usage Example:
+
+    encoded = event_codec_instance().encode(event)
+    event = event_codec_instance().decode(encoded)
+"""
+
+import dataclasses
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import struct
+import types
+import typing
+from typing import Callable
+from uuid import UUID
+from zlib import crc32
+
+from pyjangle import Event, JangleError, get_event_name, get_event_names, get_event_type
+
+_FORMAT_VERSION = 1
+
+# Value kinds.  Every encoded value starts with one of these.
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_BIG_INT = 4
+_FLOAT = 5
+_STR = 6
+_BYTES = 7
+_DECIMAL = 8
+_DATETIME = 9
+_DATETIME_WITH_OFFSET = 10
+_UUID = 11
+_LIST = 12
+_DICT = 13
+
+_HEADER = struct.Struct("<BIH")
+_KIND = struct.Struct("<B")
+_KIND_AND_INT = struct.Struct("<Bq")
+_KIND_AND_FLOAT = struct.Struct("<Bd")
+_KIND_AND_LENGTH = struct.Struct("<BI")
+_KIND_AND_DATETIME_WITH_OFFSET = struct.Struct("<Bqq")
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+_TWO_INT64 = struct.Struct("<qq")
+
+_MIN_INT = -(2**63)
+_MAX_INT = 2**63 - 1
+_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class EventCodecError(JangleError):
+    "An event could not be encoded or decoded."
+    pass
+
+
+def _encode_none(out: bytearray, value):
+    out += _KIND.pack(_NONE)
+
+
+def _encode_bool(out: bytearray, value: bool):
+    out += _KIND.pack(_TRUE if value else _FALSE)
+
+
+def _encode_int(out: bytearray, value: int):
+    if _MIN_INT <= value <= _MAX_INT:
+        out += _KIND_AND_INT.pack(_INT, value)
+    else:
+        _encode_text(out, _BIG_INT, str(value))
+
+
+def _encode_float(out: bytearray, value: float):
+    out += _KIND_AND_FLOAT.pack(_FLOAT, value)
+
+
+def _encode_text(out: bytearray, kind: int, value: str):
+    encoded = value.encode()
+    out += _KIND_AND_LENGTH.pack(kind, len(encoded))
+    out += encoded
+
+
+def _encode_str(out: bytearray, value: str):
+    _encode_text(out, _STR, value)
+
+
+def _encode_bytes(out: bytearray, value: bytes):
+    out += _KIND_AND_LENGTH.pack(_BYTES, len(value))
+    out += value
+
+
+def _encode_decimal(out: bytearray, value: Decimal):
+    _encode_text(out, _DECIMAL, str(value))
+
+
+def _encode_datetime(out: bytearray, value: datetime):
+    offset = value.utcoffset()
+    if offset == None:
+        out += _KIND_AND_INT.pack(_DATETIME, (value - _EPOCH) // _MICROSECOND)
+    else:
+        out += _KIND_AND_DATETIME_WITH_OFFSET.pack(
+            _DATETIME_WITH_OFFSET,
+            (value - _UTC_EPOCH) // _MICROSECOND,
+            offset // _MICROSECOND,
+        )
+
+
+def _encode_uuid(out: bytearray, value: UUID):
+    out += _KIND.pack(_UUID)
+    out += value.bytes
+
+
+def _encode_list(out: bytearray, value: list | tuple):
+    out += _KIND_AND_LENGTH.pack(_LIST, len(value))
+    for item in value:
+        _encode_value(out, item)
+
+
+def _encode_dict(out: bytearray, value: dict):
+    out += _KIND_AND_LENGTH.pack(_DICT, len(value))
+    for key, item in value.items():
+        _encode_value(out, key)
+        _encode_value(out, item)
+
+
+_ENCODERS: dict[type, Callable[[bytearray, any], None]] = {
+    type(None): _encode_none,
+    bool: _encode_bool,
+    int: _encode_int,
+    float: _encode_float,
+    str: _encode_str,
+    bytes: _encode_bytes,
+    Decimal: _encode_decimal,
+    datetime: _encode_datetime,
+    UUID: _encode_uuid,
+    list: _encode_list,
+    tuple: _encode_list,
+    dict: _encode_dict,
+}
+
+
+def _encode_value(out: bytearray, value):
+    "Encodes a value whose type is only known at runtime."
+    encoder = _ENCODERS.get(type(value))
+    if encoder == None:
+        # Subclasses, e.g. of `str` or `int`, are encoded as their base type.
+        for base_type, base_encoder in _ENCODERS.items():
+            if isinstance(value, base_type):
+                encoder = base_encoder
+                break
+        else:
+            raise EventCodecError(f"Can't encode value of type {str(type(value))}")
+    encoder(out, value)
+
+
+def _decode_value(data: memoryview, offset: int) -> tuple[any, int]:
+    "Returns the value at `offset` and the offset of the next value."
+    kind = data[offset]
+    offset += 1
+    if kind == _INT:
+        return _INT64.unpack_from(data, offset)[0], offset + 8
+    if kind == _STR:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        return str(data[offset : offset + length], "utf-8"), offset + length
+    if kind == _DATETIME:
+        (microseconds,) = _INT64.unpack_from(data, offset)
+        return _EPOCH + timedelta(microseconds=microseconds), offset + 8
+    if kind == _UUID:
+        return UUID(bytes=bytes(data[offset : offset + 16])), offset + 16
+    if kind == _NONE:
+        return None, offset
+    if kind == _FALSE or kind == _TRUE:
+        return kind == _TRUE, offset
+    if kind == _FLOAT:
+        return _FLOAT64.unpack_from(data, offset)[0], offset + 8
+    if kind == _DECIMAL or kind == _BIG_INT or kind == _BYTES:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        value = bytes(data[offset : offset + length])
+        offset += length
+        if kind == _DECIMAL:
+            return Decimal(value.decode()), offset
+        if kind == _BIG_INT:
+            return int(value), offset
+        return value, offset
+    if kind == _DATETIME_WITH_OFFSET:
+        utc_microseconds, offset_microseconds = _TWO_INT64.unpack_from(data, offset)
+        value = (_UTC_EPOCH + timedelta(microseconds=utc_microseconds)).astimezone(
+            timezone(timedelta(microseconds=offset_microseconds))
+        )
+        return value, offset + 16
+    if kind == _LIST:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        items = []
+        for _ in range(length):
+            item, offset = _decode_value(data, offset)
+            items.append(item)
+        return items, offset
+    if kind == _DICT:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        items = dict()
+        for _ in range(length):
+            key, offset = _decode_value(data, offset)
+            items[key], offset = _decode_value(data, offset)
+        return items, offset
+    raise EventCodecError(f"Unknown value kind: {kind}")
+
+
+def _field_encoder(field_type: type) -> Callable[[bytearray, any], None]:
+    "Returns an encoder specialized for values of `field_type`."
+    encoder = _ENCODERS.get(field_type)
+    if encoder == None:
+        return _encode_value
+
+    def encode_field(out: bytearray, value):
+        # The annotation is only a hint, so fall back to inspecting the value.
+        if type(value) is field_type:
+            encoder(out, value)
+        else:
+            _encode_value(out, value)
+
+    return encode_field
+
+
+def _field_from_json(field_type: type) -> Callable[[any], any] | None:
+    "Returns a function converting a JSON value to `field_type`, if one is needed."
+    if field_type == datetime:
+        return datetime.fromisoformat
+    if field_type == Decimal:
+        return Decimal
+    if field_type == UUID:
+        return UUID
+    return None
+
+
+def _to_json(value):
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    return value
+
+
+def _unwrap_optional(field_type):
+    "Returns X for annotations like `X | None` and `Optional[X]`."
+    if typing.get_origin(field_type) in (typing.Union, types.UnionType):
+        arguments = [a for a in typing.get_args(field_type) if a is not type(None)]
+        if len(arguments) == 1:
+            return arguments[0]
+    return field_type
+
+
+class _CompiledEventType:
+    "Encoders and decoders for one event type."
+
+    __slots__ = ("event_type", "tag", "field_names", "encoders", "from_json")
+
+    def __init__(self, event_type: type, tag: int):
+        self.event_type = event_type
+        self.tag = tag
+        try:
+            hints = typing.get_type_hints(event_type)
+        except Exception:
+            # Unresolvable annotations only cost the fast paths.
+            hints = dict()
+        fields = [f for f in dataclasses.fields(event_type) if f.init]
+        field_types = [_unwrap_optional(hints.get(f.name)) for f in fields]
+        self.field_names = tuple(f.name for f in fields)
+        self.encoders = tuple(_field_encoder(t) for t in field_types)
+        self.from_json = {
+            name: converter
+            for name, converter in zip(
+                self.field_names, (_field_from_json(t) for t in field_types)
+            )
+            if converter != None
+        }
+
+
+class EventCodec:
+    """Encodes events into a compact binary format and decodes them.
+
+    See the module documentation for a description of the format.  Each event type is
+    compiled the first time it is encoded or decoded.  Events must be dataclasses
+    registered with `RegisterEvent`.
+    """
+
+    def __init__(self):
+        self._compiled_by_type: dict[type, _CompiledEventType] = dict()
+        self._compiled_by_tag: dict[int, _CompiledEventType] = dict()
+
+    def encode(self, event: Event) -> bytes:
+        """Encodes an event.
+
+        Raises:
+            EventCodecError:
+                The event contains a value that can't be encoded, or its type isn't
+                registered with `RegisterEvent`.
+        """
+        compiled = self._compiled_by_type.get(type(event))
+        if compiled == None:
+            compiled = self._compile(type(event))
+        out = bytearray(
+            _HEADER.pack(_FORMAT_VERSION, compiled.tag, len(compiled.encoders))
+        )
+        for name, encoder in zip(compiled.field_names, compiled.encoders):
+            encoder(out, getattr(event, name))
+        return bytes(out)
+
+    def decode(self, data: bytes) -> Event:
+        """Decodes an event encoded with `encode`.
+
+        Raises:
+            EventCodecError:
+                The data is not an encoded event, or the event's type isn't registered
+                with `RegisterEvent`.
+        """
+        data = memoryview(data)
+        try:
+            format_version, tag, field_count = _HEADER.unpack_from(data)
+        except struct.error as e:
+            raise EventCodecError("Data is too short to be an encoded event") from e
+        if format_version != _FORMAT_VERSION:
+            raise EventCodecError(f"Unknown format version: {format_version}")
+        compiled = self._compiled_by_tag.get(tag)
+        if compiled == None:
+            compiled = self._compile_tag(tag)
+        if field_count > len(compiled.field_names):
+            raise EventCodecError(
+                f"Encoded {str(compiled.event_type)} has {field_count} fields but only "
+                f"{len(compiled.field_names)} are defined"
+            )
+        values = dict()
+        offset = _HEADER.size
+        try:
+            for name in compiled.field_names[:field_count]:
+                values[name], offset = _decode_value(data, offset)
+        except (struct.error, IndexError, ValueError) as e:
+            raise EventCodecError("Encoded event is truncated") from e
+        if offset > len(data):
+            raise EventCodecError("Encoded event is truncated")
+        return compiled.event_type(**values)
+
+    def to_json_dict(self, event: Event) -> dict:
+        """Converts an event to a JSON-compatible dictionary.
+
+        `datetime` values are converted to ISO format strings, and `Decimal` and `UUID`
+        values to strings, matching the JSON serializers used with
+        `register_serializer`.
+        """
+        return {
+            field.name: _to_json(getattr(event, field.name))
+            for field in dataclasses.fields(event)
+        }
+
+    def from_json_dict(self, event_type: type | str, data: dict) -> Event:
+        """Creates an event from a dictionary produced by `to_json_dict`.
+
+        Unlike a generic JSON decoder, string values are converted based on the type
+        annotations of the event's fields rather than their names.
+
+        Args:
+            event_type:
+                The event type, or the name it was registered with.
+            data:
+                Dictionary produced by `to_json_dict`, or by a JSON serializer.
+        """
+        if isinstance(event_type, str):
+            event_type = get_event_type(event_type)
+        compiled = self._compiled_by_type.get(event_type)
+        if compiled == None:
+            compiled = self._compile(event_type)
+        values = dict(data)
+        for name, converter in compiled.from_json.items():
+            value = values.get(name)
+            if isinstance(value, str):
+                values[name] = converter(value)
+        return event_type(**values)
+
+    def _compile(self, event_type: type) -> _CompiledEventType:
+        try:
+            name = get_event_name(event_type)
+        except KeyError as e:
+            raise EventCodecError(
+                f"{str(event_type)} is not registered with @RegisterEvent"
+            ) from e
+        tag = crc32(name.encode())
+        existing = self._compiled_by_tag.get(tag)
+        if existing != None and existing.event_type != event_type:
+            raise EventCodecError(
+                f"{str(event_type)} and {str(existing.event_type)} have the same tag.  "
+                "Register one of them with a different name."
+            )
+        compiled = _CompiledEventType(event_type, tag)
+        self._compiled_by_type[event_type] = compiled
+        self._compiled_by_tag[tag] = compiled
+        return compiled
+
+    def _compile_tag(self, tag: int) -> _CompiledEventType:
+        "Compiles the registered event types that haven't been compiled yet."
+        for name in get_event_names():
+            event_type = get_event_type(name)
+            if event_type not in self._compiled_by_type:
+                self._compile(event_type)
+        compiled = self._compiled_by_tag.get(tag)
+        if compiled == None:
+            raise EventCodecError(f"No registered event has tag {tag}")
+        return compiled
+
+
+# Singleton instance of the event codec.
+# Access via event_codec_instance().
+_event_codec = EventCodec()
+
+
+def event_codec_instance() -> EventCodec:
+    "Returns the singleton instance of the event codec."
+    return _event_codec
@@ -64,6 +64,21 @@ def set_saga_retry_interval(seconds: int):
     _saga_retry_interval = seconds
 
 
+# Maximum number of sagas that are retried concurrently by `retry_sagas`.
+_saga_retry_concurrency = _get_integer_env_var("SAGA_RETRY_CONCURRENCY", "1")
+
+
+def get_saga_retry_concurrency():
+    "Gets the maximum number of sagas that are retried concurrently."
+    return _saga_retry_concurrency
+
+
+def set_saga_retry_concurrency(concurrency: int):
+    "Sets the maximum number of sagas that are retried concurrently."
+    global _saga_retry_concurrency
+    _saga_retry_concurrency = concurrency
+
+
 # Name of the environment variable used to specify the failed events retry interval.
 _failed_events_retry_interval = _get_integer_env_var(
     "FAILED_EVENTS_RETRY_INTERVAL", "30"
@@ -95,3 +110,247 @@ def set_failed_events_max_age(max_age: int):
     "Sets the maximum age of an unhandeled event that isn't considered failed."
     global _failed_events_max_age
     _failed_events_max_age = max_age
+
+
+# Maximum number of failed events that are redispatched concurrently by
+# `retry_failed_events`.
+_failed_events_retry_concurrency = _get_integer_env_var(
+    "FAILED_EVENTS_RETRY_CONCURRENCY", "1"
+)
+
+
+def get_failed_events_retry_concurrency():
+    "Gets the maximum number of failed events that are retried concurrently."
+    return _failed_events_retry_concurrency
+
+
+def set_failed_events_retry_concurrency(concurrency: int):
+    "Sets the maximum number of failed events that are retried concurrently."
+    global _failed_events_retry_concurrency
+    _failed_events_retry_concurrency = concurrency
+
+
+# Maximum number of failed events retried by a single call to `retry_failed_events`.  A
+# value of 0 is unlimited.
+_failed_events_max_retries_per_pass = _get_integer_env_var(
+    "FAILED_EVENTS_MAX_RETRIES_PER_PASS", "0"
+)
+
+
+def get_failed_events_max_retries_per_pass():
+    "Gets the maximum number of failed events retried per pass.  0 is unlimited."
+    return _failed_events_max_retries_per_pass
+
+
+def set_failed_events_max_retries_per_pass(max_events: int):
+    "Sets the maximum number of failed events retried per pass.  0 is unlimited."
+    global _failed_events_max_retries_per_pass
+    _failed_events_max_retries_per_pass = max_events
+
+
+# Maximum number of failed events retried per second so that a large backlog of failed
+# events doesn't starve newly committed events.  A value of 0 is unlimited.
+_failed_events_max_retries_per_second = _get_integer_env_var(
+    "FAILED_EVENTS_MAX_RETRIES_PER_SECOND", "0"
+)
+
+
+def get_failed_events_max_retries_per_second():
+    "Gets the maximum number of failed events retried per second.  0 is unlimited."
+    return _failed_events_max_retries_per_second
+
+
+def set_failed_events_max_retries_per_second(rate: float):
+    "Sets the maximum number of failed events retried per second.  0 is unlimited."
+    global _failed_events_max_retries_per_second
+    _failed_events_max_retries_per_second = rate
+
+
+# Maximum number of fully reconstituted aggregates that `handle_command` keeps in
+# memory between commands.  A value of 0 disables the aggregate cache.
+_aggregate_cache_size = _get_integer_env_var("AGGREGATE_CACHE_SIZE", "0")
+
+
+def get_aggregate_cache_size():
+    "Gets the maximum number of aggregates held in the aggregate cache."
+    return _aggregate_cache_size
+
+
+def set_aggregate_cache_size(size: int):
+    "Sets the maximum number of aggregates held in the aggregate cache."
+    global _aggregate_cache_size
+    _aggregate_cache_size = size
+
+
+# When set to a non-zero value, `handle_command` processes commands that target the
+# same aggregate one at a time.  Commands targeting different aggregates still run
+# concurrently.
+_serialize_commands_by_aggregate = _get_integer_env_var(
+    "SERIALIZE_COMMANDS_BY_AGGREGATE", "0"
+)
+
+
+def get_serialize_commands_by_aggregate() -> bool:
+    "Gets whether commands targeting the same aggregate are processed one at a time."
+    return bool(_serialize_commands_by_aggregate)
+
+
+def set_serialize_commands_by_aggregate(enabled: bool):
+    "Sets whether commands targeting the same aggregate are processed one at a time."
+    global _serialize_commands_by_aggregate
+    _serialize_commands_by_aggregate = enabled
+
+
+# Number of concurrent workers that dispatch committed events.  Increase this value
+# when event handlers are I/O bound so that one slow handler doesn't hold up the rest.
+_event_dispatch_worker_count = _get_integer_env_var("EVENT_DISPATCH_WORKER_COUNT", "1")
+
+
+def get_event_dispatch_worker_count():
+    "Gets the number of workers that concurrently dispatch committed events."
+    return _event_dispatch_worker_count
+
+
+def set_event_dispatch_worker_count(count: int):
+    "Sets the number of workers that concurrently dispatch committed events."
+    global _event_dispatch_worker_count
+    _event_dispatch_worker_count = count
+
+
+# When set to a non-zero value, events committed by the same aggregate are dispatched
+# one at a time in the order they were committed, even when there are multiple event
+# dispatch workers.
+_order_event_dispatch_by_aggregate = _get_integer_env_var(
+    "ORDER_EVENT_DISPATCH_BY_AGGREGATE", "1"
+)
+
+
+def get_order_event_dispatch_by_aggregate() -> bool:
+    "Gets whether an aggregate's events are dispatched in the order they were committed."
+    return bool(_order_event_dispatch_by_aggregate)
+
+
+def set_order_event_dispatch_by_aggregate(enabled: bool):
+    "Sets whether an aggregate's events are dispatched in the order they were committed."
+    global _order_event_dispatch_by_aggregate
+    _order_event_dispatch_by_aggregate = enabled
+
+
+# Maximum number of events passed to a batch event dispatcher at once.  See
+# `register_batch_event_dispatcher`.
+_event_dispatch_batch_size = _get_integer_env_var("EVENT_DISPATCH_BATCH_SIZE", "100")
+
+
+def get_event_dispatch_batch_size():
+    "Gets the maximum number of events passed to a batch event dispatcher at once."
+    return _event_dispatch_batch_size
+
+
+def set_event_dispatch_batch_size(size: int):
+    "Sets the maximum number of events passed to a batch event dispatcher at once."
+    global _event_dispatch_batch_size
+    _event_dispatch_batch_size = size
+
+
+# Maximum time to wait for a batch of events to fill before it is passed to a batch
+# event dispatcher.  With the default of 0, a batch contains whichever events are
+# already queued.
+_event_dispatch_batch_linger_milliseconds = _get_integer_env_var(
+    "EVENT_DISPATCH_BATCH_LINGER_MILLISECONDS", "0"
+)
+
+
+def get_event_dispatch_batch_linger_milliseconds():
+    "Gets the maximum time to wait for a batch of events to fill."
+    return _event_dispatch_batch_linger_milliseconds
+
+
+def set_event_dispatch_batch_linger_milliseconds(milliseconds: int):
+    "Sets the maximum time to wait for a batch of events to fill."
+    global _event_dispatch_batch_linger_milliseconds
+    _event_dispatch_batch_linger_milliseconds = milliseconds
+
+
+# When set to a non-zero value, `handle_command` retrieves a snapshottable aggregate's
+# snapshot and the events after the snapshot it last saw concurrently instead of one
+# after the other.
+_prefetch_events_with_snapshot = _get_integer_env_var(
+    "PREFETCH_EVENTS_WITH_SNAPSHOT", "0"
+)
+
+
+def get_prefetch_events_with_snapshot() -> bool:
+    "Gets whether snapshots and events are retrieved concurrently."
+    return bool(_prefetch_events_with_snapshot)
+
+
+def set_prefetch_events_with_snapshot(enabled: bool):
+    "Sets whether snapshots and events are retrieved concurrently."
+    global _prefetch_events_with_snapshot
+    _prefetch_events_with_snapshot = enabled
+
+
+# Identifies the current process to `SnowflakeEventIdFactory`.  Every process that
+# creates events must use a different node id between 0 and 1023.
+_event_id_node_id = _get_integer_env_var("EVENT_ID_NODE_ID", "0")
+
+
+def get_event_id_node_id():
+    "Gets the node id embedded in ids created by `SnowflakeEventIdFactory`."
+    return _event_id_node_id
+
+
+def set_event_id_node_id(node_id: int):
+    "Sets the node id embedded in ids created by `SnowflakeEventIdFactory`."
+    global _event_id_node_id
+    _event_id_node_id = node_id
+
+
+# Maximum number of aggregates with a snapshot waiting to be written by the
+# `SnapshotWriter`.  Commands that take a snapshot wait for space once it's reached.
+_snapshot_write_queue_size = _get_integer_env_var("SNAPSHOT_WRITE_QUEUE_SIZE", "1000")
+
+
+def get_snapshot_write_queue_size():
+    "Gets the maximum number of snapshots waiting to be written in the background."
+    return _snapshot_write_queue_size
+
+
+def set_snapshot_write_queue_size(size: int):
+    "Sets the maximum number of snapshots waiting to be written in the background."
+    global _snapshot_write_queue_size
+    _snapshot_write_queue_size = size
+
+
+# Maximum approximate size in bytes of the snapshots held by a
+# `CachedSnapshotRepository`.
+_snapshot_cache_max_bytes = _get_integer_env_var("SNAPSHOT_CACHE_MAX_BYTES", "67108864")
+
+
+def get_snapshot_cache_max_bytes():
+    "Gets the maximum approximate size of the snapshots in the snapshot cache."
+    return _snapshot_cache_max_bytes
+
+
+def set_snapshot_cache_max_bytes(max_bytes: int):
+    "Sets the maximum approximate size of the snapshots in the snapshot cache."
+    global _snapshot_cache_max_bytes
+    _snapshot_cache_max_bytes = max_bytes
+
+
+# Time for which a `CachedSnapshotRepository` remembers that an aggregate has no
+# snapshot.  0 disables caching the absence of snapshots.
+_snapshot_cache_negative_ttl_milliseconds = _get_integer_env_var(
+    "SNAPSHOT_CACHE_NEGATIVE_TTL_MILLISECONDS", "1000"
+)
+
+
+def get_snapshot_cache_negative_ttl_milliseconds():
+    "Gets the time for which the absence of a snapshot is cached."
+    return _snapshot_cache_negative_ttl_milliseconds
+
+
+def set_snapshot_cache_negative_ttl_milliseconds(milliseconds: int):
+    "Sets the time for which the absence of a snapshot is cached."
+    global _snapshot_cache_negative_ttl_milliseconds
+    _snapshot_cache_negative_ttl_milliseconds = milliseconds
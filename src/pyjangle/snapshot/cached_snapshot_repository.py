@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import copy
+import sys
+import time
+
+from pyjangle import (
+    SnapshotRepository,
+    get_snapshot_cache_max_bytes,
+    get_snapshot_cache_negative_ttl_milliseconds,
+)
+
+# Bytes charged for a cached "no snapshot" result.
+_NEGATIVE_ENTRY_SIZE = 64
+
+
+class _CacheEntry:
+    __slots__ = ("version", "snapshot", "size", "expires_at")
+
+    def __init__(self, version: int, snapshot: any, size: int, expires_at: float):
+        self.version = version
+        self.snapshot = snapshot
+        self.size = size
+        # Monotonic time after which a negative entry is stale.  None for snapshots.
+        self.expires_at = expires_at
+
+
+class CachedSnapshotRepository(SnapshotRepository):
+    """Adds a read-through, in-process cache to a snapshot repository.
+
+    Every command for a `Snapshottable` aggregate that isn't in the `AggregateCache`
+    asks the snapshot repository for a snapshot, even though most aggregates have no
+    snapshot or the same snapshot as last time.  Mix this class in ahead of a snapshot
+    repository to answer those requests from memory:
+
+        @RegisterSnapshotRepository
+        class CachedSqlSnapshotRepository(
+            CachedSnapshotRepository, SqlSnapshotRepository
+        ):
+            pass
+
+    Snapshots retrieved or stored through the repository are cached until they are
+    deleted or evicted.  The absence of a snapshot is also cached, but only for
+    `SNAPSHOT_CACHE_NEGATIVE_TTL_MILLISECONDS` since another process could store one
+    at any time.  A cached snapshot that's older than the stored one is still correct,
+    because the events after it are retrieved from the event store.
+
+    The cache is bounded by the approximate size of the snapshots it holds, see
+    `get_snapshot_size` and `SNAPSHOT_CACHE_MAX_BYTES`, and evicts the least recently
+    used snapshots first.  Snapshots larger than the whole cache aren't cached.
+
+    Attributes:
+        max_bytes:
+            Maximum approximate size of the cached snapshots.  If None, the value of
+            `get_snapshot_cache_max_bytes` is used.
+        negative_ttl_seconds:
+            Time for which the absence of a snapshot is cached.  If None, the value of
+            `get_snapshot_cache_negative_ttl_milliseconds` is used.
+        copy_snapshots:
+            Whether cached snapshots are deep copies of the snapshots that are stored
+            and retrieved.  Set this to False if aggregates never modify the snapshot
+            passed to `apply_snapshot_hook`.
+        hits:
+            Number of calls to `get_snapshot` answered from the cache.
+        misses:
+            Number of calls to `get_snapshot` passed to the underlying repository.
+    """
+
+    max_bytes: int = None
+    negative_ttl_seconds: float = None
+    copy_snapshots: bool = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._snapshot_cache: OrderedDict[any, _CacheEntry] = OrderedDict()
+        self._snapshot_cache_bytes = 0
+        # Incremented by `delete_snapshot` so that a snapshot retrieved while it was
+        # being deleted isn't cached.
+        self._deletions = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cached_bytes(self) -> int:
+        "Approximate size of the cached snapshots."
+        return self._snapshot_cache_bytes
+
+    async def get_snapshot(self, aggregate_id: any) -> tuple[int, any] | None:
+        entry = self._snapshot_cache.get(aggregate_id)
+        if entry != None and (
+            entry.expires_at == None or entry.expires_at > time.monotonic()
+        ):
+            self.hits += 1
+            self._snapshot_cache.move_to_end(aggregate_id)
+            if entry.expires_at != None:
+                return None
+            snapshot = (
+                copy.deepcopy(entry.snapshot) if self.copy_snapshots else entry.snapshot
+            )
+            return (entry.version, snapshot)
+        self.misses += 1
+        deletions = self._deletions
+        result = await super().get_snapshot(aggregate_id)
+        if deletions != self._deletions:
+            return result
+        if result == None:
+            self._cache_absence(aggregate_id)
+        else:
+            self._cache_snapshot(aggregate_id, *result)
+        return result
+
+    async def store_snapshot(self, aggregate_id: any, version: int, snapshot: any):
+        # Evict first in case the write fails after partially succeeding.
+        self._evict(aggregate_id)
+        await super().store_snapshot(aggregate_id, version, snapshot)
+        self._cache_snapshot(aggregate_id, version, snapshot)
+
+    async def store_snapshots(self, snapshots: list[tuple[any, int, any]]):
+        for aggregate_id, _, _ in snapshots:
+            self._evict(aggregate_id)
+        await super().store_snapshots(snapshots)
+        for aggregate_id, version, snapshot in snapshots:
+            self._cache_snapshot(aggregate_id, version, snapshot)
+
+    async def delete_snapshot(self, aggregate_id: any):
+        self._deletions += 1
+        self._evict(aggregate_id)
+        await super().delete_snapshot(aggregate_id)
+
+    def clear_snapshot_cache(self):
+        "Removes every snapshot from the cache."
+        self._snapshot_cache.clear()
+        self._snapshot_cache_bytes = 0
+
+    def get_snapshot_size(self, snapshot: any) -> int:
+        """Returns the approximate number of bytes of memory used by a snapshot.
+
+        The default implementation adds up `sys.getsizeof` of the snapshot and of the
+        objects it contains--items of lists, tuples, sets, and dicts, and attributes of
+        objects.  Override this method for snapshots where that's a poor estimate or
+        too slow to compute, for example, to return the length of a serialized
+        snapshot.
+        """
+        size = 0
+        seen = set()
+        pending = [snapshot]
+        while pending:
+            value = pending.pop()
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            size += sys.getsizeof(value)
+            if isinstance(value, (str, bytes, bytearray, int, float, bool)):
+                continue
+            if isinstance(value, dict):
+                pending.extend(value.keys())
+                pending.extend(value.values())
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                pending.extend(value)
+            elif hasattr(value, "__dict__"):
+                pending.append(vars(value))
+        return size
+
+    def _max_bytes(self) -> int:
+        return (
+            get_snapshot_cache_max_bytes() if self.max_bytes == None else self.max_bytes
+        )
+
+    def _cache_snapshot(self, aggregate_id: any, version: int, snapshot: any):
+        cached = self._snapshot_cache.get(aggregate_id)
+        if cached != None and cached.expires_at == None and cached.version > version:
+            return
+        if self.copy_snapshots:
+            # The caller may still modify its snapshot.
+            snapshot = copy.deepcopy(snapshot)
+        self._put(
+            aggregate_id,
+            _CacheEntry(version, snapshot, self.get_snapshot_size(snapshot), None),
+        )
+
+    def _cache_absence(self, aggregate_id: any):
+        ttl = (
+            get_snapshot_cache_negative_ttl_milliseconds() / 1000
+            if self.negative_ttl_seconds == None
+            else self.negative_ttl_seconds
+        )
+        cached = self._snapshot_cache.get(aggregate_id)
+        if ttl <= 0 or (cached != None and cached.expires_at == None):
+            # A snapshot was stored while the repository was being queried.
+            return
+        self._put(
+            aggregate_id,
+            _CacheEntry(None, None, _NEGATIVE_ENTRY_SIZE, time.monotonic() + ttl),
+        )
+
+    def _put(self, aggregate_id: any, entry: _CacheEntry):
+        self._evict(aggregate_id)
+        max_bytes = self._max_bytes()
+        if entry.size > max_bytes:
+            return
+        self._snapshot_cache[aggregate_id] = entry
+        self._snapshot_cache_bytes += entry.size
+        while self._snapshot_cache_bytes > max_bytes:
+            _, evicted = self._snapshot_cache.popitem(last=False)
+            self._snapshot_cache_bytes -= evicted.size
+
+    def _evict(self, aggregate_id: any):
+        entry = self._snapshot_cache.pop(aggregate_id, None)
+        if entry != None:
+            self._snapshot_cache_bytes -= entry.size
@@ -0,0 +1,159 @@
+import abc
+
+from pyjangle import JangleError, Snapshottable
+
+
+class DuplicateSnapshotPolicyError(JangleError):
+    "Registering multiple snapshot policies is not allowed."
+    pass
+
+
+class SnapshotPolicy(metaclass=abc.ABCMeta):
+    """Decides when the command handler snapshots a `Snapshottable` aggregate.
+
+    After a command's events are committed, `should_snapshot` is called with the number
+    of events the aggregate has accumulated since its most recent snapshot.  If it
+    returns True, a snapshot is taken and stored.  Because that number is what the next
+    command must replay, a policy that returns True whenever it reaches some limit
+    bounds the number of events replayed per command.
+
+    Snapshotting is disabled for aggregates whose `get_snapshot_frequency` is 0
+    regardless of the policy.  Register a policy with `register_snapshot_policy`.  The
+    default is `FixedFrequencySnapshotPolicy`.
+    """
+
+    @abc.abstractmethod
+    def should_snapshot(
+        self, aggregate: Snapshottable, events_since_snapshot: int
+    ) -> bool:
+        """Returns True if a snapshot of the aggregate should be taken.
+
+        Args:
+            aggregate:
+                The aggregate.  Its newly committed events may not be applied yet.
+            events_since_snapshot:
+                Number of versions between the aggregate's most recent snapshot, see
+                `Snapshottable.snapshot_version`, and its current version.
+        """
+        pass
+
+    def record_replay(self, aggregate_type: type, event_count: int, seconds: float):
+        """Observes the cost of reconstituting an aggregate from its events.
+
+        Called each time the command handler applies stored events to a `Snapshottable`
+        aggregate.  The default implementation does nothing.
+
+        Args:
+            aggregate_type:
+                Type of the reconstituted aggregate.
+            event_count:
+                Number of events that were applied.
+            seconds:
+                Time spent retrieving and applying the events.
+        """
+        pass
+
+
+class FixedFrequencySnapshotPolicy(SnapshotPolicy):
+    """Snapshots once `get_snapshot_frequency` events have accrued since the last one.
+
+    A command never replays more than `get_snapshot_frequency` events from its own
+    process's history, even when commands post several events at once.
+    """
+
+    def should_snapshot(
+        self, aggregate: Snapshottable, events_since_snapshot: int
+    ) -> bool:
+        return events_since_snapshot >= aggregate.get_snapshot_frequency()
+
+
+class ReplayCostSnapshotPolicy(SnapshotPolicy):
+    """Snapshots based on the observed cost of replaying each aggregate type's events.
+
+    Cheap aggregates can go longer between snapshots than aggregates whose events are
+    expensive to retrieve or apply.  This policy learns the average time it takes to
+    replay one event of each aggregate type from `record_replay`, and snapshots an
+    aggregate once replaying the events since its last snapshot would take longer than
+    `max_replay_seconds`.  `max_events_replayed`, if given, is a hard limit on the
+    number of events since the last snapshot that applies regardless of the cost.
+    `get_snapshot_frequency` is ignored except that 0 still disables snapshotting.
+
+    Args:
+        max_replay_seconds:
+            Estimated replay time at which a snapshot is taken.
+        max_events_replayed:
+            Number of events since the last snapshot at which a snapshot is always
+            taken.  None for no limit.
+        smoothing:
+            Weight, between 0 and 1, given to each new observation in the
+            exponentially weighted moving average of the time per event.
+    """
+
+    def __init__(
+        self,
+        max_replay_seconds: float = 0.01,
+        max_events_replayed: int = None,
+        smoothing: float = 0.1,
+    ):
+        self.max_replay_seconds = max_replay_seconds
+        self.max_events_replayed = max_events_replayed
+        self.smoothing = smoothing
+        self._seconds_per_event: dict[type, float] = dict()
+
+    def seconds_per_event(self, aggregate_type: type) -> float | None:
+        "Average time to replay one event of `aggregate_type`, or None if unobserved."
+        return self._seconds_per_event.get(aggregate_type)
+
+    def record_replay(self, aggregate_type: type, event_count: int, seconds: float):
+        if event_count <= 0:
+            return
+        observed = seconds / event_count
+        average = self._seconds_per_event.get(aggregate_type)
+        self._seconds_per_event[aggregate_type] = (
+            observed
+            if average == None
+            else average + self.smoothing * (observed - average)
+        )
+
+    def should_snapshot(
+        self, aggregate: Snapshottable, events_since_snapshot: int
+    ) -> bool:
+        if events_since_snapshot <= 0:
+            return False
+        if (
+            self.max_events_replayed
+            and events_since_snapshot >= self.max_events_replayed
+        ):
+            return True
+        seconds_per_event = self._seconds_per_event.get(type(aggregate))
+        return (
+            seconds_per_event != None
+            and events_since_snapshot * seconds_per_event >= self.max_replay_seconds
+        )
+
+
+# Registered snapshot policy accessible via `snapshot_policy_instance`.
+_default_snapshot_policy = FixedFrequencySnapshotPolicy()
+_snapshot_policy = _default_snapshot_policy
+
+
+def register_snapshot_policy(policy: SnapshotPolicy) -> SnapshotPolicy:
+    """Registers the `SnapshotPolicy` used by the command handler.
+
+    Raises:
+        DuplicateSnapshotPolicyError:
+            Registering multiple snapshot policies is not allowed.
+    """
+    global _snapshot_policy
+    if _snapshot_policy is not _default_snapshot_policy:
+        raise DuplicateSnapshotPolicyError(
+            f"Already registered: {str(_snapshot_policy)}  Unable to register: "
+            f"{str(policy)}"
+        )
+    _snapshot_policy = policy
+    return policy
+
+
+def snapshot_policy_instance() -> SnapshotPolicy:
+    "Returns the registered snapshot policy singleton."
+    return _snapshot_policy
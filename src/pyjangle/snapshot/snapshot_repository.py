@@ -83,6 +83,20 @@ class SnapshotRepository(metaclass=abc.ABCMeta):
         """
         pass
 
+    async def store_snapshots(self, snapshots: list[tuple[any, int, any]]):
+        """Stores several snapshots.
+
+        Used by the `SnapshotWriter` to write snapshots in batches.  The default
+        implementation calls `store_snapshot` for each snapshot.  Override it to store
+        the batch in a single round trip.
+
+        Args:
+            snapshots:
+                (aggregate_id, version, snapshot) tuples, at most one per aggregate.
+        """
+        for aggregate_id, version, snapshot in snapshots:
+            await self.store_snapshot(aggregate_id, version, snapshot)
+
     @abc.abstractmethod
     async def delete_snapshot(self, aggregate_id: str):
         """Deletes a snapshot.
@@ -0,0 +1,197 @@
+from asyncio import (
+    CancelledError,
+    Event,
+    Task,
+    TimeoutError,
+    create_task,
+    wait,
+    wait_for,
+)
+
+from pyjangle import (
+    LogToggles,
+    background_tasks,
+    get_batch_size,
+    get_snapshot_write_queue_size,
+    log,
+    snapshot_repository_instance,
+)
+
+
+class SnapshotWriter:
+    """Writes snapshots to the snapshot repository in the background.
+
+    Storing a snapshot inline makes the command that triggered it wait for the
+    snapshot to be written.  While the writer is running, see
+    `begin_writing_snapshots`, the command handler instead hands snapshots to the
+    writer, which stores them in batches via `SnapshotRepository.store_snapshots`.
+
+    Only the newest pending snapshot of each aggregate is kept, so an aggregate that is
+    snapshotted repeatedly before its snapshot is written is only written once.  At
+    most `get_snapshot_write_queue_size` aggregates can have a pending snapshot.  Once
+    that many are pending, `enqueue` waits for the writer to catch up.
+
+    A snapshot that fails to be written is logged and discarded--it's only an
+    optimization, and a new snapshot will be taken later.  Because snapshots are
+    written after `enqueue` returns, `Snapshottable.get_snapshot` must return a value
+    that isn't modified by events applied to the aggregate afterwards.
+    """
+
+    def __init__(self):
+        # Maps aggregate ID to the (version, snapshot) that is waiting to be written.
+        self._pending: dict[any, tuple[int, any]] = dict()
+        self._wakeup = Event()
+        # Set when there is room in `_pending` for another aggregate.
+        self._has_capacity = Event()
+        self._has_capacity.set()
+        # Set when every enqueued snapshot has been written.
+        self._is_idle = Event()
+        self._is_idle.set()
+        self._is_running = False
+
+    @property
+    def is_running(self) -> bool:
+        "True while `run` is executing."
+        return self._is_running
+
+    def __len__(self):
+        "Number of aggregates with a snapshot waiting to be written."
+        return len(self._pending)
+
+    async def enqueue(self, aggregate_id: any, version: int, snapshot: any):
+        """Schedules a snapshot to be written.
+
+        Replaces the aggregate's pending snapshot if it's older.  Waits for space if the
+        maximum number of aggregates already have a pending snapshot.
+
+        Args:
+            aggregate_id:
+                aggregate to which the snapshot belongs.
+            version:
+                Highest version event captured by the snapshot.
+            snapshot:
+                The snapshot to store.
+        """
+        while (
+            aggregate_id not in self._pending
+            and len(self._pending) >= max(1, get_snapshot_write_queue_size())
+            and self._is_running
+        ):
+            self._has_capacity.clear()
+            await self._has_capacity.wait()
+        pending = self._pending.get(aggregate_id)
+        if pending != None and pending[0] >= version:
+            return
+        self._pending[aggregate_id] = (version, snapshot)
+        self._is_idle.clear()
+        self._wakeup.set()
+
+    async def flush(self):
+        """Waits until every pending snapshot has been written.
+
+        If the writer isn't running, the pending snapshots are written immediately.
+        """
+        if self._is_running:
+            await self._is_idle.wait()
+        else:
+            await self._write_pending()
+
+    async def run(self):
+        "Writes pending snapshots as they are enqueued.  Runs until cancelled."
+        self._is_running = True
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                await self._write_pending()
+        finally:
+            self._is_running = False
+            # Commands waiting for space write their snapshots inline instead.
+            self._has_capacity.set()
+
+    def _discard_pending(self):
+        self._pending.clear()
+        self._has_capacity.set()
+        self._is_idle.set()
+
+    async def _write_pending(self):
+        while self._pending:
+            batch = []
+            for aggregate_id in list(self._pending)[: max(1, get_batch_size())]:
+                version, snapshot = self._pending.pop(aggregate_id)
+                batch.append((aggregate_id, version, snapshot))
+            self._has_capacity.set()
+            try:
+                await snapshot_repository_instance().store_snapshots(batch)
+            except CancelledError:
+                raise
+            except Exception as e:
+                log(
+                    LogToggles.snapshot_write_failed,
+                    "Failed to write snapshots",
+                    {"aggregate_ids": [aggregate_id for (aggregate_id, _, _) in batch]},
+                    exc_info=e,
+                )
+        self._is_idle.set()
+
+
+# Singleton instance of the snapshot writer.  Access via snapshot_writer_instance().
+_snapshot_writer = SnapshotWriter()
+
+# Task created by the most recent call to `begin_writing_snapshots`.
+_snapshot_writer_task: Task = None
+
+
+def snapshot_writer_instance() -> SnapshotWriter:
+    "Returns the singleton instance of the snapshot writer."
+    return _snapshot_writer
+
+
+def begin_writing_snapshots() -> Task:
+    """Begins writing snapshots in the background instead of on the command path.
+
+    Starts a background task that runs the `SnapshotWriter`.  A reference to the
+    created task is automatically added to `tasks.background_tasks` in order to prevent
+    it from being garbage collected.  The task is also returned from this function
+    call.  Use `stop_writing_snapshots` during shutdown so that pending snapshots are
+    written.
+
+    Returns:
+        A reference to the background task that is created.
+    """
+    global _snapshot_writer_task
+    task = create_task(snapshot_writer_instance().run())
+    background_tasks.append(task)
+    _snapshot_writer_task = task
+    return task
+
+
+async def stop_writing_snapshots(timeout: float = None):
+    """Writes pending snapshots and then stops the snapshot writer.
+
+    Stops the task started by `begin_writing_snapshots`.  Call this method during
+    shutdown so that snapshots taken by recent commands aren't lost.
+
+    Args:
+        timeout:
+            Maximum number of seconds to wait for pending snapshots to be written.
+            Snapshots that are still pending once the timeout elapses are discarded.
+            If None, waits indefinitely.
+    """
+    global _snapshot_writer_task
+    task = _snapshot_writer_task
+    if task == None:
+        return
+    try:
+        await wait_for(snapshot_writer_instance().flush(), timeout)
+    except TimeoutError:
+        log(
+            LogToggles.snapshot_write_failed,
+            "Stopped writing snapshots before all pending snapshots were written",
+            {"pending_snapshot_count": len(snapshot_writer_instance())},
+        )
+        snapshot_writer_instance()._discard_pending()
+    finally:
+        task.cancel()
+        await wait([task])
+        _snapshot_writer_task = None
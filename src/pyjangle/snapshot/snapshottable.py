@@ -11,8 +11,10 @@ class Snapshottable(metaclass=abc.ABCMeta):
 
     Aggregates with long event histories can benefit from this interface.  A snapshot 
     captures an aggregate's state at a certain version.  A snapshot is the serialized 
-    state along with the version.  The number of events retrieved from storage will 
-    never be greater than the result of `get_snapshot_frequency`."""
+    state along with the version.  The registered `SnapshotPolicy` decides when 
+    snapshots are taken.  With the default, `FixedFrequencySnapshotPolicy`, the number 
+    of events retrieved from storage will never be greater than the result of 
+    `get_snapshot_frequency`."""
 
     @abc.abstractmethod
     def apply_snapshot_hook(self, snapshot):
@@ -28,9 +30,22 @@ class Snapshottable(metaclass=abc.ABCMeta):
     def get_snapshot_frequency(self) -> int:
         """Represents the frequency at which snapshots are taken.
 
-        Snapshots are taken if event_count % frequency == 0."""
+        Snapshots are taken once this many events have been committed since the most 
+        recent snapshot.  Snapshotting is disabled if this is 0.  See 
+        `FixedFrequencySnapshotPolicy`."""
         pass
 
+    @property
+    def snapshot_version(self) -> int:
+        """Version of the most recent snapshot applied to or taken of the aggregate.
+
+        0 if there is no snapshot."""
+        return self._snapshot_version if hasattr(self, "_snapshot_version") else 0
+
+    @snapshot_version.setter
+    def snapshot_version(self, value: int):
+        self._snapshot_version = value
+
     def apply_snapshot(self, version: int, snapshot: any):
         """Applied a snapshot to an aggregate.
 
@@ -38,5 +53,6 @@ class Snapshottable(metaclass=abc.ABCMeta):
         try:
             self.apply_snapshot_hook(snapshot)
             self.version = version
+            self.snapshot_version = version
         except Exception as e:
             raise SnapshotError(e)
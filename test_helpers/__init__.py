@@ -8,13 +8,18 @@ SOURCE_PATH = os.path.join(PROJECT_PATH, "src")
 sys.path.append(SOURCE_PATH)
 
 
-from .aggregates import SnapshottableTestAggregate, NotSnapshottableTestAggregate
+from .aggregates import (
+    SnapshottableTestAggregate,
+    NotSnapshottableTestAggregate,
+    CounterTestAggregate,
+)
 from .commands import (
     CommandThatShouldSucceedA,
     CommandThatShouldFail,
     CommandThatShouldSucceedB,
     CommandThatShouldSucceedC,
     CommandThatShouldErrorOnlyFirstTime,
+    IncrementCounter,
 )
 from .json_encode_decode import CustomJSONDecoder, CustomJSONEncoder
 from .events import (
@@ -30,6 +35,7 @@ from .events import (
     TestSagaEvent,
 )
 from .registration_paths import (
+    AGGREGATE_CACHE,
     SNAPSHOT_REPO,
     EVENT_REPO,
     EVENT_DISPATCHER,
@@ -48,4 +54,8 @@ from .registration_paths import (
     EVENT_ID_FACTORY,
 )
 from .reset import ResetPyJangleState
-from .sagas import SagaForTestingRetryLogic, SagaForTesting
+from .sagas import (
+    SagaForTestingRetryLogic,
+    SagaForTesting,
+    SnapshottableSagaForTesting,
+)
@@ -7,6 +7,7 @@ from test_helpers.commands import (
     CommandThatShouldSucceedB,
     CommandThatShouldSucceedA,
     CommandThatShouldFail,
+    IncrementCounter,
 )
 from test_helpers.events import EventA
 
@@ -54,3 +55,22 @@ class NotSnapshottableTestAggregate(Aggregate):
     @reconstitute_aggregate_state(EventA)
     def from_event_that_continues_saga(self, event: EventA):
         pass
+
+
+@RegisterAggregate
+class CounterTestAggregate(Aggregate):
+    def __init__(self, id: any):
+        super().__init__(id)
+        self.count = 0
+
+    @validate_command(IncrementCounter)
+    def increment(self, command: IncrementCounter, next_version: int):
+        if command.limit != None and self.count >= command.limit:
+            self.post_new_event(EventA(version=next_version))
+            return CommandResponse(False, self.count)
+        self.post_new_event(EventA(version=next_version))
+        return CommandResponse(True, self.count + 1)
+
+    @reconstitute_aggregate_state(EventA)
+    def from_event_a(self, event: EventA):
+        self.count += 1
@@ -24,3 +24,12 @@ class CommandThatShouldSucceedC(Command):
 class CommandThatShouldErrorOnlyFirstTime(Command):
     def get_aggregate_id(self):
         return 1
+
+
+class IncrementCounter(Command):
+    def __init__(self, aggregate_id: any, limit: int = None):
+        self.aggregate_id = aggregate_id
+        self.limit = limit
+
+    def get_aggregate_id(self):
+        return self.aggregate_id
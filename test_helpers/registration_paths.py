@@ -1,11 +1,17 @@
+AGGREGATE_CACHE = "pyjangle.aggregate.aggregate_cache._aggregate_cache"
 SNAPSHOT_REPO = "pyjangle.snapshot.snapshot_repository._registered_snapshot_repository"
 EVENT_REPO = "pyjangle.event.event_repository._event_repository_instance"
 EVENT_DISPATCHER = "pyjangle.event.event_dispatcher._event_dispatcher"
+IS_BATCH_EVENT_DISPATCHER = "pyjangle.event.event_dispatcher._is_batch_event_dispatcher"
 COMMAND_DISPATCHER = "pyjangle.command.command_dispatcher._command_dispatcher_instance"
 COMMAND_TO_AGGREGATE_MAP = (
     "pyjangle.aggregate.register_aggregate._command_to_aggregate_map"
 )
 COMMITTED_EVENT_QUEUE = "pyjangle.event.event_dispatcher._committed_event_queue"
+EVENT_DISPATCH_TASK = "pyjangle.event.event_dispatcher._event_dispatch_task"
+EVENT_DISPATCH_WORKER_QUEUES = (
+    "pyjangle.event.event_dispatcher._event_dispatch_worker_queues"
+)
 NAME_TO_EVENT_TYPE_MAP = "pyjangle.event.register_event._name_to_event_type_map"
 EVENT_TYPE_TO_NAME_MAP = "pyjangle.event.register_event.__event_type_to_name_map"
 QUERY_TYPE_TO_QUERY_HANDLER_MAP = (
@@ -20,3 +26,9 @@ EVENT_TYPE_TO_EVENT_HANDLER_MAP = (
     "pyjangle.event.event_handler._event_type_to_event_handler_handler_map"
 )
 EVENT_ID_FACTORY = "pyjangle.event.register_event_id_factory._event_id_factory"
+SAGA_RETRY_SCHEDULER = "pyjangle.saga.saga_retry_scheduler._saga_retry_scheduler"
+METRICS_SINK = "pyjangle.metrics.metrics_sink._metrics_sink"
+SNAPSHOT_POLICY = "pyjangle.snapshot.snapshot_policy._snapshot_policy"
+SNAPSHOT_WRITER = "pyjangle.snapshot.snapshot_writer._snapshot_writer"
+SNAPSHOT_WRITER_TASK = "pyjangle.snapshot.snapshot_writer._snapshot_writer_task"
+SNAPSHOT_VERSION_HINTS = "pyjangle.command.command_handler._snapshot_version_hints"
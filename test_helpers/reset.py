@@ -3,10 +3,14 @@ from unittest.mock import patch
 from pyjangle import default_event_id_factory
 
 from test_helpers.registration_paths import (
+    AGGREGATE_CACHE,
     COMMAND_DISPATCHER,
     COMMAND_TO_AGGREGATE_MAP,
     COMMITTED_EVENT_QUEUE,
+    EVENT_DISPATCH_TASK,
+    EVENT_DISPATCH_WORKER_QUEUES,
     EVENT_DISPATCHER,
+    IS_BATCH_EVENT_DISPATCHER,
     EVENT_ID_FACTORY,
     EVENT_REPO,
     SNAPSHOT_REPO,
@@ -17,10 +21,20 @@ from test_helpers.registration_paths import (
     NAME_TO_SAGA_TYPE_MAP,
     SAGA_TYPE_TO_NAME_MAP,
     SAGA_REPO,
+    SAGA_RETRY_SCHEDULER,
+    METRICS_SINK,
+    SNAPSHOT_POLICY,
+    SNAPSHOT_WRITER,
+    SNAPSHOT_WRITER_TASK,
+    SNAPSHOT_VERSION_HINTS,
 )
+from pyjangle.aggregate.aggregate_cache import AggregateCache
 from pyjangle.event.in_memory_event_repository import InMemoryEventRepository
 from pyjangle.saga.in_memory_transient_saga_repository import InMemorySagaRepository
+from pyjangle.saga.saga_retry_scheduler import SagaRetryScheduler
 from pyjangle.snapshot.in_memory_snapshot_repository import InMemorySnapshotRepository
+from pyjangle.snapshot.snapshot_policy import _default_snapshot_policy
+from pyjangle.snapshot.snapshot_writer import SnapshotWriter
 
 
 def ResetPyJangleState(cls):
@@ -38,4 +52,14 @@ def ResetPyJangleState(cls):
     cls = patch(EVENT_DISPATCHER, None)(cls)
     cls = patch(SNAPSHOT_REPO, new_callable=lambda: InMemorySnapshotRepository())(cls)
     cls = patch.dict(COMMAND_TO_AGGREGATE_MAP)(cls)
+    cls = patch(AGGREGATE_CACHE, new_callable=lambda: AggregateCache())(cls)
+    cls = patch(EVENT_DISPATCH_TASK, None)(cls)
+    cls = patch(EVENT_DISPATCH_WORKER_QUEUES, [])(cls)
+    cls = patch(IS_BATCH_EVENT_DISPATCHER, False)(cls)
+    cls = patch(SAGA_RETRY_SCHEDULER, new_callable=lambda: SagaRetryScheduler())(cls)
+    cls = patch(METRICS_SINK, None)(cls)
+    cls = patch(SNAPSHOT_POLICY, new=_default_snapshot_policy)(cls)
+    cls = patch(SNAPSHOT_WRITER, new_callable=lambda: SnapshotWriter())(cls)
+    cls = patch(SNAPSHOT_WRITER_TASK, None)(cls)
+    cls = patch.dict(SNAPSHOT_VERSION_HINTS)(cls)
     return cls
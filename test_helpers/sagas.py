@@ -4,6 +4,7 @@ from pyjangle import command_dispatcher_instance
 from pyjangle.event.event import VersionedEvent
 from pyjangle.saga.register_saga import RegisterSaga
 from pyjangle.saga.saga import Saga, event_receiver, reconstitute_saga_state
+from pyjangle.saga.snapshottable_saga import SnapshottableSaga
 from test_helpers.commands import CommandThatShouldErrorOnlyFirstTime
 from test_helpers.events import (
     EventThatCausesDuplicateKeyError,
@@ -132,3 +133,43 @@ class SagaForTesting(Saga):
     def from_event_that_causes_saga_to_retry(self, event: EventThatCausesSagaToRetry):
         self._used_event_ids.add(event.id)
         self.set_retry(datetime.min)
+
+
+@RegisterSaga
+class SnapshottableSagaForTesting(Saga, SnapshottableSaga):
+    "Counts EventThatContinuesSaga events and snapshots after every third event."
+
+    def __init__(
+        self,
+        saga_id: any,
+        events: List[VersionedEvent] = [],
+        retry_at: datetime = None,
+        timeout_at: datetime = None,
+        is_complete: bool = False,
+        is_timed_out: bool = False,
+    ):
+        self.count = 0
+        self.replayed_event_count = 0
+        super().__init__(
+            saga_id, events, retry_at, timeout_at, is_complete, is_timed_out
+        )
+
+    @event_receiver(EventThatContinuesSaga)
+    async def on_event_that_continues_saga(self):
+        pass
+
+    @reconstitute_saga_state(EventThatContinuesSaga)
+    def from_event_that_continues_saga(self, event: EventThatContinuesSaga):
+        self.count += 1
+        self.replayed_event_count += 1
+
+    def apply_snapshot_hook(self, snapshot):
+        if snapshot == "invalid":
+            raise Exception()
+        self.count = snapshot
+
+    def get_snapshot(self) -> any:
+        return self.count
+
+    def get_snapshot_frequency(self) -> int:
+        return 3
@@ -0,0 +1,52 @@
+import unittest
+
+from pyjangle import AggregateCache
+from test_helpers.aggregates import (
+    NotSnapshottableTestAggregate,
+    SnapshottableTestAggregate,
+)
+
+
+class TestAggregateCache(unittest.TestCase):
+    def test_disabled_cache_does_not_store_aggregates(self):
+        cache = AggregateCache(0)
+        cache.checkin(NotSnapshottableTestAggregate(1))
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.checkout(NotSnapshottableTestAggregate, 1))
+
+    def test_checkout_removes_aggregate(self):
+        cache = AggregateCache(2)
+        aggregate = NotSnapshottableTestAggregate(1)
+        cache.checkin(aggregate)
+        self.assertIs(cache.checkout(NotSnapshottableTestAggregate, 1), aggregate)
+        self.assertIsNone(cache.checkout(NotSnapshottableTestAggregate, 1))
+
+    def test_aggregates_are_keyed_by_type_and_id(self):
+        cache = AggregateCache(2)
+        cache.checkin(NotSnapshottableTestAggregate(1))
+        self.assertIsNone(cache.checkout(SnapshottableTestAggregate, 1))
+        self.assertIsNone(cache.checkout(NotSnapshottableTestAggregate, 2))
+
+    def test_least_recently_used_aggregate_evicted(self):
+        cache = AggregateCache(2)
+        for id in range(3):
+            cache.checkin(NotSnapshottableTestAggregate(id))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.checkout(NotSnapshottableTestAggregate, 0))
+        self.assertIsNotNone(cache.checkout(NotSnapshottableTestAggregate, 2))
+
+    def test_older_version_does_not_replace_newer_version(self):
+        cache = AggregateCache(2)
+        newer = NotSnapshottableTestAggregate(1)
+        newer.version = 5
+        older = NotSnapshottableTestAggregate(1)
+        older.version = 3
+        cache.checkin(newer)
+        cache.checkin(older)
+        self.assertIs(cache.checkout(NotSnapshottableTestAggregate, 1), newer)
+
+    def test_invalidate(self):
+        cache = AggregateCache(2)
+        cache.checkin(NotSnapshottableTestAggregate(1))
+        cache.invalidate(NotSnapshottableTestAggregate, 1)
+        self.assertEqual(len(cache), 0)
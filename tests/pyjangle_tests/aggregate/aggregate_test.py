@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from datetime import datetime
 from pyjangle import (
@@ -7,6 +8,7 @@ from pyjangle import (
     ValidateCommandMethodMissingError,
     CommandResponse,
     ReconstituteStateMethodMissingError,
+    ReconstituteStateError,
     CommandValidatorBadSignatureError,
 )
 from test_helpers.commands import CommandThatShouldSucceedA, CommandThatShouldSucceedB
@@ -143,3 +145,63 @@ class TestAggregate(unittest.TestCase):
         self.assertEqual(2, a.version)
         a.apply_events([version_3])
         self.assertEqual(3, a.version)
+
+    def test_apply_event_stream_applies_events_as_they_arrive(self):
+        applied_versions = []
+
+        class A(Aggregate):
+            @reconstitute_aggregate_state(EventA)
+            def foo(self, event: EventA):
+                applied_versions.append(event.version)
+
+        async def event_stream():
+            for version in range(1, 4):
+                yield EventA(id="a", version=version, created_at=datetime.now)
+                # Each event is applied before the next one is produced.
+                self.assertEqual(applied_versions[-1], version)
+
+        a = A(1)
+        count = asyncio.run(a.apply_event_stream(event_stream()))
+        self.assertEqual(count, 3)
+        self.assertEqual(applied_versions, [1, 2, 3])
+        self.assertEqual(a.version, 3)
+
+    def test_apply_event_stream_wraps_errors(self):
+        class A(Aggregate):
+            @reconstitute_aggregate_state(EventA)
+            def foo(self, event: EventA):
+                raise Exception()
+
+        async def event_stream():
+            yield EventA(id="a", version=1, created_at=datetime.now)
+
+        with self.assertRaises(ReconstituteStateError):
+            asyncio.run(A(1).apply_event_stream(event_stream()))
+
+    def test_dispatch_maps_are_compiled_once_per_class(self):
+        class A(Aggregate):
+            @validate_command(CommandThatShouldSucceedA)
+            def validateA(self, command: CommandThatShouldSucceedA, next_version: int):
+                self.validated_by = "A"
+
+            @reconstitute_aggregate_state(EventA)
+            def from_a(self, event: EventA):
+                pass
+
+        class B(A):
+            @validate_command(CommandThatShouldSucceedA)
+            def validateA(self, command: CommandThatShouldSucceedA, next_version: int):
+                self.validated_by = "B"
+
+        self.assertEqual(
+            A._command_type_to_command_validator.keys(), {CommandThatShouldSucceedA}
+        )
+        self.assertEqual(A._event_to_state_reconstitutor.keys(), {EventA})
+        self.assertEqual(B._event_to_state_reconstitutor.keys(), {EventA})
+        self.assertEqual(Aggregate._command_type_to_command_validator, {})
+        a, b = A(1), B(1)
+        self.assertNotIn("_command_type_to_command_validator", vars(a))
+        a.validate(CommandThatShouldSucceedA())
+        b.validate(CommandThatShouldSucceedA())
+        self.assertEqual(a.validated_by, "A")
+        self.assertEqual(b.validated_by, "B")
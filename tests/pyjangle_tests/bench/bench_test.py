@@ -0,0 +1,57 @@
+import unittest
+
+from pyjangle.bench import (
+    SCENARIOS,
+    UnknownScenarioError,
+    compare_results,
+    run_benchmarks,
+)
+from test_helpers.reset import ResetPyJangleState
+
+
+@ResetPyJangleState
+class TestBench(unittest.TestCase):
+    def test_every_scenario_reports_metrics(self, *_):
+        results = run_benchmarks(scale=0.001)
+        self.assertEqual(results["format"], 1)
+        self.assertEqual(set(results["scenarios"]), set(SCENARIOS))
+        for name, result in results["scenarios"].items():
+            self.assertGreater(result["operations"], 0, name)
+            self.assertGreater(result["ops_per_second"], 0, name)
+            self.assertGreater(result["peak_memory_bytes"], 0, name)
+        latency = results["scenarios"]["command_throughput"]["latency_ms"]
+        self.assertLessEqual(latency["p50"], latency["p95"])
+        self.assertLessEqual(latency["p95"], latency["p99"])
+
+    def test_hot_key_scenario_contends(self, *_):
+        results = run_benchmarks(
+            ["command_hot_key", "command_hot_key_serialized"],
+            scale=0.001,
+            measure_memory=False,
+        )
+        contended = results["scenarios"]["command_hot_key"]["parameters"]
+        serialized = results["scenarios"]["command_hot_key_serialized"]["parameters"]
+        self.assertGreater(contended["conflicts"], 0)
+        self.assertEqual(contended["commits"], 5 + contended["conflicts"])
+        self.assertEqual(serialized["conflicts"], 0)
+
+    def test_compare_results_reports_regressions(self, *_):
+        results = run_benchmarks(
+            ["command_throughput"], scale=0.001, measure_memory=False
+        )
+        self.assertEqual(compare_results(results, results), [])
+        faster_baseline = {
+            "scenarios": {
+                "command_throughput": dict(
+                    results["scenarios"]["command_throughput"],
+                    ops_per_second=float("inf"),
+                )
+            }
+        }
+        regressions = compare_results(results, faster_baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("command_throughput: ops_per_second", regressions[0])
+
+    def test_unknown_scenario_raises(self, *_):
+        with self.assertRaises(UnknownScenarioError):
+            run_benchmarks(["unknown"])
@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+
+from pyjangle import AggregateLock
+
+
+class A:
+    pass
+
+
+class B:
+    pass
+
+
+class TestAggregateLock(unittest.IsolatedAsyncioTestCase):
+    async def test_same_aggregate_executes_in_order(self):
+        lock = AggregateLock()
+        order = []
+
+        async def command(n: int):
+            async with lock.acquire(A, 1):
+                order.append(("start", n))
+                await asyncio.sleep(0.01)
+                order.append(("end", n))
+
+        await asyncio.gather(*[command(n) for n in range(3)])
+        self.assertEqual(
+            order,
+            [
+                ("start", 0),
+                ("end", 0),
+                ("start", 1),
+                ("end", 1),
+                ("start", 2),
+                ("end", 2),
+            ],
+        )
+
+    async def test_different_aggregates_execute_concurrently(self):
+        lock = AggregateLock()
+        both_entered = asyncio.Event()
+        entered = 0
+
+        async def command(aggregate_type: type, aggregate_id: any):
+            nonlocal entered
+            async with lock.acquire(aggregate_type, aggregate_id):
+                entered += 1
+                if entered == 3:
+                    both_entered.set()
+                await asyncio.wait_for(both_entered.wait(), 1)
+
+        await asyncio.gather(command(A, 1), command(A, 2), command(B, 1))
+
+    async def test_metrics(self):
+        lock = AggregateLock()
+        release = asyncio.Event()
+
+        async def command():
+            async with lock.acquire(A, 1):
+                await release.wait()
+
+        tasks = [asyncio.create_task(command()) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.assertEqual(lock.queue_depth(A, 1), 3)
+        self.assertEqual(lock.metrics.queue_depth, 3)
+        release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(lock.queue_depth(A, 1), 0)
+        self.assertEqual(lock.metrics.queue_depth, 0)
+        self.assertEqual(lock.metrics.max_queue_depth, 3)
+        self.assertEqual(lock.metrics.acquisitions, 3)
+        self.assertEqual(lock.metrics.contended_acquisitions, 2)
+        self.assertGreaterEqual(lock.metrics.total_wait_seconds, 0)
+
+    async def test_lock_released_when_command_raises(self):
+        lock = AggregateLock()
+        with self.assertRaises(ValueError):
+            async with lock.acquire(A, 1):
+                raise ValueError()
+        self.assertEqual(lock.queue_depth(A, 1), 0)
+        async with lock.acquire(A, 1):
+            pass
@@ -2,12 +2,27 @@ import asyncio
 import unittest
 from unittest.mock import MagicMock, Mock, patch
 import pyjangle
-from pyjangle import handle_command, DuplicateKeyError, event_repository_instance
+from pyjangle import (
+    handle_command,
+    handle_commands,
+    DuplicateKeyError,
+    event_repository_instance,
+    aggregate_cache_instance,
+    set_aggregate_cache_size,
+    get_aggregate_cache_size,
+    get_serialize_commands_by_aggregate,
+    set_serialize_commands_by_aggregate,
+    get_prefetch_events_with_snapshot,
+    set_prefetch_events_with_snapshot,
+    snapshot_repository_instance,
+)
 import test_helpers.aggregates
+import test_helpers.events
 from test_helpers.commands import (
     CommandThatShouldSucceedB,
     CommandThatShouldSucceedA,
     CommandThatShouldFail,
+    IncrementCounter,
 )
 from test_helpers.registration_paths import EVENT_DISPATCHER
 from test_helpers.reset import ResetPyJangleState
@@ -112,12 +127,12 @@ class TestCommandHandler(unittest.IsolatedAsyncioTestCase):
             MagicMock(side_effect=Exception),
         ):
             await handle_command(CommandThatShouldSucceedA())
-        self.assertEqual(
-            len(
-                pyjangle.snapshot.snapshot_repository._registered_snapshot_repository._snapshots
-            ),
-            0,
+        # The bad snapshot at version 2 is replaced by a new snapshot because the
+        # rebuilt aggregate has 3 events since its last (nonexistent) snapshot.
+        snapshots = (
+            pyjangle.snapshot.snapshot_repository._registered_snapshot_repository._snapshots
         )
+        self.assertEqual([version for (version, _) in snapshots.values()], [3])
 
     async def test_snapshotting_reduces_events_retrieved_from_event_store(self, *_):
         async def raise_error_if_too_many_events_returned_side_effect(
@@ -171,3 +186,282 @@ class TestCommandHandler(unittest.IsolatedAsyncioTestCase):
         await handle_command(CommandThatShouldSucceedA())
 
         self.assertEqual(event_repo.commit_events.call_count, 3)
+
+    async def test_events_streamed_from_async_iterator(self, *_):
+        event_repo = event_repository_instance()
+        real_get_events = event_repo.get_events
+
+        async def get_events(aggregate_id, current_version, batch_size):
+            for event in await real_get_events(
+                aggregate_id, current_version, batch_size
+            ):
+                yield event
+
+        for _ in range(3):
+            await handle_command(IncrementCounter(1))
+        with patch.object(event_repo, "get_events", new=get_events):
+            response = await handle_command(IncrementCounter(1))
+        self.assertTrue(response.is_success)
+        self.assertEqual(response.data, 4)
+
+
+@ResetPyJangleState
+class TestCommandHandlerWithAggregateCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._cache_size = get_aggregate_cache_size()
+        set_aggregate_cache_size(10)
+
+    def tearDown(self) -> None:
+        set_aggregate_cache_size(self._cache_size)
+
+    async def test_cached_aggregate_only_retrieves_newer_events(self, *_):
+        event_repo = event_repository_instance()
+        real_get_events = event_repo.get_events
+        versions_requested = []
+
+        async def get_events(aggregate_id, current_version, batch_size):
+            versions_requested.append(current_version)
+            return await real_get_events(aggregate_id, current_version, batch_size)
+
+        with patch.object(event_repo, "get_events", side_effect=get_events):
+            for _ in range(3):
+                self.assertTrue(
+                    (await handle_command(CommandThatShouldSucceedB())).is_success
+                )
+
+        self.assertEqual(versions_requested, [0, 1, 2])
+        self.assertEqual(len(aggregate_cache_instance()), 1)
+
+    async def test_cached_aggregate_catches_up_with_events_committed_elsewhere(
+        self, *_
+    ):
+        await handle_command(CommandThatShouldSucceedB())
+        cached = aggregate_cache_instance().checkout(
+            test_helpers.aggregates.NotSnapshottableTestAggregate, 1
+        )
+        self.assertEqual(cached.version, 1)
+        # Another process commits version 2 while version 1 is cached.
+        await event_repository_instance().commit_events(
+            [(1, test_helpers.events.EventA(version=2))]
+        )
+        aggregate_cache_instance().checkin(cached)
+        await handle_command(CommandThatShouldSucceedB())
+        cached = aggregate_cache_instance().checkout(
+            test_helpers.aggregates.NotSnapshottableTestAggregate, 1
+        )
+        self.assertEqual(cached.version, 3)
+
+    async def test_failed_command_caches_aggregate_without_new_events(self, *_):
+        await handle_command(CommandThatShouldFail())
+        cached = aggregate_cache_instance().checkout(
+            test_helpers.aggregates.NotSnapshottableTestAggregate, 1
+        )
+        self.assertEqual(cached.version, 0)
+        self.assertFalse(cached.new_events)
+
+    async def test_duplicate_key_error_invalidates_cache(self, *_):
+        await handle_command(CommandThatShouldSucceedB())
+        event_repo = event_repository_instance()
+        real_commit_events = event_repo.commit_events
+        calls = 0
+
+        async def commit_events(*args):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise DuplicateKeyError()
+            return await real_commit_events(*args)
+
+        with patch.object(event_repo, "commit_events", side_effect=commit_events):
+            response = await handle_command(CommandThatShouldSucceedB())
+
+        self.assertTrue(response.is_success)
+        self.assertEqual(calls, 2)
+        cached = aggregate_cache_instance().checkout(
+            test_helpers.aggregates.NotSnapshottableTestAggregate, 1
+        )
+        self.assertEqual(cached.version, 2)
+
+    async def test_reconstitute_state_error_invalidates_cache(self, *_):
+        await handle_command(CommandThatShouldSucceedB())
+        with patch.object(
+            test_helpers.aggregates.NotSnapshottableTestAggregate,
+            "apply_events",
+            MagicMock(side_effect=pyjangle.ReconstituteStateError),
+        ):
+            with self.assertRaises(
+                pyjangle.command.command_handler.CommandHandlerError
+            ):
+                await handle_command(CommandThatShouldSucceedB())
+        self.assertEqual(len(aggregate_cache_instance()), 0)
+
+
+@ResetPyJangleState
+class TestCommandHandlerWithSerializedCommands(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._is_serialized = get_serialize_commands_by_aggregate()
+        set_serialize_commands_by_aggregate(True)
+
+    def tearDown(self) -> None:
+        set_serialize_commands_by_aggregate(self._is_serialized)
+
+    async def test_concurrent_commands_for_same_aggregate_do_not_conflict(self, *_):
+        actual = event_repository_instance().commit_events
+
+        async def commit_events_with_delay(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return await actual(*args, **kwargs)
+
+        with patch.object(
+            event_repository_instance(), "commit_events"
+        ) as mock_commit_events:
+            mock_commit_events.side_effect = commit_events_with_delay
+            responses = await asyncio.gather(
+                *[handle_command(CommandThatShouldSucceedA()) for _ in range(3)]
+            )
+
+        self.assertTrue(all(response.is_success for response in responses))
+        # No DuplicateKeyError retries.
+        self.assertEqual(mock_commit_events.call_count, 3)
+        events = await event_repository_instance().get_events(1)
+        self.assertEqual([event.version for event in events], [1, 2, 3])
+
+
+@ResetPyJangleState
+class TestHandleCommands(unittest.IsolatedAsyncioTestCase):
+    async def test_events_from_all_aggregates_committed_at_once(self, *_):
+        event_repo = event_repository_instance()
+        with patch.object(
+            event_repo, "commit_events", side_effect=event_repo.commit_events
+        ) as commit_events_mock:
+            responses = await handle_commands(
+                [IncrementCounter("a"), IncrementCounter("b"), IncrementCounter("a")]
+            )
+        self.assertEqual(commit_events_mock.call_count, 1)
+        self.assertEqual([response.data for response in responses], [1, 1, 2])
+        self.assertEqual(len(await event_repo.get_events("a")), 2)
+        self.assertEqual(len(await event_repo.get_events("b")), 1)
+
+    async def test_commands_validated_in_order_and_failed_events_discarded(self, *_):
+        responses = await handle_commands(
+            [
+                IncrementCounter("a", limit=2),
+                IncrementCounter("a", limit=2),
+                IncrementCounter("a", limit=2),
+                IncrementCounter("a"),
+            ]
+        )
+        self.assertEqual(
+            [response.is_success for response in responses], [True, True, False, True]
+        )
+        events = await event_repository_instance().get_events("a")
+        self.assertEqual([event.version for event in events], [1, 2, 3])
+
+    async def test_only_conflicting_group_is_retried(self, *_):
+        event_repo = event_repository_instance()
+        real_commit_events = event_repo.commit_events
+        committed_aggregate_ids = []
+        conflict_raised = False
+
+        async def commit_events(aggregate_id_and_event_tuples):
+            nonlocal conflict_raised
+            if not conflict_raised:
+                # Another process commits version 1 of "b" first.
+                conflict_raised = True
+                await real_commit_events([("b", test_helpers.events.EventA(version=1))])
+            committed_aggregate_ids.append(
+                {id for (id, _) in aggregate_id_and_event_tuples}
+            )
+            return await real_commit_events(aggregate_id_and_event_tuples)
+
+        with patch.object(event_repo, "commit_events", side_effect=commit_events):
+            responses = await handle_commands(
+                [IncrementCounter("a"), IncrementCounter("b")]
+            )
+
+        # combined commit, "a" alone, "b" alone (conflict), then "b" revalidated
+        self.assertEqual(committed_aggregate_ids, [{"a", "b"}, {"a"}, {"b"}, {"b"}])
+        self.assertEqual([response.data for response in responses], [1, 2])
+        self.assertEqual(len(await event_repo.get_events("a")), 1)
+        self.assertEqual(len(await event_repo.get_events("b")), 2)
+
+    async def test_nothing_committed_when_all_commands_fail(self, *_):
+        event_repo = event_repository_instance()
+        with patch.object(event_repo, "commit_events") as commit_events_mock:
+            responses = await handle_commands(
+                [IncrementCounter("a", limit=0), IncrementCounter("b", limit=0)]
+            )
+        commit_events_mock.assert_not_called()
+        self.assertFalse(any(response.is_success for response in responses))
+
+
+@ResetPyJangleState
+class TestCommandHandlerWithPrefetchedEvents(unittest.IsolatedAsyncioTestCase):
+    # SnapshottableTestAggregate is snapshotted every 2 events, and its snapshot is the
+    # number of events applied to it.
+    def setUp(self) -> None:
+        self._is_prefetching = get_prefetch_events_with_snapshot()
+        set_prefetch_events_with_snapshot(True)
+
+    def tearDown(self) -> None:
+        set_prefetch_events_with_snapshot(self._is_prefetching)
+
+    async def _handle_commands(self, count: int) -> list[int]:
+        "Handles commands, returning the version passed to each `get_events` call."
+        event_repo = event_repository_instance()
+        versions = []
+
+        async def get_events(aggregate_id, current_version=0, batch_size=100):
+            versions.append(current_version)
+            return await real_get_events(aggregate_id, current_version, batch_size)
+
+        real_get_events = event_repo.get_events
+        with patch.object(event_repo, "get_events", side_effect=get_events):
+            for _ in range(count):
+                response = await handle_command(CommandThatShouldSucceedA())
+                self.assertTrue(response.is_success)
+        return versions
+
+    async def test_events_retrieved_once_per_command(self, *_):
+        versions = await self._handle_commands(5)
+        self.assertEqual(versions, [0, 0, 2, 2, 4])
+        self.assertEqual(await snapshot_repository_instance().get_snapshot(1), (4, 4))
+
+    async def test_events_retrieved_again_when_snapshot_older_than_expected(self, *_):
+        await self._handle_commands(2)
+        await snapshot_repository_instance().delete_snapshot(1)
+        versions = await self._handle_commands(2)
+        # The rebuilt aggregate is snapshotted at version 3.
+        self.assertEqual(versions, [2, 0, 3])
+        self.assertEqual(await snapshot_repository_instance().get_snapshot(1), (3, 3))
+
+    async def test_events_covered_by_newer_snapshot_skipped(self, *_):
+        await self._handle_commands(2)
+        # Another process snapshots the aggregate after more events.
+        await event_repository_instance().commit_events(
+            [
+                (1, test_helpers.events.EventA(version=3)),
+                (1, test_helpers.events.EventA(version=4)),
+            ]
+        )
+        await snapshot_repository_instance().store_snapshot(1, 4, 4)
+        versions = await self._handle_commands(2)
+        self.assertEqual(versions, [2, 4])
+        self.assertEqual(await snapshot_repository_instance().get_snapshot(1), (6, 6))
+
+    async def test_streamed_events_covered_by_snapshot_skipped(self, *_):
+        event_repo = event_repository_instance()
+        await self._handle_commands(2)
+        await event_repo.commit_events([(1, test_helpers.events.EventA(version=3))])
+        await snapshot_repository_instance().store_snapshot(1, 3, 3)
+        real_get_events = event_repo.get_events
+
+        async def stream_events(*args):
+            for event in await real_get_events(*args):
+                yield event
+
+        with patch.object(event_repo, "get_events", side_effect=stream_events):
+            for _ in range(2):
+                response = await handle_command(CommandThatShouldSucceedA())
+                self.assertTrue(response.is_success)
+        self.assertEqual(await snapshot_repository_instance().get_snapshot(1), (5, 5))
@@ -0,0 +1,151 @@
+from asyncio import Queue, wait_for
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+import logging
+import pickle
+import unittest
+
+from pyjangle import (
+    Aggregate,
+    Command,
+    CompactEvent,
+    CompactVersionedEvent,
+    Event,
+    EventCodec,
+    RegisterAggregate,
+    RegisterEvent,
+    VersionedEvent,
+    begin_processing_committed_events,
+    default_event_dispatcher,
+    handle_command,
+    log_vars,
+    reconstitute_aggregate_state,
+    register_event_dispatcher,
+    register_event_handler,
+    validate_command,
+)
+from test_helpers.reset import ResetPyJangleState
+
+
+@dataclass(kw_only=True, slots=True)
+class CompactEventForTesting(CompactVersionedEvent):
+    quantity: int
+
+
+@dataclass(kw_only=True)
+class UnslottedCompactEventForTesting(CompactVersionedEvent):
+    quantity: int
+
+
+class TestCompactEvent(unittest.TestCase):
+    def test_instances_have_no_dict(self):
+        event = CompactEventForTesting(version=1, quantity=2)
+        self.assertFalse(hasattr(event, "__dict__"))
+        self.assertEqual(CompactEventForTesting.__slots__, ("quantity",))
+        self.assertIsInstance(event, VersionedEvent)
+        self.assertIsInstance(CompactEvent(), Event)
+
+    def test_defaults(self):
+        before = datetime.now()
+        event = CompactEventForTesting(version=1, quantity=2)
+        self.assertIsNotNone(event.id)
+        self.assertTrue(before <= event.created_at <= datetime.now())
+        self.assertNotEqual(event.id, CompactEventForTesting(version=1, quantity=2).id)
+
+    def test_created_at_round_trips(self):
+        naive = datetime(1969, 7, 20, 20, 17, 40, 123456)
+        aware = datetime(2020, 2, 29, 23, 59, tzinfo=timezone(timedelta(hours=9)))
+        for created_at in [naive, aware]:
+            event = CompactEventForTesting(version=1, quantity=2, created_at=created_at)
+            self.assertEqual(event.created_at, created_at)
+            self.assertEqual(event.created_at.utcoffset(), created_at.utcoffset())
+        event.created_at = 1_500
+        self.assertEqual(event.created_at_ns, 1_500)
+        self.assertEqual(event.created_at, datetime(1970, 1, 1, microsecond=1))
+        self.assertIsNone(event.created_at_tz)
+
+    def test_behaves_like_a_dataclass(self):
+        event = CompactEventForTesting(id=7, version=1, quantity=2)
+        self.assertEqual(
+            asdict(event),
+            {
+                "id": 7,
+                "created_at": event.created_at,
+                "version": 1,
+                "quantity": 2,
+            },
+        )
+        self.assertEqual(pickle.loads(pickle.dumps(event)), event)
+        self.assertEqual(CompactEventForTesting.deserialize(asdict(event)), event)
+
+    def test_subclass_without_slots_still_works(self):
+        event = UnslottedCompactEventForTesting(id=1, version=1, quantity=2)
+        self.assertEqual(event.id, 1)
+        self.assertNotIn("id", vars(event))
+
+    @ResetPyJangleState
+    def test_event_codec_round_trip(self, *_):
+        RegisterEvent(CompactEventForTesting)
+        codec = EventCodec()
+        event = CompactEventForTesting(version=1, quantity=2)
+        self.assertEqual(codec.decode(codec.encode(event)), event)
+
+
+class CommandForTesting(Command):
+    def get_aggregate_id(self):
+        return 1
+
+
+@ResetPyJangleState
+class TestCompactEventLogging(unittest.IsolatedAsyncioTestCase):
+    def test_log_vars(self, *_):
+        event = CompactEventForTesting(id=7, version=1, quantity=2)
+        self.assertEqual(
+            log_vars(event),
+            {"id": 7, "created_at": event.created_at, "version": 1, "quantity": 2},
+        )
+        self.assertEqual(log_vars(CommandForTesting()), {})
+
+    async def test_slotted_event_logged_by_framework(self, *_):
+        RegisterEvent(CompactEventForTesting)
+
+        @RegisterAggregate
+        class AggregateForTesting(Aggregate):
+            @validate_command(CommandForTesting)
+            def validate(self, command: CommandForTesting, next_version: int):
+                self.post_new_event(
+                    CompactEventForTesting(version=next_version, quantity=2)
+                )
+
+            @reconstitute_aggregate_state(CompactEventForTesting)
+            def from_event(self, event: CompactEventForTesting):
+                pass
+
+        @register_event_handler(CompactEventForTesting)
+        async def failing_handler(event: CompactEventForTesting):
+            raise ValueError()
+
+        dispatched = Queue()
+
+        @register_event_dispatcher
+        async def dispatcher(event: VersionedEvent, completed_callback):
+            await dispatched.put(event)
+            await default_event_dispatcher(event, completed_callback)
+
+        begin_processing_committed_events()
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            for _ in range(2):
+                response = await handle_command(CommandForTesting())
+                self.assertTrue(response.is_success)
+                event = await wait_for(dispatched.get(), 1)
+                with self.assertRaises(ValueError):
+                    await default_event_dispatcher(event, None)
+        self.assertEqual(event.version, 2)
+        self.assertIn(
+            log_vars(event),
+            [
+                record.args.get("event")
+                for record in logs.records
+                if isinstance(record.args, dict)
+            ],
+        )
@@ -1,4 +1,4 @@
-from asyncio import Queue, create_task
+from asyncio import Queue, create_task, get_running_loop, sleep
 from datetime import timedelta
 from typing import Awaitable, Callable
 from unittest import IsolatedAsyncioTestCase
@@ -12,10 +12,12 @@ from pyjangle import (
     register_event_dispatcher,
     begin_processing_committed_events,
     begin_retry_failed_events_loop,
+    retry_failed_events,
     event_repository_instance,
     handle_command,
 )
 from test_helpers.commands import CommandThatShouldSucceedA
+from test_helpers.events import EventA
 from test_helpers.registration_paths import (
     EVENT_DISPATCHER,
     EVENT_REPO,
@@ -92,3 +94,101 @@ class TestEventDaemon(IsolatedAsyncioTestCase):
         with patch(EVENT_DISPATCHER, None):
             with self.assertRaises(EventDispatcherMissingError):
                 begin_retry_failed_events_loop(frequency_in_seconds=0)
+
+    async def _commit_failed_events(self, count: int) -> list[VersionedEvent]:
+        events = [EventA(version=version) for version in range(1, count + 1)]
+        await event_repository_instance().commit_events([(1, e) for e in events])
+        return events
+
+    async def test_retry_failed_events_with_bounded_concurrency(self, *_):
+        in_flight = 0
+        max_in_flight = 0
+
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await sleep(0.01)
+            in_flight -= 1
+            if event.version == 1:
+                raise Exception()
+            await completed_callback(event.id)
+
+        await self._commit_failed_events(10)
+        stats = await retry_failed_events(
+            batch_size=4, max_age_time_delta=timedelta(seconds=-1), max_concurrency=3
+        )
+
+        self.assertEqual(max_in_flight, 3)
+        self.assertEqual(stats.retried, 10)
+        self.assertEqual(stats.succeeded, 9)
+        self.assertEqual(stats.failed, 1)
+        self.assertEqual(stats.backlog_estimate, 10)
+        self.assertEqual(
+            await event_repository_instance().estimate_unhandled_event_count(
+                timedelta(seconds=-1)
+            ),
+            1,
+        )
+
+    async def test_retry_failed_events_limits_events_per_pass(self, *_):
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            await completed_callback(event.id)
+
+        await self._commit_failed_events(5)
+        stats = await retry_failed_events(
+            max_age_time_delta=timedelta(seconds=-1), max_events=2
+        )
+        self.assertEqual(stats.retried, 2)
+        stats = await retry_failed_events(max_age_time_delta=timedelta(seconds=-1))
+        self.assertEqual(stats.retried, 3)
+
+    async def test_unhandled_events_closed_when_pass_stops_early(self, *_):
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            await completed_callback(event.id)
+
+        await self._commit_failed_events(5)
+        repo = event_repository_instance()
+        real_get_unhandled_events = repo.get_unhandled_events
+        is_closed = False
+
+        async def get_unhandled_events(*args, **kwargs):
+            nonlocal is_closed
+            try:
+                async for event in real_get_unhandled_events(*args, **kwargs):
+                    yield event
+            finally:
+                is_closed = True
+
+        with patch.object(repo, "get_unhandled_events", get_unhandled_events):
+            stats = await retry_failed_events(
+                max_age_time_delta=timedelta(seconds=-1), max_events=2
+            )
+            self.assertEqual(stats.retried, 2)
+            self.assertTrue(is_closed)
+
+    async def test_retry_failed_events_rate_limit(self, *_):
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            await completed_callback(event.id)
+
+        await self._commit_failed_events(5)
+        start = get_running_loop().time()
+        stats = await retry_failed_events(
+            max_age_time_delta=timedelta(seconds=-1),
+            max_concurrency=5,
+            max_events_per_second=100,
+        )
+        self.assertEqual(stats.succeeded, 5)
+        self.assertGreaterEqual(get_running_loop().time() - start, 0.04)
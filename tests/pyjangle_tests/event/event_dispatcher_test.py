@@ -1,6 +1,7 @@
 from typing import Awaitable, Callable
 import unittest
-from asyncio import Queue, wait_for
+from unittest.mock import AsyncMock, patch
+from asyncio import Event, Queue, sleep, wait_for
 from datetime import timedelta
 
 from pyjangle import (
@@ -9,7 +10,16 @@ from pyjangle import (
     DuplicateEventDispatcherError,
     EventDispatcherBadSignatureError,
     register_event_dispatcher,
+    register_batch_event_dispatcher,
+    default_batch_event_dispatcher,
+    register_event_handler,
+    set_event_dispatch_batch_size,
+    get_event_dispatch_batch_size,
+    set_event_dispatch_batch_linger_milliseconds,
+    get_event_dispatch_batch_linger_milliseconds,
     begin_processing_committed_events,
+    stop_processing_committed_events,
+    enqueue_committed_event_for_dispatch,
     event_dispatcher_instance,
     event_repository_instance,
     handle_command,
@@ -17,6 +27,7 @@ from pyjangle import (
 from pyjangle.registration import background_tasks
 import test_helpers.aggregates  # Importing module here registers the aggregates
 from test_helpers.commands import CommandThatShouldSucceedA
+from test_helpers.events import EventA
 from test_helpers.reset import ResetPyJangleState
 
 
@@ -154,3 +165,170 @@ class TestEventDispatcher(unittest.IsolatedAsyncioTestCase):
             )
         ]
         self.assertEqual(len(list(unhandled_events)), 0)
+
+    async def test_worker_pool_dispatches_events_concurrently(self, *_):
+        worker_count = 4
+        in_flight = 0
+        all_in_flight = Event()
+
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            nonlocal in_flight
+            in_flight += 1
+            if in_flight == worker_count:
+                all_in_flight.set()
+            # Every worker blocks here until all of them are dispatching an event.
+            await all_in_flight.wait()
+            await completed_callback(event.id)
+
+        for version in range(1, worker_count + 1):
+            await enqueue_committed_event_for_dispatch(EventA(version=version), 1)
+        begin_processing_committed_events(worker_count=4, order_by_aggregate=False)
+        await wait_for(all_in_flight.wait(), 1)
+
+    async def test_worker_pool_preserves_order_by_aggregate(self, *_):
+        dispatched_versions = {1: [], 2: []}
+        in_flight = set()
+        max_concurrency = 0
+
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            nonlocal max_concurrency
+            aggregate_id = event.version % 2 + 1
+            self.assertNotIn(aggregate_id, in_flight)
+            in_flight.add(aggregate_id)
+            max_concurrency = max(max_concurrency, len(in_flight))
+            # Earlier events take longer so they'd finish last without ordering.
+            await sleep(0.01 / event.version)
+            dispatched_versions[aggregate_id].append(event.version)
+            in_flight.remove(aggregate_id)
+
+        for version in range(1, 11):
+            await enqueue_committed_event_for_dispatch(
+                EventA(version=version), version % 2 + 1
+            )
+        begin_processing_committed_events(worker_count=4, order_by_aggregate=True)
+        await stop_processing_committed_events(timeout=1)
+
+        self.assertEqual(dispatched_versions[1], [2, 4, 6, 8, 10])
+        self.assertEqual(dispatched_versions[2], [1, 3, 5, 7, 9])
+        self.assertEqual(max_concurrency, 2)
+
+    async def test_stop_processing_committed_events_drains_queue(self, *_):
+        dispatched = []
+
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            await sleep(0)
+            dispatched.append(event)
+
+        for version in range(1, 6):
+            await enqueue_committed_event_for_dispatch(EventA(version=version), 1)
+        task = begin_processing_committed_events(worker_count=2)
+        await stop_processing_committed_events()
+
+        self.assertEqual(len(dispatched), 5)
+        self.assertTrue(task.cancelled())
+
+    async def test_stop_processing_committed_events_times_out(self, *_):
+        @register_event_dispatcher
+        async def foo(
+            event: VersionedEvent, completed_callback: Callable[[any], Awaitable[None]]
+        ):
+            await Event().wait()
+
+        await enqueue_committed_event_for_dispatch(EventA(version=1), 1)
+        task = begin_processing_committed_events()
+        await stop_processing_committed_events(timeout=0.01)
+
+        self.assertTrue(task.cancelled())
+
+    async def test_register_batch_event_dispatcher_with_wrong_signature_raises_error(
+        self, *_
+    ):
+        with self.assertRaises(EventDispatcherBadSignatureError):
+
+            @register_batch_event_dispatcher
+            async def foo(events):
+                pass
+
+    async def test_batch_and_single_event_dispatchers_are_mutually_exclusive(self, *_):
+        @register_event_dispatcher
+        async def foo(event, completed_callback):
+            pass
+
+        with self.assertRaises(DuplicateEventDispatcherError):
+
+            @register_batch_event_dispatcher
+            async def bar(events, completed_callback):
+                pass
+
+    async def test_batch_event_dispatcher_receives_queued_events_together(self, *_):
+        batches = Queue()
+
+        @register_batch_event_dispatcher
+        async def foo(events: list[VersionedEvent], completed_callback):
+            await batches.put(events)
+            await completed_callback([event.id for event in events])
+
+        for version in range(1, 6):
+            await enqueue_committed_event_for_dispatch(EventA(version=version), 1)
+        with patch.object(
+            event_repository_instance(),
+            "mark_events_handled",
+            wraps=event_repository_instance().mark_events_handled,
+        ) as mark_events_handled:
+            begin_processing_committed_events()
+            batch = await wait_for(batches.get(), 1)
+        self.assertEqual([event.version for event in batch], [1, 2, 3, 4, 5])
+        mark_events_handled.assert_awaited_once_with([event.id for event in batch])
+
+    async def test_batch_size_bounds_batches(self, *_):
+        batch_size = get_event_dispatch_batch_size()
+        set_event_dispatch_batch_size(2)
+        self.addCleanup(set_event_dispatch_batch_size, batch_size)
+        batch_sizes = []
+
+        @register_batch_event_dispatcher
+        async def foo(events: list[VersionedEvent], completed_callback):
+            batch_sizes.append(len(events))
+
+        for version in range(1, 6):
+            await enqueue_committed_event_for_dispatch(EventA(version=version), 1)
+        begin_processing_committed_events()
+        await stop_processing_committed_events(timeout=1)
+        self.assertEqual(batch_sizes, [2, 2, 1])
+
+    async def test_batch_waits_for_linger_time(self, *_):
+        linger = get_event_dispatch_batch_linger_milliseconds()
+        set_event_dispatch_batch_linger_milliseconds(1000)
+        self.addCleanup(set_event_dispatch_batch_linger_milliseconds, linger)
+        batches = Queue()
+
+        @register_batch_event_dispatcher
+        async def foo(events: list[VersionedEvent], completed_callback):
+            await batches.put(events)
+
+        begin_processing_committed_events()
+        await enqueue_committed_event_for_dispatch(EventA(version=1), 1)
+        await sleep(0.01)
+        await enqueue_committed_event_for_dispatch(EventA(version=2), 1)
+        batch = await wait_for(batches.get(), 2)
+        self.assertEqual(len(batch), 2)
+
+    async def test_default_batch_event_dispatcher_marks_successful_events(self, *_):
+        @register_event_handler(EventA)
+        async def handle_event_a(event: EventA):
+            if event.version == 2:
+                raise Exception()
+
+        completed_callback = AsyncMock()
+        events = [EventA(version=version) for version in range(1, 4)]
+        await default_batch_event_dispatcher(events, completed_callback)
+        completed_callback.assert_awaited_once_with([events[0].id, events[2].id])
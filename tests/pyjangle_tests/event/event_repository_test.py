@@ -1,9 +1,11 @@
+import asyncio
 import unittest
 from typing import List
 from unittest.mock import patch
 
 from pyjangle import (
     VersionedEvent,
+    EventRepository,
     RegisterEventRepository,
     EventRepositoryMissingError,
     DuplicateEventRepositoryError,
@@ -49,3 +51,22 @@ class TestEventRepository(unittest.TestCase):
             @RegisterEventRepository
             class B:
                 pass
+
+    def test_mark_events_handled_defaults_to_mark_event_handled(self, *_):
+        marked = []
+
+        class A(EventRepository):
+            async def get_events(self, aggregate_id, current_version=0, batch_size=1):
+                pass  # pragma no cover
+
+            async def commit_events(self, aggregate_id_and_event_tuples):
+                pass  # pragma no cover
+
+            async def mark_event_handled(self, event_id):
+                marked.append(event_id)
+
+            async def get_unhandled_events(self, batch_size, time_delta):
+                pass  # pragma no cover
+
+        asyncio.run(A().mark_events_handled([1, 2, 3]))
+        self.assertEqual(marked, [1, 2, 3])
@@ -0,0 +1,69 @@
+from datetime import timedelta
+import unittest
+
+from pyjangle import DuplicateKeyError, InMemoryEventRepository
+from test_helpers.events import EventA
+
+
+class TestInMemoryEventRepository(unittest.IsolatedAsyncioTestCase):
+    async def test_get_events_returns_events_after_current_version_in_order(self):
+        repo = InMemoryEventRepository()
+        await repo.commit_events([(1, EventA(version=v)) for v in (3, 1, 2)])
+        await repo.commit_events([(1, EventA(version=5)), (2, EventA(version=1))])
+        events = await repo.get_events(1, 2)
+        self.assertEqual([event.version for event in events], [3, 5])
+        self.assertEqual(len(await repo.get_events(1)), 4)
+        self.assertEqual(await repo.get_events(1, 5), [])
+        self.assertEqual(await repo.get_events(3), [])
+
+    async def test_out_of_order_commit_keeps_events_sorted(self):
+        repo = InMemoryEventRepository()
+        await repo.commit_events([(1, EventA(version=v)) for v in (1, 4)])
+        await repo.commit_events([(1, EventA(version=2))])
+        events = await repo.get_events(1)
+        self.assertEqual([event.version for event in events], [1, 2, 4])
+
+    async def test_duplicate_version_raises_and_commits_nothing(self):
+        repo = InMemoryEventRepository()
+        await repo.commit_events([(1, EventA(version=1)), (1, EventA(version=2))])
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_events([(2, EventA(version=1)), (1, EventA(version=1))])
+        self.assertEqual(await repo.get_events(2), [])
+        self.assertEqual(len(await repo.get_events(1)), 2)
+
+    async def test_duplicate_version_within_commit_raises(self):
+        repo = InMemoryEventRepository()
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_events([(1, EventA(version=1)), (1, EventA(version=1))])
+        self.assertEqual(await repo.get_events(1), [])
+
+    async def test_same_version_on_different_aggregates_is_allowed(self):
+        repo = InMemoryEventRepository()
+        await repo.commit_events([(1, EventA(version=1)), (2, EventA(version=1))])
+        self.assertEqual(len(await repo.get_events(1)), 1)
+        self.assertEqual(len(await repo.get_events(2)), 1)
+
+    async def test_events_marked_handled_while_iterating_are_skipped(self):
+        repo = InMemoryEventRepository()
+        events = [EventA(version=v) for v in (1, 2, 3)]
+        await repo.commit_events([(1, event) for event in events])
+        unhandled = []
+        async for event in repo.get_unhandled_events(
+            batch_size=100, time_delta=timedelta(seconds=-1)
+        ):
+            unhandled.append(event)
+            await repo.mark_event_handled(events[2].id)
+        self.assertEqual(unhandled, events[:2])
+
+    async def test_mark_events_handled(self):
+        repo = InMemoryEventRepository()
+        events = [EventA(version=v) for v in (1, 2, 3)]
+        await repo.commit_events([(1, event) for event in events])
+        await repo.mark_events_handled([events[0].id, events[2].id, "missing"])
+        unhandled = [
+            event
+            async for event in repo.get_unhandled_events(
+                batch_size=100, time_delta=timedelta(seconds=-1)
+            )
+        ]
+        self.assertEqual(unhandled, [events[1]])
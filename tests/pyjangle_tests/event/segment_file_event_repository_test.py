@@ -0,0 +1,289 @@
+import asyncio
+from datetime import timedelta
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from pyjangle import (
+    DuplicateKeyError,
+    SegmentFileEventRepository,
+    SegmentFileEventRepositoryError,
+    handle_command,
+)
+from pyjangle.event import segment_file_event_repository
+import test_helpers.aggregates
+from test_helpers.commands import CommandThatShouldSucceedA
+from test_helpers.events import EventA
+from test_helpers.registration_paths import EVENT_REPO
+from test_helpers.reset import ResetPyJangleState
+
+FSYNC_AND_CLOSE = "pyjangle.event.segment_file_event_repository._fsync_and_close"
+FSYNC_DIRECTORY = "pyjangle.event.segment_file_event_repository._fsync_directory"
+
+
+async def _versions(events) -> list[int]:
+    return [event.version async for event in events]
+
+
+async def _unhandled(repo: SegmentFileEventRepository) -> list:
+    return [
+        event
+        async for event in repo.get_unhandled_events(
+            batch_size=100, time_delta=timedelta(seconds=-1)
+        )
+    ]
+
+
+async def _finish_background_tasks():
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@ResetPyJangleState
+class TestSegmentFileEventRepository(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self._repos = []
+
+    def tearDown(self) -> None:
+        for repo in self._repos:
+            repo.close()
+        self._directory.cleanup()
+
+    def open(self, **kwargs) -> SegmentFileEventRepository:
+        kwargs.setdefault("directory", self.directory)
+        repo = SegmentFileEventRepository(**kwargs)
+        self._repos.append(repo)
+        return repo
+
+    def reopen(self, repo: SegmentFileEventRepository, **kwargs):
+        repo.close()
+        return self.open(**kwargs)
+
+    async def test_get_events_returns_events_after_current_version_in_order(self, *_):
+        repo = self.open()
+        await repo.commit_events([(1, EventA(version=v)) for v in (3, 1, 2)])
+        await repo.commit_events([(1, EventA(version=5)), ("b", EventA(version=1))])
+        self.assertEqual(await _versions(repo.get_events(1, 2)), [3, 5])
+        self.assertEqual(await _versions(repo.get_events(1)), [1, 2, 3, 5])
+        self.assertEqual(await _versions(repo.get_events(1, 5)), [])
+        self.assertEqual(await _versions(repo.get_events("b")), [1])
+        self.assertEqual(await _versions(repo.get_events(3)), [])
+
+    async def test_events_recovered_when_reopened(self, *_):
+        repo = self.open()
+        events = [EventA(version=v) for v in (1, 2)]
+        await repo.commit_events([(1, event) for event in events])
+        repo = self.reopen(repo)
+        self.assertEqual([event async for event in repo.get_events(1)], events)
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_events([(1, EventA(version=2))])
+        await repo.commit_events([(1, EventA(version=3))])
+        repo = self.reopen(repo)
+        self.assertEqual(await _versions(repo.get_events(1)), [1, 2, 3])
+
+    async def test_duplicate_version_raises_and_commits_nothing(self, *_):
+        repo = self.open()
+        await repo.commit_events([(1, EventA(version=1)), (1, EventA(version=2))])
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_events([(2, EventA(version=1)), (1, EventA(version=1))])
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_events([(2, EventA(version=1)), (2, EventA(version=1))])
+        repo = self.reopen(repo)
+        self.assertEqual(await _versions(repo.get_events(2)), [])
+        self.assertEqual(await _versions(repo.get_events(1)), [1, 2])
+
+    async def test_handled_events_recovered_when_reopened(self, *_):
+        repo = self.open()
+        events = [EventA(version=v) for v in (1, 2, 3, 4)]
+        await repo.commit_events([(1, event) for event in events])
+        await repo.mark_event_handled(events[0].id)
+        await repo.mark_events_handled([events[2].id, "unknown"])
+        self.assertEqual(await _unhandled(repo), [events[1], events[3]])
+        self.assertEqual(await repo.estimate_unhandled_event_count(timedelta()), 2)
+        repo = self.reopen(repo)
+        self.assertEqual(await _unhandled(repo), [events[1], events[3]])
+        # The events aren't old enough to be considered unhandled yet.
+        events = repo.get_unhandled_events(100, timedelta(hours=1))
+        self.assertEqual([event async for event in events], [])
+
+    async def test_segments_rolled_over(self, *_):
+        repo = self.open(max_segment_bytes=512)
+        for version in range(1, 21):
+            await repo.commit_events([(1, EventA(version=version))])
+        segment_count = len(
+            [name for name in os.listdir(self.directory) if name.endswith(".segment")]
+        )
+        self.assertGreater(segment_count, 1)
+        self.assertEqual(await _versions(repo.get_events(1)), list(range(1, 21)))
+        repo = self.reopen(repo, max_segment_bytes=512)
+        self.assertEqual(await _versions(repo.get_events(1, 10)), list(range(11, 21)))
+        self.assertEqual(len(await _unhandled(repo)), 20)
+
+    async def test_segments_sealed_without_blocking_event_loop(self, *_):
+        repo = self.open(max_segment_bytes=1)
+        fsync_threads = set()
+        os_fsync = os.fsync
+
+        def fsync(fd):
+            fsync_threads.add(threading.current_thread())
+            os_fsync(fd)
+
+        with patch("os.fsync", fsync):
+            await asyncio.gather(
+                *[repo.commit_events([(1, EventA(version=v))]) for v in range(1, 6)]
+            )
+        self.assertNotIn(threading.current_thread(), fsync_threads)
+        self.assertEqual(len(repo._segments), 5)
+        repo = self.reopen(repo, max_segment_bytes=1)
+        self.assertEqual(await _versions(repo.get_events(1)), [1, 2, 3, 4, 5])
+
+    async def test_directory_synced_when_segments_created(self, *_):
+        with patch(
+            FSYNC_DIRECTORY, wraps=segment_file_event_repository._fsync_directory
+        ) as fsync_directory:
+            directory = os.path.join(self.directory, "events")
+            repo = self.open(directory=directory, max_segment_bytes=1)
+            self.assertEqual(
+                [call.args[0] for call in fsync_directory.call_args_list],
+                [self.directory, directory],
+            )
+            fsync_directory.reset_mock()
+            await repo.commit_events([(1, EventA(version=1))])
+            fsync_directory.assert_not_called()
+            await repo.commit_events([(1, EventA(version=2))])
+            fsync_directory.assert_called_once_with(directory)
+            repo.close()
+            fsync_directory.reset_mock()
+            repo = self.open(directory=directory, max_segment_bytes=1, fsync=False)
+            await repo.commit_events([(1, EventA(version=3))])
+            fsync_directory.assert_not_called()
+
+    async def test_incomplete_record_truncated_when_reopened(self, *_):
+        repo = self.open()
+        await repo.commit_events([(1, EventA(version=1))])
+        await repo.commit_events([(1, EventA(version=2)), (2, EventA(version=1))])
+        repo.close()
+        path = os.path.join(self.directory, "0000000000.segment")
+        # Simulate a crash part way through writing the last record.
+        os.truncate(path, os.path.getsize(path) - 5)
+        with self.assertLogs(level="WARNING"):
+            repo = self.open()
+        self.assertEqual(await _versions(repo.get_events(1)), [1])
+        self.assertEqual(await _versions(repo.get_events(2)), [])
+        await repo.commit_events([(1, EventA(version=2))])
+        repo = self.reopen(repo)
+        self.assertEqual(await _versions(repo.get_events(1)), [1, 2])
+
+    async def test_corrupt_record_in_sealed_segment_raises(self, *_):
+        repo = self.open(max_segment_bytes=256)
+        for version in range(1, 6):
+            await repo.commit_events([(1, EventA(version=version))])
+        repo.close()
+        path = os.path.join(self.directory, "0000000000.segment")
+        with open(path, "r+b") as file:
+            file.seek(-3, os.SEEK_END)
+            file.write(b"\xff\xff\xff")
+        with self.assertRaises(SegmentFileEventRepositoryError):
+            self.open(max_segment_bytes=256)
+
+    async def test_concurrent_commits_share_fsync(self, *_):
+        repo = self.open()
+        with patch("os.fsync", wraps=os.fsync) as fsync:
+            await asyncio.gather(
+                *[repo.commit_events([(id, EventA(version=1))]) for id in range(20)]
+            )
+        self.assertLess(fsync.call_count, 20)
+        self.assertEqual(await _versions(repo.get_events(19)), [1])
+
+    async def test_events_indexed_once_synced(self, *_):
+        repo = self.open()
+        fsync_started = threading.Event()
+        release_fsync = threading.Event()
+
+        def fsync_and_close(fd):
+            fsync_started.set()
+            release_fsync.wait(5)
+            os.close(fd)
+
+        with patch(FSYNC_AND_CLOSE, fsync_and_close):
+            commit = asyncio.create_task(repo.commit_events([(1, EventA(version=1))]))
+            await asyncio.to_thread(fsync_started.wait, 5)
+            self.assertEqual(await _versions(repo.get_events(1)), [])
+            self.assertEqual(await _unhandled(repo), [])
+            with self.assertRaises(DuplicateKeyError):
+                await repo.commit_events([(1, EventA(version=1))])
+            release_fsync.set()
+            await commit
+        self.assertEqual(await _versions(repo.get_events(1)), [1])
+        self.assertEqual(len(await _unhandled(repo)), 1)
+
+    async def cancel_commit_while_syncing(self, repo, sync_fails: bool):
+        fsync_started = threading.Event()
+        release_fsync = threading.Event()
+
+        def fsync_and_close(fd):
+            fsync_started.set()
+            release_fsync.wait(5)
+            os.close(fd)
+            if sync_fails:
+                raise OSError()
+
+        with patch(FSYNC_AND_CLOSE, fsync_and_close):
+            commit = asyncio.create_task(repo.commit_events([(1, EventA(version=1))]))
+            await asyncio.to_thread(fsync_started.wait, 5)
+            commit.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await commit
+            self.assertEqual(await _versions(repo.get_events(1)), [])
+            self.assertEqual(await _unhandled(repo), [])
+            with self.assertRaises(DuplicateKeyError):
+                await repo.commit_events([(1, EventA(version=1))])
+            release_fsync.set()
+            await _finish_background_tasks()
+
+    async def test_cancelled_commit_applied_once_synced(self, *_):
+        repo = self.open()
+        await self.cancel_commit_while_syncing(repo, sync_fails=False)
+        self.assertEqual(await _versions(repo.get_events(1)), [1])
+        self.assertEqual(len(await _unhandled(repo)), 1)
+
+    async def test_cancelled_commit_not_applied_when_sync_fails(self, *_):
+        repo = self.open()
+        await self.cancel_commit_while_syncing(repo, sync_fails=True)
+        self.assertEqual(await _versions(repo.get_events(1)), [])
+        self.assertEqual(await _unhandled(repo), [])
+        with self.assertRaises(SegmentFileEventRepositoryError):
+            await repo.commit_events([(1, EventA(version=2))])
+
+    async def test_failed_sync_leaves_events_unindexed(self, *_):
+        repo = self.open()
+
+        def fsync_and_close(fd):
+            os.close(fd)
+            raise OSError()
+
+        with patch(FSYNC_AND_CLOSE, fsync_and_close):
+            with self.assertRaises(SegmentFileEventRepositoryError):
+                await repo.commit_events([(1, EventA(version=1))])
+        self.assertEqual(await _versions(repo.get_events(1)), [])
+        with self.assertRaises(SegmentFileEventRepositoryError):
+            await repo.commit_events([(1, EventA(version=2))])
+
+    async def test_directory_can_only_be_opened_once(self, *_):
+        repo = self.open()
+        with self.assertRaises(SegmentFileEventRepositoryError):
+            self.open()
+        repo = self.reopen(repo)
+        await repo.commit_events([(1, EventA(version=1))])
+
+    async def test_handle_command(self, *_):
+        repo = self.open(fsync=False)
+        with patch(EVENT_REPO, repo):
+            for _ in range(3):
+                response = await handle_command(CommandThatShouldSucceedA())
+                self.assertTrue(response.is_success)
+        self.assertEqual(await _versions(repo.get_events(1)), [1, 2, 3])
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyjangle import (
+    SnowflakeEventIdFactory,
+    register_event_id_factory,
+    event_id_factory_instance,
+)
+from test_helpers.reset import ResetPyJangleState
+
+TIME_NS = "pyjangle.event.snowflake_event_id_factory.time.time_ns"
+NOW_NS = int(datetime(2024, 5, 6, tzinfo=timezone.utc).timestamp()) * 1_000_000_000
+
+
+class TestSnowflakeEventIdFactory(TestCase):
+    def test_ids_increase_and_embed_time_and_node(self):
+        factory = SnowflakeEventIdFactory(node_id=5)
+        ids = [factory() for _ in range(10000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertTrue(all(SnowflakeEventIdFactory.node_id_of(id) == 5 for id in ids))
+        self.assertLess(
+            abs(
+                SnowflakeEventIdFactory.timestamp_of(ids[0])
+                - datetime.now(timezone.utc)
+            ),
+            timedelta(seconds=5),
+        )
+        self.assertLess(ids[-1], 2**63)
+
+    def test_ids_increase_when_clock_stalls_or_moves_backwards(self):
+        factory = SnowflakeEventIdFactory(node_id=1)
+        with patch(TIME_NS, return_value=NOW_NS):
+            ids = [factory() for _ in range(5000)]
+        with patch(TIME_NS, return_value=NOW_NS - 10_000_000_000):
+            ids.append(factory())
+        self.assertEqual(ids, sorted(set(ids)))
+        # 4096 ids fit in a millisecond, after which the next millisecond is borrowed.
+        self.assertEqual(
+            SnowflakeEventIdFactory.timestamp_of(ids[-1])
+            - datetime(2024, 5, 6, tzinfo=timezone.utc),
+            timedelta(milliseconds=1),
+        )
+
+    def test_allocate_reserves_consecutive_ids(self):
+        factory = SnowflakeEventIdFactory(node_id=0)
+        with patch(TIME_NS, return_value=NOW_NS):
+            first = factory.allocate(4000)
+            second = factory.allocate(200)
+        self.assertEqual(len(first), 4000)
+        self.assertGreater(second.start, first[-1])
+        with self.assertRaises(ValueError):
+            factory.allocate(5000)
+
+    def test_lower_bound(self):
+        factory = SnowflakeEventIdFactory(node_id=1023)
+        with patch(TIME_NS, return_value=NOW_NS):
+            id = factory()
+        at = datetime(2024, 5, 6, tzinfo=timezone.utc)
+        self.assertLessEqual(SnowflakeEventIdFactory.lower_bound(at), id)
+        self.assertGreater(
+            SnowflakeEventIdFactory.lower_bound(at + timedelta(milliseconds=1)), id
+        )
+
+    def test_node_id(self):
+        with self.assertRaises(ValueError):
+            SnowflakeEventIdFactory(node_id=1024)
+        with patch("pyjangle.settings._event_id_node_id", 7):
+            self.assertEqual(
+                SnowflakeEventIdFactory.node_id_of(SnowflakeEventIdFactory()()), 7
+            )
+
+    @ResetPyJangleState
+    def test_can_be_registered(self, *_):
+        register_event_id_factory(SnowflakeEventIdFactory())
+        self.assertIsInstance(event_id_factory_instance()(), int)
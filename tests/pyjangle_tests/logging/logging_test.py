@@ -0,0 +1,43 @@
+import logging
+import unittest
+from unittest.mock import Mock
+
+from pyjangle import LogToggles, is_log_enabled, log
+
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.original_level = logging.root.level
+        self.addCleanup(logging.root.setLevel, self.original_level)
+
+    def test_when_level_disabled_then_payload_not_built(self):
+        logging.root.setLevel(logging.INFO)
+        payload = Mock()
+        log(LogToggles.post_new_event, "message", lambda: payload(), lazy=True)
+        payload.assert_not_called()
+        self.assertFalse(is_log_enabled(LogToggles.post_new_event))
+
+    def test_when_level_enabled_then_payload_built_and_logged(self):
+        logging.root.setLevel(logging.DEBUG)
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            log(
+                LogToggles.post_new_event,
+                "message",
+                lambda: {"key": "value"},
+                lazy=True,
+            )
+        self.assertTrue(is_log_enabled(LogToggles.post_new_event))
+        self.assertEqual(logs.records[0].args, {"key": "value"})
+
+    def test_non_function_arguments_are_logged_as_is(self):
+        with self.assertLogs(level=logging.ERROR) as logs:
+            log(LogToggles.event_dispatching_error, "message %s", dict)
+        self.assertEqual(logs.records[0].args, (dict,))
+
+    def test_functions_logged_as_is_unless_lazy(self):
+        def handler():
+            raise AssertionError("Called")
+
+        with self.assertLogs(level=logging.ERROR) as logs:
+            log(LogToggles.event_dispatching_error, "message %s", handler)
+        self.assertEqual(logs.records[0].args, (handler,))
@@ -0,0 +1,47 @@
+import unittest
+
+from pyjangle import Histogram, HistogramMetricsSink
+
+
+class TestHistogram(unittest.TestCase):
+    def test_empty_histogram(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.count, 0)
+        self.assertIsNone(histogram.mean)
+        self.assertIsNone(histogram.percentile(50))
+
+    def test_percentiles_within_five_percent(self):
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.record(value / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.min, 0.001)
+        self.assertEqual(histogram.max, 1.0)
+        for percentile in (50, 95, 99):
+            expected = percentile / 100
+            self.assertAlmostEqual(
+                histogram.percentile(percentile), expected, delta=expected * 0.05
+            )
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_zero_values(self):
+        histogram = Histogram()
+        histogram.record(0)
+        histogram.record(0)
+        histogram.record(5)
+        self.assertEqual(histogram.percentile(50), 0)
+        self.assertEqual(histogram.percentile(100), 5)
+
+
+class TestHistogramMetricsSink(unittest.TestCase):
+    def test_records_and_resets(self):
+        sink = HistogramMetricsSink()
+        sink.record_duration("duration", 0.5)
+        sink.record_count("count", 3)
+        sink.record_count("count", 1)
+        summary = sink.to_dict()
+        self.assertEqual(summary["duration"]["count"], 1)
+        self.assertEqual(summary["count"]["sum"], 4)
+        self.assertEqual(summary["count"]["max"], 3)
+        sink.reset()
+        self.assertEqual(sink.to_dict(), dict())
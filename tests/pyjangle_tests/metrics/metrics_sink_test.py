@@ -0,0 +1,66 @@
+import unittest
+
+from pyjangle import (
+    DuplicateMetricsSinkError,
+    HistogramMetricsSink,
+    Metrics,
+    begin_processing_committed_events,
+    drain_committed_events,
+    handle_command,
+    metrics_sink_instance,
+    register_event_dispatcher,
+    register_metrics_sink,
+    stop_processing_committed_events,
+)
+import test_helpers.aggregates
+from test_helpers.commands import CommandThatShouldSucceedA, CommandThatShouldSucceedB
+from test_helpers.reset import ResetPyJangleState
+
+
+@ResetPyJangleState
+class TestMetricsSink(unittest.IsolatedAsyncioTestCase):
+    async def test_register_metrics_sink(self, *_):
+        self.assertIsNone(metrics_sink_instance())
+        sink = register_metrics_sink(HistogramMetricsSink())
+        self.assertIs(metrics_sink_instance(), sink)
+
+    async def test_register_multiple_metrics_sinks_then_error(self, *_):
+        register_metrics_sink(HistogramMetricsSink())
+        with self.assertRaises(DuplicateMetricsSinkError):
+            register_metrics_sink(HistogramMetricsSink())
+
+    async def test_handle_command_reports_phases(self, *_):
+        sink = register_metrics_sink(HistogramMetricsSink())
+        await handle_command(CommandThatShouldSucceedA())
+        await handle_command(CommandThatShouldSucceedA())
+        summary = sink.to_dict()
+        for name in (
+            Metrics.command_total,
+            Metrics.command_snapshot_fetch,
+            Metrics.command_event_fetch,
+            Metrics.command_replay,
+            Metrics.command_validation,
+            Metrics.command_commit,
+        ):
+            self.assertEqual(summary[name]["count"], 2, name)
+        # The snapshot frequency of the aggregate is 2.
+        self.assertEqual(summary[Metrics.command_snapshot_write]["count"], 1)
+        self.assertEqual(summary[Metrics.command_events_replayed]["sum"], 1)
+        self.assertEqual(summary[Metrics.command_events_committed]["sum"], 2)
+        self.assertNotIn(Metrics.command_conflicts, summary)
+        self.assertNotIn(Metrics.command_enqueue_for_dispatch, summary)
+
+    async def test_event_dispatch_reported(self, *_):
+        @register_event_dispatcher
+        async def dispatcher(event, completed_callback):
+            await completed_callback(event.id)
+
+        sink = register_metrics_sink(HistogramMetricsSink())
+        begin_processing_committed_events()
+        await handle_command(CommandThatShouldSucceedB())
+        await drain_committed_events()
+        await stop_processing_committed_events()
+        summary = sink.to_dict()
+        self.assertEqual(summary[Metrics.command_enqueue_for_dispatch]["count"], 1)
+        self.assertEqual(summary[Metrics.event_dispatch]["count"], 1)
+        self.assertEqual(summary[Metrics.events_dispatched]["sum"], 1)
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import unittest
+
+from pyjangle import DuplicateKeyError, InMemorySagaRepository
+from test_helpers.events import EventThatContinuesSaga
+from test_helpers.sagas import SagaForTestingRetryLogic
+
+
+def _saga(saga_id, retry_at=None, timeout_at=None, events=[]):
+    saga = SagaForTestingRetryLogic(
+        saga_id=saga_id, retry_at=retry_at, timeout_at=timeout_at
+    )
+    saga.new_events = list(events)
+    return saga
+
+
+class TestInMemorySagaRepository(unittest.IsolatedAsyncioTestCase):
+    async def test_duplicate_event_ids_raise_and_commit_nothing(self):
+        repo = InMemorySagaRepository()
+        event = EventThatContinuesSaga(version=1)
+        await repo.commit_saga(_saga(1, events=[event]))
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_saga(
+                _saga(1, events=[EventThatContinuesSaga(version=2), event])
+            )
+        with self.assertRaises(DuplicateKeyError):
+            await repo.commit_saga(_saga(2, events=[event, event]))
+        self.assertEqual(len((await repo.get_saga(1)).flags), 1)
+        self.assertIsNone(await repo.get_saga(2))
+
+    async def test_retry_saga_ids_ordered_by_retry_at_and_limited_by_batch_size(self):
+        repo = InMemorySagaRepository()
+        now = datetime.now()
+        for saga_id, minutes in [(1, 3), (2, 1), (3, 2), (4, -1)]:
+            await repo.commit_saga(
+                _saga(saga_id, retry_at=now - timedelta(minutes=minutes))
+            )
+        self.assertEqual(await repo.get_retry_saga_ids(2), [1, 3])
+        self.assertEqual(await repo.get_retry_saga_ids(10), [1, 3, 2])
+
+    async def test_recommitted_saga_moves_within_retry_index(self):
+        repo = InMemorySagaRepository()
+        await repo.commit_saga(_saga(1, retry_at=datetime.min))
+        await repo.commit_saga(_saga(2, retry_at=datetime.min))
+        await repo.commit_saga(_saga(1, retry_at=datetime.now() + timedelta(hours=1)))
+        self.assertEqual(await repo.get_retry_saga_ids(10), [2])
+        await repo.commit_saga(_saga(1, retry_at=datetime.min))
+        self.assertEqual(await repo.get_retry_saga_ids(10), [2, 1])
+
+    async def test_retry_saga_ids_paged_with_after_id(self):
+        repo = InMemorySagaRepository()
+        for saga_id in range(5):
+            await repo.commit_saga(_saga(saga_id, retry_at=datetime.min))
+        self.assertEqual(await repo.get_retry_saga_ids(2), [0, 1])
+        # Recommitting a saga that stays due doesn't move it past the cursor.
+        await repo.commit_saga(_saga(1, retry_at=datetime.min))
+        self.assertEqual(await repo.get_retry_saga_ids(2, after_id=1), [2, 3])
+        completed = _saga(3, retry_at=datetime.min)
+        completed.set_complete()
+        await repo.commit_saga(completed)
+        self.assertEqual(await repo.get_retry_saga_ids(2, after_id=3), [4])
+        self.assertEqual(await repo.get_retry_saga_ids(2, after_id=4), [])
+        self.assertEqual(await repo.get_retry_saga_ids(10), [0, 1, 2, 4])
+
+    async def test_completed_and_timed_out_sagas_leave_retry_index(self):
+        repo = InMemorySagaRepository()
+        for saga_id in range(3):
+            await repo.commit_saga(_saga(saga_id, retry_at=datetime.min))
+        completed = _saga(0, retry_at=datetime.min)
+        completed.set_complete()
+        await repo.commit_saga(completed)
+        timed_out = _saga(1, retry_at=datetime.min)
+        timed_out.set_timed_out()
+        await repo.commit_saga(timed_out)
+        await repo.commit_saga(_saga(3, retry_at=datetime.min, timeout_at=datetime.min))
+        self.assertEqual(await repo.get_retry_saga_ids(10), [2])
+        self.assertEqual(repo._retry_index_entries.keys(), {2})
@@ -8,6 +8,7 @@ from pyjangle import (
     CommandResponse,
     SagaRepositoryMissingError,
     begin_retry_sagas_loop,
+    retry_sagas,
     saga_repository_instance,
 )
 from test_helpers.events import EventThatContinuesSaga
@@ -76,3 +77,112 @@ class TestSagaDaemon(IsolatedAsyncioTestCase):
         with patch(SAGA_REPO, new=None):
             with self.assertRaises(SagaRepositoryMissingError):
                 begin_retry_sagas_loop(0)
+
+
+@ResetPyJangleState
+class TestRetrySagas(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.retried_saga_ids = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _commit_sagas_that_need_retry(self):
+        # Patches applied by ResetPyJangleState aren't active during setUp.
+        for saga_id in range(10):
+            await saga_repository_instance().commit_saga(
+                SagaForTestingRetryLogic(saga_id=saga_id, retry_at=datetime.min)
+            )
+
+    async def _retry_saga(self, saga_id):
+        "Completes the saga so that it's no longer eligible for a retry."
+        self.retried_saga_ids.append(saga_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        saga = await saga_repository_instance().get_saga(saga_id)
+        saga.set_complete()
+        await saga_repository_instance().commit_saga(saga)
+        self.in_flight -= 1
+
+    async def test_sagas_retried_concurrently_across_pages(self, *_):
+        await self._commit_sagas_that_need_retry()
+        with patch("pyjangle.saga.saga_daemon.retry_saga", new=self._retry_saga):
+            count = await retry_sagas(max_batch_size=4, max_concurrency=3)
+        self.assertEqual(count, 10)
+        self.assertEqual(sorted(self.retried_saga_ids), list(range(10)))
+        self.assertEqual(self.max_in_flight, 3)
+
+    async def test_saga_not_retried_while_already_in_flight(self, *_):
+        await self._commit_sagas_that_need_retry()
+        with patch("pyjangle.saga.saga_daemon.retry_saga", new=self._retry_saga):
+            await asyncio.gather(
+                retry_sagas(max_batch_size=100, max_concurrency=10),
+                retry_sagas(max_batch_size=100, max_concurrency=10),
+            )
+        self.assertEqual(sorted(self.retried_saga_ids), list(range(10)))
+
+    async def test_sagas_that_remain_eligible_are_retried_once_per_call(self, *_):
+        await self._commit_sagas_that_need_retry()
+
+        async def retry_saga(saga_id):
+            self.retried_saga_ids.append(saga_id)
+
+        with patch("pyjangle.saga.saga_daemon.retry_saga", new=retry_saga):
+            await retry_sagas(max_batch_size=100)
+        self.assertEqual(sorted(self.retried_saga_ids), list(range(10)))
+
+    async def test_sagas_past_first_page_retried_when_first_page_keeps_failing(
+        self, *_
+    ):
+        await self._commit_sagas_that_need_retry()
+
+        async def retry_saga(saga_id):
+            if saga_id in (0, 1):
+                # Leaves the saga due for a retry.
+                self.retried_saga_ids.append(saga_id)
+                raise Exception()
+            await self._retry_saga(saga_id)
+
+        with patch("pyjangle.saga.saga_daemon.retry_saga", new=retry_saga):
+            with self.assertLogs(level="ERROR"):
+                count = await retry_sagas(max_batch_size=2)
+        self.assertEqual(count, 10)
+        self.assertEqual(sorted(self.retried_saga_ids), list(range(10)))
+
+    async def test_pages_requested_with_cursor(self, *_):
+        await self._commit_sagas_that_need_retry()
+        repo = saga_repository_instance()
+        get_retry_saga_ids = repo.get_retry_saga_ids
+        requests = []
+
+        async def spy(batch_size, after_id=None):
+            requests.append((batch_size, after_id))
+            return await get_retry_saga_ids(batch_size, after_id=after_id)
+
+        async def retry_saga(saga_id):
+            # Leaves the saga due for a retry.
+            self.retried_saga_ids.append(saga_id)
+
+        with patch.object(repo, "get_retry_saga_ids", spy):
+            with patch("pyjangle.saga.saga_daemon.retry_saga", new=retry_saga):
+                count = await retry_sagas(max_batch_size=4)
+        self.assertEqual(count, 10)
+        self.assertEqual(self.retried_saga_ids, list(range(10)))
+        self.assertEqual(requests, [(4, None), (4, 3), (4, 7), (4, 9)])
+
+    async def test_repository_without_cursor_still_paged(self, *_):
+        await self._commit_sagas_that_need_retry()
+        repo = saga_repository_instance()
+        get_retry_saga_ids = repo.get_retry_saga_ids
+
+        async def without_cursor(batch_size):
+            return await get_retry_saga_ids(batch_size)
+
+        async def retry_saga(saga_id):
+            self.retried_saga_ids.append(saga_id)
+
+        with patch.object(repo, "get_retry_saga_ids", without_cursor):
+            with patch("pyjangle.saga.saga_daemon.retry_saga", new=retry_saga):
+                count = await retry_sagas(max_batch_size=4)
+        self.assertEqual(count, 10)
+        self.assertEqual(sorted(self.retried_saga_ids), list(range(10)))
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+from pyjangle import (
+    SagaRetryScheduler,
+    begin_saga_retry_scheduler,
+    handle_saga_event,
+    saga_retry_scheduler_instance,
+)
+from test_helpers.events import EventThatCausesSagaToRetry, EventThatCompletesSaga
+from test_helpers.reset import ResetPyJangleState
+from test_helpers.sagas import SagaForTesting
+
+
+def _saga(saga_id, retry_at=None, timeout_at=None, is_complete=False):
+    return SimpleNamespace(
+        saga_id=saga_id,
+        retry_at=retry_at,
+        timeout_at=timeout_at,
+        is_complete=is_complete,
+        is_timed_out=False,
+    )
+
+
+class TestSagaRetryScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.scheduler = SagaRetryScheduler()
+        self.retried = asyncio.Queue()
+        self.task = asyncio.create_task(self.scheduler.run(self.retried.put))
+        await asyncio.sleep(0)
+
+    async def asyncTearDown(self) -> None:
+        self.task.cancel()
+        await asyncio.wait([self.task])
+
+    async def test_schedule_ignored_when_not_running(self):
+        scheduler = SagaRetryScheduler()
+        scheduler.schedule(_saga(1, retry_at=datetime.min))
+        self.assertEqual(len(scheduler), 0)
+
+    async def test_sagas_retried_in_deadline_order(self):
+        now = datetime.now()
+        self.scheduler.schedule(_saga(1, retry_at=now + timedelta(milliseconds=30)))
+        self.scheduler.schedule(_saga(2, timeout_at=now + timedelta(milliseconds=10)))
+        self.scheduler.schedule(
+            _saga(
+                3,
+                retry_at=now + timedelta(hours=1),
+                timeout_at=now + timedelta(milliseconds=20),
+            )
+        )
+        retried = [await asyncio.wait_for(self.retried.get(), 1) for _ in range(3)]
+        self.assertEqual(retried, [2, 3, 1])
+        self.assertEqual(len(self.scheduler), 0)
+
+    async def test_rescheduling_replaces_previous_deadline(self):
+        self.scheduler.schedule(_saga(1, retry_at=datetime.now() + timedelta(hours=1)))
+        self.scheduler.schedule(_saga(1, retry_at=datetime.min))
+        self.assertEqual(await asyncio.wait_for(self.retried.get(), 1), 1)
+        self.assertEqual(len(self.scheduler), 0)
+
+    async def test_completed_and_unscheduled_sagas_not_retried(self):
+        self.scheduler.schedule(_saga(1, retry_at=datetime.min))
+        self.scheduler.schedule(_saga(1, retry_at=datetime.min, is_complete=True))
+        self.scheduler.schedule(_saga(2, retry_at=datetime.min))
+        self.scheduler.unschedule(2)
+        self.scheduler.schedule(_saga(3, retry_at=datetime.min))
+        self.assertEqual(await asyncio.wait_for(self.retried.get(), 1), 3)
+        self.assertTrue(self.retried.empty())
+
+
+@ResetPyJangleState
+class TestBeginSagaRetryScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_committed_saga_retried_at_deadline(self, *_):
+        retried = asyncio.Queue()
+
+        async def retry_saga(saga_id):
+            await retried.put(saga_id)
+
+        with patch("pyjangle.saga.saga_daemon.retry_saga", new=retry_saga):
+            task = begin_saga_retry_scheduler()
+            await asyncio.sleep(0)
+            await handle_saga_event(
+                42, EventThatCausesSagaToRetry(version=1), SagaForTesting
+            )
+            self.assertEqual(await asyncio.wait_for(retried.get(), 1), 42)
+            task.cancel()
+            await asyncio.wait([task])
+
+    async def test_completed_saga_removed_from_schedule(self, *_):
+        task = begin_saga_retry_scheduler()
+        await asyncio.sleep(0)
+        saga_retry_scheduler_instance().schedule(
+            _saga(42, retry_at=datetime.now() + timedelta(hours=1))
+        )
+        self.assertEqual(len(saga_retry_scheduler_instance()), 1)
+        await handle_saga_event(42, EventThatCompletesSaga(version=1), SagaForTesting)
+        self.assertEqual(len(saga_retry_scheduler_instance()), 0)
+        task.cancel()
+        await asyncio.wait([task])
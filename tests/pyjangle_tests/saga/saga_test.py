@@ -335,3 +335,39 @@ class TestSaga(unittest.IsolatedAsyncioTestCase):
         )
         a.set_timed_out()
         self.assertTrue(a.is_timed_out)
+
+    async def test_event_receiver_maps_compiled_once_per_class(self):
+        class A(Saga):
+            @reconstitute_saga_state(EventThatContinuesSaga)
+            def from_event_that_continues_saga(self, event: EventThatContinuesSaga):
+                pass
+
+            @reconstitute_saga_state(EventThatCompletesSaga)
+            def from_event_that_completes_saga(self, event: EventThatCompletesSaga):
+                pass
+
+            @event_receiver(
+                EventThatContinuesSaga, skip_if_any_flags_set=[EventThatCompletesSaga]
+            )
+            async def on_event_that_continues_saga(self):
+                self.received = True
+
+        self.assertEqual(
+            A._event_type_to_event_receiver_instance_method.keys(),
+            {EventThatContinuesSaga},
+        )
+        self.assertEqual(Saga._event_type_to_event_receiver_instance_method, {})
+        receivers = A._event_type_to_event_receiver_instance_method
+        with self.assertRaises(TypeError):
+            receivers[EventThatCompletesSaga] = None
+        a = A(saga_id=1)
+        self.assertNotIn("_event_type_to_event_receiver_instance_method", vars(a))
+        await a.evaluate(EventThatContinuesSaga(id=1, version=1))
+        self.assertTrue(a.received)
+        skipped = A(
+            saga_id=2,
+            events=[EventThatCompletesSaga(id=2, version=1, created_at=datetime.now())],
+        )
+        await skipped.evaluate(EventThatContinuesSaga(id=3, version=2))
+        self.assertFalse(hasattr(skipped, "received"))
+        self.assertIs(skipped.flags_has_any(EventThatCompletesSaga), True)
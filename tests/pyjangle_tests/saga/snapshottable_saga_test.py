@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import patch
+
+from pyjangle import SagaSnapshotError, handle_saga_event, saga_repository_instance
+from test_helpers.events import EventThatContinuesSaga
+from test_helpers.reset import ResetPyJangleState
+from test_helpers.sagas import SnapshottableSagaForTesting
+
+SAGA_ID = 42
+
+
+@ResetPyJangleState
+class TestSnapshottableSaga(unittest.IsolatedAsyncioTestCase):
+    async def _handle_events(self, count: int):
+        for _ in range(count):
+            await handle_saga_event(
+                SAGA_ID, EventThatContinuesSaga(version=1), SnapshottableSagaForTesting
+            )
+
+    async def test_snapshot_taken_at_frequency(self, *_):
+        await self._handle_events(2)
+        self.assertIsNone(await saga_repository_instance().get_saga_snapshot(SAGA_ID))
+        await self._handle_events(1)
+        event_count, snapshot = await saga_repository_instance().get_saga_snapshot(
+            SAGA_ID
+        )
+        self.assertEqual(event_count, 3)
+        self.assertEqual(snapshot["state"], 3)
+        self.assertEqual(snapshot["flags"], {EventThatContinuesSaga})
+
+    async def test_failed_snapshot_write_logged_and_saga_still_committed(self, *_):
+        repo = saga_repository_instance()
+        with patch.object(repo, "store_saga_snapshot", side_effect=Exception()):
+            with self.assertLogs(level="ERROR"):
+                await self._handle_events(3)
+        saga = await repo.get_saga(SAGA_ID)
+        self.assertEqual(saga.event_count, 3)
+        self.assertIsNone(await repo.get_saga_snapshot(SAGA_ID))
+
+    async def test_only_events_after_snapshot_replayed(self, *_):
+        await self._handle_events(4)
+        saga = await saga_repository_instance().get_saga(SAGA_ID)
+        self.assertEqual(saga.count, 4)
+        self.assertEqual(saga.event_count, 4)
+        self.assertEqual(saga.replayed_event_count, 1)
+        self.assertEqual(saga.flags, {EventThatContinuesSaga})
+
+    async def test_invalid_snapshot_deleted_and_all_events_replayed(self, *_):
+        await self._handle_events(4)
+        repo = saga_repository_instance()
+        await repo.store_saga_snapshot(SAGA_ID, 3, {"flags": set(), "state": "invalid"})
+        saga = await repo.get_saga(SAGA_ID)
+        self.assertEqual(saga.count, 4)
+        self.assertEqual(saga.replayed_event_count, 4)
+        self.assertIsNone(await repo.get_saga_snapshot(SAGA_ID))
+
+    def test_apply_snapshot_wraps_errors(self, *_):
+        saga = SnapshottableSagaForTesting(SAGA_ID)
+        with self.assertRaises(SagaSnapshotError):
+            saga.apply_snapshot(3, {"flags": set(), "state": "invalid"})
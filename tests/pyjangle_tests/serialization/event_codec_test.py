@@ -0,0 +1,137 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import json
+import unittest
+from uuid import UUID, uuid4
+
+from pyjangle import EventCodec, EventCodecError, RegisterEvent, VersionedEvent
+from test_helpers.json_encode_decode import CustomJSONEncoder
+from test_helpers.reset import ResetPyJangleState
+
+
+def _register_events():
+    @RegisterEvent("EventWithEveryKind")
+    @dataclass(kw_only=True)
+    class EventWithEveryKind(VersionedEvent):
+        amount: Decimal
+        due_at: datetime
+        correlation_id: UUID
+        note: str | None = None
+        is_flagged: bool = False
+        ratio: float = 0.0
+        big: int = 0
+        payload: bytes = b""
+        items: list = field(default_factory=list)
+        attributes: dict = field(default_factory=dict)
+
+    return EventWithEveryKind
+
+
+@ResetPyJangleState
+class TestEventCodec(unittest.TestCase):
+    def test_round_trip(self, *_):
+        event_type = _register_events()
+        codec = EventCodec()
+        events = [
+            event_type(
+                version=1,
+                amount=Decimal("-12.3400"),
+                due_at=datetime(2021, 3, 4, 5, 6, 7, 891011),
+                correlation_id=uuid4(),
+                note="héllo",
+                is_flagged=True,
+                ratio=0.25,
+                big=2**80,
+                payload=b"\x00\x01",
+                items=[1, "a", None, [Decimal("1.5")]],
+                attributes={"nested": {"at": datetime(1960, 1, 1)}, 3: False},
+            ),
+            event_type(
+                version=2,
+                amount=Decimal("1E+5"),
+                due_at=datetime(2021, 3, 4, tzinfo=timezone(timedelta(hours=-5))),
+                correlation_id=uuid4(),
+            ),
+        ]
+        for event in events:
+            decoded = codec.decode(codec.encode(event))
+            self.assertEqual(decoded, event)
+        self.assertEqual(decoded.due_at.utcoffset(), timedelta(hours=-5))
+
+    def test_decodes_with_new_codec_instance(self, *_):
+        event_type = _register_events()
+        event = event_type(
+            version=1, amount=Decimal(1), due_at=datetime.now(), correlation_id=uuid4()
+        )
+        self.assertEqual(EventCodec().decode(EventCodec().encode(event)), event)
+
+    def test_json_round_trip(self, *_):
+        event_type = _register_events()
+        codec = EventCodec()
+        event = event_type(
+            version=1,
+            amount=Decimal("2.50"),
+            due_at=datetime(2021, 1, 1),
+            correlation_id=uuid4(),
+            items=[Decimal("1")],
+        )
+        json_dict = codec.to_json_dict(event)
+        self.assertEqual(json_dict["amount"], "2.50")
+        self.assertEqual(json_dict["items"], ["1"])
+        # JSON has no representation for bytes.
+        del json_dict["payload"]
+        json_dict = json.loads(json.dumps(json_dict))
+        migrated = codec.from_json_dict("EventWithEveryKind", json_dict)
+        self.assertEqual(migrated.amount, Decimal("2.50"))
+        self.assertEqual(migrated.due_at, datetime(2021, 1, 1))
+        self.assertEqual(migrated.correlation_id, event.correlation_id)
+        self.assertEqual(codec.decode(codec.encode(migrated)).amount, event.amount)
+
+    def test_from_json_dict_reads_existing_json_serializer_output(self, *_):
+        event_type = _register_events()
+        event = event_type(
+            version=1,
+            amount=Decimal("7"),
+            due_at=datetime(2022, 2, 2),
+            correlation_id=uuid4(),
+        )
+        json_dict = json.loads(
+            json.dumps(
+                {**vars(event), "correlation_id": str(event.correlation_id)},
+                cls=CustomJSONEncoder,
+                default=str,
+            )
+        )
+        self.assertEqual(
+            EventCodec().from_json_dict(event_type, json_dict).due_at,
+            datetime(2022, 2, 2),
+        )
+
+    def test_errors(self, *_):
+        event_type = _register_events()
+        codec = EventCodec()
+        event = event_type(
+            version=1,
+            amount=Decimal(1),
+            due_at=datetime.now(),
+            correlation_id=uuid4(),
+            items=[object()],
+        )
+        with self.assertRaises(EventCodecError):
+            codec.encode(event)
+        event.items = []
+        encoded = codec.encode(event)
+        with self.assertRaises(EventCodecError):
+            codec.decode(encoded[:-3])
+        with self.assertRaises(EventCodecError):
+            codec.decode(b"\x01\x00\x00\x00\x00\x00\x00")
+        with self.assertRaises(EventCodecError):
+            codec.decode(b"\x02" + encoded[1:])
+
+        @dataclass(kw_only=True)
+        class Unregistered(VersionedEvent):
+            pass
+
+        with self.assertRaises(EventCodecError):
+            codec.encode(Unregistered(version=1))
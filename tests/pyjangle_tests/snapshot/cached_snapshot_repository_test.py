@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import patch
+
+from pyjangle import CachedSnapshotRepository, InMemorySnapshotRepository
+
+
+class CountingSnapshotRepository(InMemorySnapshotRepository):
+    def __init__(self):
+        super().__init__()
+        self.get_count = 0
+
+    async def get_snapshot(self, aggregate_id):
+        self.get_count += 1
+        return await super().get_snapshot(aggregate_id)
+
+
+class CachedCountingSnapshotRepository(
+    CachedSnapshotRepository, CountingSnapshotRepository
+):
+    pass
+
+
+class TestCachedSnapshotRepository(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.repository = CachedCountingSnapshotRepository()
+
+    async def test_snapshots_cached(self):
+        await self.repository.store_snapshot(1, 5, {"count": 5})
+        self.assertEqual(await self.repository.get_snapshot(1), (5, {"count": 5}))
+        self.assertEqual(await self.repository.get_snapshot(1), (5, {"count": 5}))
+        self.assertEqual(self.repository.get_count, 0)
+        self.repository.clear_snapshot_cache()
+        await self.repository.get_snapshot(1)
+        await self.repository.get_snapshot(1)
+        self.assertEqual(self.repository.get_count, 1)
+        self.assertEqual((self.repository.hits, self.repository.misses), (3, 1))
+
+    async def test_cached_snapshots_are_copies(self):
+        snapshot = {"items": [1]}
+        await self.repository.store_snapshot(1, 5, snapshot)
+        snapshot["items"].append(2)
+        _, retrieved = await self.repository.get_snapshot(1)
+        retrieved["items"].append(3)
+        self.assertEqual(await self.repository.get_snapshot(1), (5, {"items": [1]}))
+
+    async def test_absence_cached_until_ttl_expires(self):
+        self.repository.negative_ttl_seconds = 10
+        self.assertIsNone(await self.repository.get_snapshot(1))
+        self.assertIsNone(await self.repository.get_snapshot(1))
+        self.assertEqual(self.repository.get_count, 1)
+        with patch("time.monotonic", return_value=float("inf")):
+            self.assertIsNone(await self.repository.get_snapshot(1))
+        self.assertEqual(self.repository.get_count, 2)
+
+    async def test_store_replaces_cached_absence(self):
+        self.repository.negative_ttl_seconds = 10
+        await self.repository.get_snapshot(1)
+        await self.repository.store_snapshots([(1, 2, "two")])
+        self.assertEqual(await self.repository.get_snapshot(1), (2, "two"))
+        self.assertEqual(self.repository.get_count, 1)
+
+    async def test_delete_invalidates(self):
+        await self.repository.store_snapshot(1, 5, "five")
+        await self.repository.delete_snapshot(1)
+        self.assertIsNone(await self.repository.get_snapshot(1))
+        self.assertEqual(self.repository.get_count, 1)
+
+    async def test_evicts_least_recently_used_by_size(self):
+        snapshot = "x" * 1000
+        size = self.repository.get_snapshot_size(snapshot)
+        self.repository.max_bytes = size * 2
+        await self.repository.store_snapshot(1, 1, snapshot)
+        await self.repository.store_snapshot(2, 1, snapshot)
+        await self.repository.get_snapshot(1)
+        await self.repository.store_snapshot(3, 1, snapshot)
+        self.assertEqual(self.repository.cached_bytes, size * 2)
+        await self.repository.get_snapshot(1)
+        await self.repository.get_snapshot(3)
+        self.assertEqual(self.repository.get_count, 0)
+        await self.repository.get_snapshot(2)
+        self.assertEqual(self.repository.get_count, 1)
+
+    async def test_snapshot_larger_than_cache_not_cached(self):
+        self.repository.max_bytes = 10
+        await self.repository.store_snapshot(1, 1, "x" * 1000)
+        self.assertEqual(self.repository.cached_bytes, 0)
+        self.assertEqual(await self.repository.get_snapshot(1), (1, "x" * 1000))
+
+    def test_snapshot_size_includes_contents(self):
+        small = self.repository.get_snapshot_size({"a": 1})
+        large = self.repository.get_snapshot_size({"a": "x" * 10000})
+        self.assertGreater(large - small, 10000)
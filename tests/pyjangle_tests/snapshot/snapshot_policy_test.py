@@ -0,0 +1,112 @@
+import unittest
+
+from pyjangle import (
+    Aggregate,
+    Command,
+    DuplicateSnapshotPolicyError,
+    FixedFrequencySnapshotPolicy,
+    RegisterAggregate,
+    ReplayCostSnapshotPolicy,
+    Snapshottable,
+    VersionedEvent,
+    handle_command,
+    reconstitute_aggregate_state,
+    register_snapshot_policy,
+    snapshot_policy_instance,
+    snapshot_repository_instance,
+    validate_command,
+)
+from test_helpers.reset import ResetPyJangleState
+
+
+class PostThreeEvents(Command):
+    def get_aggregate_id(self):
+        return 1
+
+
+class Incremented(VersionedEvent):
+    @classmethod
+    def deserialize(cls, data: any) -> any:
+        pass
+
+
+@RegisterAggregate
+class ThreeEventAggregate(Aggregate, Snapshottable):
+    def __init__(self, id: any):
+        super().__init__(id)
+        self.count = 0
+
+    @validate_command(PostThreeEvents)
+    def post_three_events(self, command: PostThreeEvents, next_version: int):
+        for version in range(next_version, next_version + 3):
+            self.post_new_event(Incremented(version=version))
+
+    @reconstitute_aggregate_state(Incremented)
+    def from_incremented(self, event: Incremented):
+        self.count += 1
+
+    def apply_snapshot_hook(self, snapshot):
+        self.count = snapshot
+
+    def get_snapshot(self) -> any:
+        return self.count
+
+    def get_snapshot_frequency(self) -> int:
+        return 5
+
+
+@ResetPyJangleState
+class TestSnapshotPolicy(unittest.IsolatedAsyncioTestCase):
+    async def test_default_policy_is_fixed_frequency(self, *_):
+        self.assertIsInstance(snapshot_policy_instance(), FixedFrequencySnapshotPolicy)
+
+    async def test_register_multiple_snapshot_policies_then_error(self, *_):
+        register_snapshot_policy(ReplayCostSnapshotPolicy())
+        with self.assertRaises(DuplicateSnapshotPolicyError):
+            register_snapshot_policy(ReplayCostSnapshotPolicy())
+
+    async def test_when_command_skips_past_frequency_then_snapshot_taken(self, *_):
+        snapshots = snapshot_repository_instance()
+        await handle_command(PostThreeEvents())
+        self.assertIsNone(await snapshots.get_snapshot(1))
+        # Version 6 skips past the multiple of 5.
+        await handle_command(PostThreeEvents())
+        self.assertEqual(await snapshots.get_snapshot(1), (6, 6))
+        await handle_command(PostThreeEvents())
+        self.assertEqual(await snapshots.get_snapshot(1), (6, 6))
+        await handle_command(PostThreeEvents())
+        self.assertEqual(await snapshots.get_snapshot(1), (12, 12))
+
+    async def test_replay_cost_policy_learns_from_handled_commands(self, *_):
+        policy = register_snapshot_policy(
+            ReplayCostSnapshotPolicy(max_replay_seconds=float("inf"))
+        )
+        await handle_command(PostThreeEvents())
+        self.assertIsNone(policy.seconds_per_event(ThreeEventAggregate))
+        await handle_command(PostThreeEvents())
+        self.assertIsNotNone(policy.seconds_per_event(ThreeEventAggregate))
+        self.assertIsNone(await snapshot_repository_instance().get_snapshot(1))
+
+
+class TestReplayCostSnapshotPolicy(unittest.TestCase):
+    def test_snapshots_when_estimated_replay_time_exceeded(self):
+        policy = ReplayCostSnapshotPolicy(max_replay_seconds=1)
+        aggregate = ThreeEventAggregate(1)
+        self.assertFalse(policy.should_snapshot(aggregate, 1000))
+        policy.record_replay(ThreeEventAggregate, 10, 1)
+        self.assertAlmostEqual(policy.seconds_per_event(ThreeEventAggregate), 0.1)
+        self.assertFalse(policy.should_snapshot(aggregate, 9))
+        self.assertTrue(policy.should_snapshot(aggregate, 10))
+
+    def test_moving_average(self):
+        policy = ReplayCostSnapshotPolicy(smoothing=0.5)
+        policy.record_replay(ThreeEventAggregate, 1, 1)
+        policy.record_replay(ThreeEventAggregate, 1, 3)
+        policy.record_replay(ThreeEventAggregate, 0, 0)
+        self.assertAlmostEqual(policy.seconds_per_event(ThreeEventAggregate), 2)
+
+    def test_max_events_replayed_is_a_hard_limit(self):
+        policy = ReplayCostSnapshotPolicy(max_events_replayed=3)
+        aggregate = ThreeEventAggregate(1)
+        self.assertFalse(policy.should_snapshot(aggregate, 2))
+        self.assertTrue(policy.should_snapshot(aggregate, 3))
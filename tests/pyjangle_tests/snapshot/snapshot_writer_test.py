@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from pyjangle import (
+    begin_writing_snapshots,
+    get_snapshot_write_queue_size,
+    handle_command,
+    set_snapshot_write_queue_size,
+    snapshot_repository_instance,
+    snapshot_writer_instance,
+    stop_writing_snapshots,
+)
+import test_helpers.aggregates
+from test_helpers.commands import CommandThatShouldSucceedA
+from test_helpers.reset import ResetPyJangleState
+
+
+@ResetPyJangleState
+class TestSnapshotWriter(unittest.IsolatedAsyncioTestCase):
+    async def test_pending_snapshots_coalesced_to_newest_version(self, *_):
+        writer = snapshot_writer_instance()
+        await writer.enqueue(1, 2, "two")
+        await writer.enqueue(1, 4, "four")
+        await writer.enqueue(1, 3, "three")
+        await writer.enqueue(2, 1, "one")
+        self.assertEqual(len(writer), 2)
+        with patch.object(
+            snapshot_repository_instance(),
+            "store_snapshots",
+            wraps=snapshot_repository_instance().store_snapshots,
+        ) as store_snapshots:
+            begin_writing_snapshots()
+            await stop_writing_snapshots()
+        store_snapshots.assert_called_once_with([(1, 4, "four"), (2, 1, "one")])
+        self.assertEqual(
+            await snapshot_repository_instance().get_snapshot(1), (4, "four")
+        )
+        self.assertFalse(writer.is_running)
+
+    async def test_command_returns_before_snapshot_written(self, *_):
+        written = asyncio.Event()
+        store_snapshot = snapshot_repository_instance().store_snapshot
+
+        async def slow_store_snapshot(*args):
+            await written.wait()
+            await store_snapshot(*args)
+
+        begin_writing_snapshots()
+        await asyncio.sleep(0)
+        with patch.object(
+            snapshot_repository_instance(), "store_snapshot", slow_store_snapshot
+        ):
+            # Snapshot frequency is 2.
+            await handle_command(CommandThatShouldSucceedA())
+            response = await handle_command(CommandThatShouldSucceedA())
+            self.assertTrue(response.is_success)
+            self.assertIsNone(await snapshot_repository_instance().get_snapshot(1))
+            written.set()
+            await stop_writing_snapshots()
+        self.assertEqual(await snapshot_repository_instance().get_snapshot(1), (2, 2))
+
+    async def test_when_snapshot_write_fails_then_command_succeeds(self, *_):
+        with patch.object(
+            snapshot_repository_instance(), "store_snapshot", side_effect=Exception
+        ):
+            await handle_command(CommandThatShouldSucceedA())
+            with self.assertLogs(level="ERROR"):
+                response = await handle_command(CommandThatShouldSucceedA())
+            self.assertTrue(response.is_success)
+            begin_writing_snapshots()
+            await asyncio.sleep(0)
+            await handle_command(CommandThatShouldSucceedA())
+            with self.assertLogs(level="ERROR"):
+                response = await handle_command(CommandThatShouldSucceedA())
+                await snapshot_writer_instance().flush()
+            self.assertTrue(response.is_success)
+            await stop_writing_snapshots()
+
+    async def test_enqueue_waits_when_queue_full(self, *_):
+        original_size = get_snapshot_write_queue_size()
+        self.addCleanup(set_snapshot_write_queue_size, original_size)
+        set_snapshot_write_queue_size(1)
+        writer = snapshot_writer_instance()
+        begin_writing_snapshots()
+        await asyncio.sleep(0)
+        await writer.enqueue(1, 1, "one")
+        second = asyncio.create_task(writer.enqueue(2, 1, "one"))
+        await asyncio.sleep(0)
+        self.assertEqual(len(writer), 1)
+        await writer.flush()
+        await second
+        await stop_writing_snapshots()
+        self.assertEqual(
+            await snapshot_repository_instance().get_snapshot(2), (1, "one")
+        )